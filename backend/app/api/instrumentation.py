@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import functools
+import inspect
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.services.metrics import REQUEST_SECONDS, observe_stage
+
+# perf_counter marks for the request being handled: start, entered, exited
+_marks: ContextVar[dict[str, float] | None] = ContextVar("request_marks", default=None)
+
+
+def _mark(name: str) -> None:
+    marks = _marks.get()
+    if marks is not None:
+        marks[name] = perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if getattr(endpoint, "_timed", False):
+        return endpoint
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            _mark("entered")
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark("exited")
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            _mark("entered")
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark("exited")
+
+    wrapper._timed = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records request latency per route, split into stages.
+
+    ``request_parse`` covers reading and validating the body (everything before the
+    endpoint runs), ``handler`` the endpoint itself and ``response_serialize`` the
+    response model encoding after it returns.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            marks = {"start": perf_counter()}
+            token = _marks.set(marks)
+            try:
+                return await handler(request)
+            finally:
+                _marks.reset(token)
+                end = perf_counter()
+                REQUEST_SECONDS.observe(end - marks["start"], route=route, method=request.method)
+                if "entered" in marks and "exited" in marks:
+                    observe_stage("request_parse", marks["entered"] - marks["start"])
+                    observe_stage("handler", marks["exited"] - marks["entered"])
+                    observe_stage("response_serialize", end - marks["exited"])
+
+        return timed_handler
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+from pydantic_core import to_json
+
+from app.services.interchange import (
+    JSON_MEDIA_TYPE,
+    MIN_COMPRESS_BYTES,
+    BodyDecoder,
+    InterchangeError,
+    compress,
+    encode_body,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class JSONBytesResponse(Response):
+    """JSON response whose body is already serialized (or serialized in one pass by pydantic-core).
+
+    Skips FastAPI's ``jsonable_encoder`` dict round trip; routes keep their
+    ``response_model`` for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
+
+
+def interchange_response(
+    request: Request, content: Any, json_body: Callable[[], bytes] | None = None
+) -> Response:
+    """Encode ``content`` as JSON or MessagePack per Accept, compressed per Accept-Encoding.
+
+    ``json_body`` optionally builds a faster, equivalent JSON serialization of ``content``.
+    """
+    try:
+        media_type = negotiate_media_type(request.headers.get("accept"))
+    except InterchangeError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    if media_type == JSON_MEDIA_TYPE and json_body is not None:
+        body = json_body()
+    else:
+        body = encode_body(content, media_type)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def decoded_body(model: type[M]) -> Callable[[Request], Awaitable[M]]:
+    """Dependency reading a request body as ``model`` in any supported interchange format.
+
+    Chunks are decompressed and decoded as they arrive; the final validation runs
+    in the threadpool so a large body does not block the event loop.
+    """
+
+    async def dependency(request: Request) -> M:
+        try:
+            decoder = BodyDecoder(request.headers.get("content-type"), request.headers.get("content-encoding"))
+            async for chunk in request.stream():
+                decoder.feed(chunk)
+            return await run_in_threadpool(decoder.decode, model)
+        except InterchangeError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors())
+
+    return dependency
@@ -1,31 +1,105 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import Response
+import hmac
+import io
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+from typing import BinaryIO
 
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+
+from app.api.instrumentation import TimedRoute
+from app.api.responses import JSONBytesResponse, decoded_body, interchange_response
 from app.models.schemas import (
+    BulkExportRequest,
+    CalcResult,
     CalcRunRequest,
     CsvImportRequest,
     ExcelExportRequest,
     ImportApplyResponse,
+    ImportCommitRequest,
     ImportPreviewResponse,
     JsonExportRequest,
     JsonExportResponse,
     JsonImportRequest,
     PasteImportRequest,
     Project,
+    ProfileReport,
+    ProjectPatchRequest,
+    ProjectPatchResponse,
+    ProjectSessionResponse,
+    ProjectVersionInfo,
     NearestRegionResponse,
     ReferenceTableResponse,
+    StoredExcelExportRequest,
+    StoredProjectResponse,
     ValidateResponse,
+    ValidationDeltaResponse,
+    ValidationPatchRequest,
+    ValidationSessionResponse,
+)
+from app.services.bulk_export import check_stored_items, iter_bulk_export
+from app.services.calculation import summarize_systems, total_loads
+from app.services.compute_pool import (
+    Overloaded,
+    ProjectInvalid,
+    calc_job,
+    client_id,
+    excel_job,
+    get_compute_pool,
+    json_import_job,
+    preview_job,
+    request_priority,
+    upload_apply_job,
+    upload_preview_job,
+    xlsx_apply_job,
+    xlsx_preview_job,
+)
+from app.services.importers import (
+    WorkbookError,
+    apply_csv_import,
+    adopt_import,
+    apply_paste_import,
+    commit_detached_import,
+    detach_import,
+    preview_csv_import,
+    preview_paste_import,
+)
+from app.services.json_io import export_project_json_bytes
+from app.services.metrics import observe_project
+from app.services.profiling import get_profile, profile_call, store_profile
+from app.services.project_session import (
+    JsonPatchError,
+    VersionConflict,
+    close_project_session,
+    get_project_session,
+    open_project_session,
+)
+from app.services.project_store import ProjectNotFound, StoredVersion, get_project_store
+from app.services.reference import get_nearest_region, get_reference_table_json
+from app.services.result_cache import (
+    calc_cache_key,
+    etag_for,
+    etag_matches,
+    excel_cache_key,
+    get_result_cache,
+)
+from app.services.validation import (
+    close_validation_session,
+    get_validation_session,
+    open_validation_session,
+    validate_project,
 )
-from app.services.calculation import run_calculation
-from app.services.excel_export import export_excel
-from app.services.importers import apply_csv_import, apply_paste_import, preview_csv_import, preview_paste_import
-from app.services.json_io import export_project_json, import_project_json
-from app.services.reference import get_nearest_region, get_reference_table
-from app.services.validation import validate_project
 
-router = APIRouter()
+# uploads larger than this (all files of a request together) get 413 before they are read
+IMPORT_MAX_UPLOAD_BYTES = int(os.environ.get("IMPORT_MAX_UPLOAD_BYTES", str(64 * 1024 * 1024)))
+
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/projects/validate", response_model=ValidateResponse)
@@ -35,56 +109,530 @@ def validate_project_endpoint(project: Project) -> ValidateResponse:
     return ValidateResponse(valid=valid, issues=issues)
 
 
-@router.post("/calc/run")
-def calc_run_endpoint(req: CalcRunRequest):
-    issues = validate_project(req.project)
-    if any(i.level == "error" for i in issues):
-        raise HTTPException(status_code=400, detail={"issues": [i.model_dump() for i in issues]})
-    result = run_calculation(req.project)
-    return result
+@router.post("/projects/validate/session", response_model=ValidationSessionResponse)
+def validation_session_open_endpoint(project: Project) -> ValidationSessionResponse:
+    session_id, session = open_validation_session(project)
+    issues = session.issues
+    valid = not any(i.level == "error" for i in issues)
+    return ValidationSessionResponse(session_id=session_id, valid=valid, issues=issues)
+
+
+@router.post("/projects/validate/session/{session_id}", response_model=ValidationDeltaResponse)
+def validation_session_patch_endpoint(session_id: str, req: ValidationPatchRequest) -> ValidationDeltaResponse:
+    session = get_validation_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Validation session not found: {session_id}")
+    try:
+        added, removed = session.apply(req.changes)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+    valid = not any(i.level == "error" for i in session.issues)
+    return ValidationDeltaResponse(session_id=session_id, valid=valid, added=added, removed=removed)
+
+
+@router.delete("/projects/validate/session/{session_id}")
+def validation_session_close_endpoint(session_id: str):
+    if not close_validation_session(session_id):
+        raise HTTPException(status_code=404, detail=f"Validation session not found: {session_id}")
+    return {"closed": session_id}
+
+
+@router.post("/projects/session", response_model=ProjectSessionResponse)
+def project_session_open_endpoint(project: Project) -> ProjectSessionResponse:
+    session_id, session = open_project_session(project)
+    room_results = session.room_results()
+    return JSONBytesResponse(
+        ProjectSessionResponse(
+            session_id=session_id,
+            version=session.version,
+            valid=session.valid,
+            issues=session.validation.issues,
+            calculated=session.calculated,
+            room_results=room_results,
+            system_results=summarize_systems(session.project, room_results) if session.calculated else [],
+            totals=total_loads(room_results) if session.calculated else {},
+        )
+    )
+
+
+@router.get("/projects/session/{session_id}", response_model=Project)
+def project_session_get_endpoint(session_id: str):
+    session = get_project_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Project session not found: {session_id}")
+    return JSONBytesResponse(session.project, headers={"ETag": f'"{session.version}"'})
+
+
+@router.post("/projects/session/{session_id}/patch", response_model=ProjectPatchResponse)
+def project_session_patch_endpoint(session_id: str, req: ProjectPatchRequest):
+    session = get_project_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Project session not found: {session_id}")
+    try:
+        delta = session.apply(req.patch, req.changes, base_version=req.base_version)
+    except VersionConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except JsonPatchError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+    return JSONBytesResponse(ProjectPatchResponse(session_id=session_id, **delta.__dict__))
+
+
+@router.delete("/projects/session/{session_id}")
+def project_session_close_endpoint(session_id: str):
+    if not close_project_session(session_id):
+        raise HTTPException(status_code=404, detail=f"Project session not found: {session_id}")
+    return {"closed": session_id}
+
+
+def _load_stored(project_id: str, version: int | None = None) -> tuple[StoredVersion, Project]:
+    try:
+        return get_project_store().load(project_id, version)
+    except ProjectNotFound as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+
+
+def _stored_response(stored: StoredVersion, project: Project, changed: bool) -> StoredProjectResponse:
+    issues = get_project_store().issues(stored, project)
+    return StoredProjectResponse(
+        id=stored.project_id,
+        version=stored.version,
+        content_hash=stored.content_hash,
+        changed=changed,
+        valid=not any(i.level == "error" for i in issues),
+        issues=issues,
+    )
+
+
+@router.post("/projects", response_model=StoredProjectResponse, status_code=201)
+def project_create_endpoint(project: Project) -> StoredProjectResponse:
+    try:
+        stored, changed = get_project_store().save(project, create=True)
+    except FileExistsError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return _stored_response(stored, project, changed)
+
+
+@router.get("/projects/{project_id}", response_model=Project)
+def project_get_endpoint(project_id: str, version: int | None = Query(None)):
+    stored, project = _load_stored(project_id, version)
+    return JSONBytesResponse(
+        project,
+        headers={"ETag": f'"{stored.content_hash}"', "X-Project-Version": str(stored.version)},
+    )
+
+
+@router.put("/projects/{project_id}", response_model=StoredProjectResponse)
+def project_update_endpoint(project_id: str, project: Project) -> StoredProjectResponse:
+    if project.id != project_id:
+        raise HTTPException(status_code=400, detail=f"Project id mismatch: {project.id} != {project_id}")
+    try:
+        stored, changed = get_project_store().save(project)
+    except ProjectNotFound as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+    return _stored_response(stored, project, changed)
+
+
+@router.delete("/projects/{project_id}")
+def project_delete_endpoint(project_id: str):
+    if not get_project_store().delete(project_id):
+        raise HTTPException(status_code=404, detail=f"Project not found: {project_id}")
+    return {"deleted": project_id}
+
+
+@router.get("/projects/{project_id}/versions", response_model=list[ProjectVersionInfo])
+def project_versions_endpoint(project_id: str) -> list[ProjectVersionInfo]:
+    try:
+        versions = get_project_store().versions(project_id)
+    except ProjectNotFound as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+    infos = []
+    previous: dict[str, str] = {}
+    for stored in versions:
+        infos.append(
+            ProjectVersionInfo(
+                version=stored.version,
+                content_hash=stored.content_hash,
+                created_at=stored.created_at,
+                changed_parts=sorted(name for name, h in stored.parts.items() if previous.get(name) != h),
+            )
+        )
+        previous = stored.parts
+    return infos
+
+
+@router.post("/projects/{project_id}/calc/run", response_model=CalcResult)
+def project_calc_run_endpoint(request: Request, project_id: str, version: int | None = Query(None)):
+    stored, project = _load_stored(project_id, version)
+    # validation is cached per content hash, so unchanged versions are not re-validated
+    return _cached_calc_response(request, project, stored)
+
+
+@router.post("/projects/{project_id}/export/excel")
+def project_excel_export_endpoint(request: Request, project_id: str, req: StoredExcelExportRequest | None = None):
+    req = req or StoredExcelExportRequest()
+    stored, project = _load_stored(project_id, req.version)
+    return _excel_response(
+        request, project, None, req.layout, req.engine, req.output_filename, stored.content_hash
+    )
+
+
+@router.post("/projects/{project_id}/export/json", response_model=JsonExportResponse)
+def project_json_export_endpoint(request: Request, project_id: str, version: int | None = Query(None)):
+    _, project = _load_stored(project_id, version)
+    return interchange_response(
+        request,
+        {"payload": {"project": project}},
+        json_body=lambda: export_project_json_bytes(project, None),
+    )
+
+
+@contextmanager
+def _admission(request: Request, name: str, rooms: int = 0) -> Iterator[None]:
+    """Hold one of endpoint group ``name``'s compute slots; overload becomes 429/503 with Retry-After."""
+    try:
+        with get_compute_pool().admission(name, request_priority(request, rooms)):
+            yield
+    except Overloaded as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail, headers={"Retry-After": str(exc.retry_after)})
+
+
+def _pooled(request: Request, fn, *args, rooms: int = 0):
+    """Run ``fn(*args)`` in the compute pool; call inside an ``_admission`` block."""
+    return get_compute_pool().call(fn, *args, priority=request_priority(request, rooms), client=client_id(request))
+
+
+def _offload(request: Request, name: str, fn, *args, rooms: int = 0):
+    with _admission(request, name, rooms):
+        return _pooled(request, fn, *args, rooms=rooms)
+
+
+def _require_admin(request: Request) -> None:
+    """Admin-only features need the ADMIN_TOKEN value in X-Admin-Token (or as a Bearer token)."""
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin features are disabled (ADMIN_TOKEN is not set)")
+    supplied = request.headers.get("x-admin-token")
+    if supplied is None:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        supplied = credentials if scheme.lower() == "bearer" else ""
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _issues_error(issues: list) -> HTTPException:
+    return HTTPException(status_code=400, detail={"issues": [i.model_dump() for i in issues]})
+
+
+def _cached_calc_response(request: Request, project: Project, stored: StoredVersion | None = None) -> Response:
+    """Calculation result for ``project`` from the result cache; on a miss the project is
+    validated and calculated in the compute pool. Stored versions reuse their cached
+    validation instead."""
+    observe_project(project)
+    key = calc_cache_key(project, stored.content_hash if stored is not None else None)
+    etag = etag_for(key)
+    if etag_matches(request.headers.get("if-none-match"), etag, lambda: key in get_result_cache()):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    def compute() -> bytes:
+        if stored is not None:
+            issues = get_project_store().issues(stored, project)
+            if any(i.level == "error" for i in issues):
+                raise _issues_error(issues)
+        try:
+            return _pooled(request, calc_job, project, stored is None, rooms=len(project.rooms))
+        except ProjectInvalid as exc:
+            raise _issues_error(exc.issues)
+
+    cache = get_result_cache()
+    body = cache.get(key)
+    if body is None:
+        # concurrent identical requests share one calculation; the ones waiting on it
+        # hold a request thread too, so each takes a slot
+        with _admission(request, "calc", len(project.rooms)):
+            body = cache.get_or_compute(key, compute)
+    return JSONBytesResponse(body, headers={"ETag": etag})
+
+
+@router.post("/calc/run", response_model=CalcResult)
+def calc_run_endpoint(
+    request: Request,
+    req: CalcRunRequest,
+    profile: bool = Query(False, description="Profile the run (admin only); see X-Profile-Id."),
+):
+    if profile:
+        _require_admin(request)
+        observe_project(req.project)
+        try:
+            body, report = _offload(
+                request, "calc", profile_call, "calc", calc_job, req.project, True, rooms=len(req.project.rooms)
+            )
+        except ProjectInvalid as exc:
+            raise _issues_error(exc.issues)
+        return JSONBytesResponse(body, headers={"X-Profile-Id": store_profile(report)})
+    return _cached_calc_response(request, req.project)
+
+
+def _offloaded_preview(request: Request, job, *args) -> ImportPreviewResponse:
+    preview, detached = _offload(request, "import", job, *args)
+    # the import token is issued here, where /import/commit looks it up
+    return preview.model_copy(update={"import_token": adopt_import(detached)})
 
 
 @router.post("/import/csv/preview", response_model=ImportPreviewResponse)
-def csv_preview_endpoint(req: CsvImportRequest):
-    return preview_csv_import(req)
+def csv_preview_endpoint(request: Request, req: CsvImportRequest):
+    return _offloaded_preview(request, preview_job, preview_csv_import, req)
 
 
 @router.post("/import/csv/apply", response_model=ImportApplyResponse)
-def csv_apply_endpoint(req: CsvImportRequest):
-    return apply_csv_import(req)
+def csv_apply_endpoint(request: Request, req: CsvImportRequest):
+    return _offload(request, "import", apply_csv_import, req)
+
+
+@router.post("/import/commit", response_model=ImportApplyResponse)
+def import_commit_endpoint(request: Request, req: ImportCommitRequest):
+    # admitted before the single-use token is taken, so a 429 leaves it usable
+    with _admission(request, "import"):
+        detached = detach_import(req.import_token)
+        if detached is None:
+            raise HTTPException(status_code=404, detail=f"Import token not found or expired: {req.import_token}")
+        return _pooled(request, commit_detached_import, detached, req.project)
+
+
+def _upload_project(project: UploadFile | None) -> Project | None:
+    if project is None:
+        return None
+    try:
+        return Project.model_validate_json(project.file.read())
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+
+
+def _run_upload_import(run, files: list[UploadFile], project: UploadFile | None, **options):
+    uploads = [(f.filename or "", f.file) for f in files]
+    try:
+        return run(uploads, _upload_project(project), **options)
+    except (LookupError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"CSVの文字コードを解釈できません: {exc}")
+
+
+def _read_uploads(uploads: list[tuple[str, BinaryIO]]) -> list[tuple[str, bytes]]:
+    """Upload contents for a pool job; 413 when together they exceed IMPORT_MAX_UPLOAD_BYTES."""
+    # uploads are spooled to temporary files, so the size is known without reading them
+    size = 0
+    for _, fileobj in uploads:
+        size += fileobj.seek(0, io.SEEK_END)
+        fileobj.seek(0)
+    if size > IMPORT_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {IMPORT_MAX_UPLOAD_BYTES} bytes")
+    return [(name, fileobj.read()) for name, fileobj in uploads]
+
+
+def _offloaded_upload_preview(request: Request, uploads, project: Project | None, **options):
+    return _offloaded_preview(request, upload_preview_job, _read_uploads(uploads), project, options)
+
+
+def _offloaded_upload_apply(request: Request, uploads, project: Project | None, **options):
+    return _offload(request, "import", upload_apply_job, _read_uploads(uploads), project, options)
+
+
+@router.post("/import/csv/upload/preview", response_model=ImportPreviewResponse)
+def csv_upload_preview_endpoint(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    project: UploadFile | None = File(None),
+    has_header: bool = Form(True),
+    delete_missing: bool = Form(False),
+    encoding: str = Form("utf-8-sig"),
+):
+    return _run_upload_import(
+        partial(_offloaded_upload_preview, request),
+        files,
+        project,
+        has_header=has_header,
+        delete_missing=delete_missing,
+        encoding=encoding,
+    )
+
+
+@router.post("/import/csv/upload/apply", response_model=ImportApplyResponse)
+def csv_upload_apply_endpoint(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    project: UploadFile | None = File(None),
+    has_header: bool = Form(True),
+    delete_missing: bool = Form(False),
+    encoding: str = Form("utf-8-sig"),
+):
+    return _run_upload_import(
+        partial(_offloaded_upload_apply, request),
+        files,
+        project,
+        has_header=has_header,
+        delete_missing=delete_missing,
+        encoding=encoding,
+    )
+
+
+def _run_xlsx_import(run, file: UploadFile, project: UploadFile | None, has_header: bool, delete_missing: bool):
+    try:
+        return run(file.file, _upload_project(project), has_header, delete_missing)
+    except WorkbookError as exc:
+        raise HTTPException(status_code=400, detail=f"Excelファイルを読み込めません: {exc}")
+
+
+def _offloaded_xlsx_preview(
+    request: Request, fileobj, project: Project | None, has_header: bool, delete_missing: bool
+):
+    [(_, data)] = _read_uploads([("", fileobj)])
+    return _offloaded_preview(request, xlsx_preview_job, data, project, has_header, delete_missing)
+
+
+def _offloaded_xlsx_apply(
+    request: Request, fileobj, project: Project | None, has_header: bool, delete_missing: bool
+):
+    [(_, data)] = _read_uploads([("", fileobj)])
+    return _offload(request, "import", xlsx_apply_job, data, project, has_header, delete_missing)
+
+
+@router.post("/import/xlsx/preview", response_model=ImportPreviewResponse)
+def xlsx_preview_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    project: UploadFile | None = File(None),
+    has_header: bool = Form(True),
+    delete_missing: bool = Form(False),
+):
+    return _run_xlsx_import(partial(_offloaded_xlsx_preview, request), file, project, has_header, delete_missing)
+
+
+@router.post("/import/xlsx/apply", response_model=ImportApplyResponse)
+def xlsx_apply_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    project: UploadFile | None = File(None),
+    has_header: bool = Form(True),
+    delete_missing: bool = Form(False),
+):
+    return _run_xlsx_import(partial(_offloaded_xlsx_apply, request), file, project, has_header, delete_missing)
 
 
 @router.post("/import/paste/preview", response_model=ImportPreviewResponse)
-def paste_preview_endpoint(req: PasteImportRequest):
-    return preview_paste_import(req)
+def paste_preview_endpoint(request: Request, req: PasteImportRequest):
+    return _offloaded_preview(request, preview_job, preview_paste_import, req)
 
 
 @router.post("/import/paste/apply", response_model=ImportApplyResponse)
-def paste_apply_endpoint(req: PasteImportRequest):
-    return apply_paste_import(req)
+def paste_apply_endpoint(request: Request, req: PasteImportRequest):
+    return _offload(request, "import", apply_paste_import, req)
 
 
 @router.post("/import/json")
-def json_import_endpoint(req: JsonImportRequest):
-    project = import_project_json(req)
-    issues = validate_project(project)
-    return {"project": project, "issues": issues}
+def json_import_endpoint(request: Request, req: JsonImportRequest = Depends(decoded_body(JsonImportRequest))):
+    project, issues = _offload(request, "import", json_import_job, req)
+    return interchange_response(request, {"project": project, "issues": issues})
 
 
 @router.post("/export/json", response_model=JsonExportResponse)
-def json_export_endpoint(req: JsonExportRequest):
-    calc = req.calc_result.model_dump() if req.calc_result else None
-    return export_project_json(req.project, calc)
+def json_export_endpoint(request: Request, req: JsonExportRequest = Depends(decoded_body(JsonExportRequest))):
+    payload = {"project": req.project}
+    if req.calc_result is not None:
+        payload["calc_result"] = req.calc_result
+    return interchange_response(
+        request,
+        {"payload": payload},
+        json_body=lambda: export_project_json_bytes(req.project, req.calc_result),
+    )
 
 
-@router.post("/export/excel")
-def excel_export_endpoint(req: ExcelExportRequest):
-    payload = export_excel(req.project, req.calc_result)
-    filename = req.output_filename
+def _cached_calc_result(project: Project, content_hash: str | None) -> CalcResult | None:
+    # only validated results are cached, so a miss is left to the export job to compute
+    body = get_result_cache().get(calc_cache_key(project, content_hash))
+    return CalcResult.model_validate_json(body) if body is not None else None
+
+
+def _excel_response(
+    request: Request,
+    project: Project,
+    calc_result: CalcResult | None,
+    layout: str,
+    engine: str,
+    filename: str,
+    content_hash: str | None = None,
+) -> Response:
+    observe_project(project)
+    key = excel_cache_key(project, calc_result, layout, engine, content_hash)
+    etag = etag_for(key)
+    if etag_matches(request.headers.get("if-none-match"), etag, lambda: key in get_result_cache()):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    def render() -> bytes:
+        calc = calc_result
+        if calc is None and layout == "per_room":
+            calc = _cached_calc_result(project, content_hash)
+        return _pooled(request, excel_job, project, calc, layout, engine, rooms=len(project.rooms))
+
+    cache = get_result_cache()
+    payload = cache.get(key)
+    if payload is None:
+        with _admission(request, "excel", len(project.rooms)):
+            payload = cache.get_or_compute(key, render)
+    return _xlsx_response(payload, filename, {"ETag": etag})
+
+
+def _xlsx_response(payload: bytes, filename: str, headers: dict[str, str]) -> Response:
     return Response(
         content=payload,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        headers={"Content-Disposition": f"attachment; filename={filename}", **headers},
+    )
+
+
+@router.post("/export/excel")
+def excel_export_endpoint(
+    request: Request,
+    req: ExcelExportRequest,
+    profile: bool = Query(False, description="Profile the export (admin only); see X-Profile-Id."),
+):
+    if profile:
+        _require_admin(request)
+        observe_project(req.project)
+        payload, report = _offload(
+            request,
+            "excel",
+            profile_call,
+            "excel",
+            excel_job,
+            req.project,
+            req.calc_result,
+            req.layout,
+            req.engine,
+            rooms=len(req.project.rooms),
+        )
+        return _xlsx_response(payload, req.output_filename, {"X-Profile-Id": store_profile(report)})
+    return _excel_response(request, req.project, req.calc_result, req.layout, req.engine, req.output_filename)
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileReport)
+def profile_get_endpoint(request: Request, profile_id: str) -> ProfileReport:
+    _require_admin(request)
+    report = get_profile(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found or expired: {profile_id}")
+    return report
+
+
+@router.post("/export/bulk")
+def bulk_export_endpoint(request: Request, req: BulkExportRequest):
+    try:
+        check_stored_items(req)
+    except ProjectNotFound as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+    return StreamingResponse(
+        iter_bulk_export(req, get_compute_pool().executor("bulk", client_id(request))),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=heat_load_export.zip"},
     )
 
 
@@ -97,19 +645,21 @@ def nearest_region_endpoint(
     record = get_nearest_region(lat, lon, tag)
     if not record:
         raise HTTPException(status_code=404, detail="No region coordinates available.")
-    return NearestRegionResponse(
-        region=str(record.get("region", "")),
-        lat=float(record.get("lat", 0.0)),
-        lon=float(record.get("lon", 0.0)),
-        distance_km=float(record.get("distance_km", 0.0)),
-        tags=list(record.get("tags", [])),
+    return JSONBytesResponse(
+        NearestRegionResponse(
+            region=str(record.get("region", "")),
+            lat=float(record.get("lat", 0.0)),
+            lon=float(record.get("lon", 0.0)),
+            distance_km=float(record.get("distance_km", 0.0)),
+            tags=list(record.get("tags", [])),
+        )
     )
 
 
 @router.get("/reference/{table_name}", response_model=ReferenceTableResponse)
 def reference_endpoint(table_name: str):
     try:
-        data = get_reference_table(table_name)
+        body = get_reference_table_json(table_name)
     except KeyError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
-    return ReferenceTableResponse(table_name=table_name, data=data)
+    return JSONBytesResponse(body)
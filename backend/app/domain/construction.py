@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.domain.reference_lookup import ReferenceRepository
+from app.models.schemas import ConstructionAssembly, ConstructionLayer
+
+# 外壁外表面熱伝達率αo / 室内表面熱伝達率αi の既定値 [W/(m²・K)]
+DEFAULT_AO = 23.0
+DEFAULT_AI = 9.0
+DEFAULT_U_VALUE = 1.0
+
+_HASH_FIELDS = {"layers", "ao_summer", "ao_winter", "ai", "total_resistance", "u_value_w_m2k", "u_value_override"}
+_CACHE_MAXSIZE = 4096
+
+
+@dataclass(frozen=True)
+class ResolvedConstruction:
+    u_summer: float
+    u_winter: float
+    total_resistance_summer: float | None
+    total_resistance_winter: float | None
+    source: str
+    # layer_no of layers with no resistance from the layer or the material table; counted as 0
+    unresolved_layers: tuple[int, ...] = ()
+
+
+_cache: OrderedDict[str, ResolvedConstruction] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def construction_content_hash(construction: ConstructionAssembly) -> str:
+    payload = construction.model_dump_json(include=_HASH_FIELDS)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def layer_resistance(layer: ConstructionLayer, references: ReferenceRepository) -> float | None:
+    """Thermal resistance of one layer [m²・K/W], or None when it cannot be resolved."""
+    if layer.thermal_resistance is not None:
+        return layer.thermal_resistance
+    material = references.lookup_material(layer.material_name)
+    conductivity = layer.thermal_conductivity
+    if conductivity is None:
+        conductivity = material.get("thermal_conductivity_w_per_mk")
+    if conductivity and layer.thickness_mm:
+        return layer.thickness_mm / 1000.0 / float(conductivity)
+    # 中間空気層は厚さによらず熱抵抗で与えられる
+    gamma = material.get("thermal_constant_gamma_a_m2k_per_w")
+    return float(gamma) if gamma else None
+
+
+def _total_resistance(layers_r: float, ao: float | None, ai: float | None) -> float:
+    return 1.0 / (ao or DEFAULT_AO) + layers_r + 1.0 / (ai or DEFAULT_AI)
+
+
+def _compute(construction: ConstructionAssembly, references: ReferenceRepository) -> ResolvedConstruction:
+    if construction.u_value_override is not None:
+        u = construction.u_value_override
+        return ResolvedConstruction(u, u, None, None, "override")
+    if construction.u_value_w_m2k is not None:
+        u = construction.u_value_w_m2k
+        return ResolvedConstruction(u, u, None, None, "u_value")
+    if construction.layers:
+        layers_r = 0.0
+        unresolved = []
+        for layer in construction.layers:
+            r = layer_resistance(layer, references)
+            if r is None:
+                unresolved.append(layer.layer_no)
+            else:
+                layers_r += r
+        ao_summer = construction.ao_summer or construction.ao_winter
+        ao_winter = construction.ao_winter or construction.ao_summer
+        r_summer = _total_resistance(layers_r, ao_summer, construction.ai)
+        r_winter = _total_resistance(layers_r, ao_winter, construction.ai)
+        return ResolvedConstruction(1.0 / r_summer, 1.0 / r_winter, r_summer, r_winter, "layers", tuple(unresolved))
+    if construction.total_resistance:
+        r = construction.total_resistance
+        return ResolvedConstruction(1.0 / r, 1.0 / r, r, r, "total_resistance")
+    return ResolvedConstruction(DEFAULT_U_VALUE, DEFAULT_U_VALUE, None, None, "default")
+
+
+def resolve_construction(construction: ConstructionAssembly, references: ReferenceRepository) -> ResolvedConstruction:
+    key = construction_content_hash(construction)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+    resolved = _compute(construction, references)
+    with _cache_lock:
+        _cache[key] = resolved
+        while len(_cache) > _CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+    return resolved
+
+
+def resolve_constructions(
+    constructions: list[ConstructionAssembly],
+    references: ReferenceRepository,
+) -> dict[str, ResolvedConstruction]:
+    return {c.id: resolve_construction(c, references) for c in constructions}
+
+
+def clear_construction_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import json
 from functools import lru_cache
 from pathlib import Path
@@ -14,6 +15,15 @@ class ReferenceRepository:
         with path.open("r", encoding="utf-8") as f:
             return json.load(f)
 
+    @lru_cache(maxsize=1)
+    def data_version(self) -> str:
+        """Digest of every reference table file; changes whenever any table does."""
+        digest = hashlib.sha256()
+        for path in sorted(self.base_dir.glob("*.json")):
+            digest.update(path.name.encode() + b"\0")
+            digest.update(path.read_bytes())
+        return digest.hexdigest()[:16]
+
     @lru_cache(maxsize=1)
     def design_outdoor(self) -> dict:
         return self._read_json("design_outdoor_conditions.json")
@@ -65,6 +75,11 @@ class ReferenceRepository:
     def material_thermal_constants(self) -> dict:
         return self._read_json("material_thermal_constants.json")
 
+    @lru_cache(maxsize=1)
+    def material_index(self) -> dict[str, dict]:
+        records = self.material_thermal_constants().get("records", [])
+        return {"".join(str(r.get("material_name", "")).split()): r for r in records}
+
     @lru_cache(maxsize=1)
     def heating_ground_temperature(self) -> dict:
         return self._read_json("heating_ground_temperature.json")
@@ -104,6 +119,9 @@ class ReferenceRepository:
             return float(horiz_data.get(str(hour), 0.0))
         return 0.0
 
+    def lookup_material(self, material_name: str) -> dict:
+        return self.material_index().get("".join(material_name.split()), {})
+
     def lookup_solar_gain(self, region: str, orientation: str, hour: str) -> float:
         region_map = self.solar().get("regions", {}).get(region, {})
         data = region_map.get(orientation) or region_map.get("N") or {}
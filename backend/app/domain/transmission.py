@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from app.domain.construction import DEFAULT_U_VALUE, ResolvedConstruction, resolve_construction
 from app.domain.reference_lookup import ReferenceRepository
 from app.domain.rounding import round_half_up
 from app.models.schemas import CalcTrace, ConstructionAssembly, DesignCondition, LoadVector, Room, Surface
@@ -15,15 +16,18 @@ def _surface_area(surface: Surface) -> float:
     return 0.0
 
 
-def _u_value(surface: Surface, constructions: dict[str, ConstructionAssembly]) -> float:
-    if surface.construction_id and surface.construction_id in constructions:
-        c = constructions[surface.construction_id]
-        if c.u_value_override is not None:
-            return c.u_value_override
-        if c.u_value_w_m2k is not None:
-            return c.u_value_w_m2k
-        return 1.0
-    return 1.0
+def _u_value(
+    surface: Surface,
+    constructions: dict[str, ConstructionAssembly],
+    references: ReferenceRepository,
+    resolved: dict[str, ResolvedConstruction] | None = None,
+) -> ResolvedConstruction:
+    if surface.construction_id:
+        if resolved is not None and surface.construction_id in resolved:
+            return resolved[surface.construction_id]
+        if surface.construction_id in constructions:
+            return resolve_construction(constructions[surface.construction_id], references)
+    return ResolvedConstruction(DEFAULT_U_VALUE, DEFAULT_U_VALUE, None, None, "default")
 
 
 def calc_surface_load(
@@ -35,6 +39,7 @@ def calc_surface_load(
     references: ReferenceRepository,
     region: str,
     outdoor: dict,
+    resolved_constructions: dict[str, ResolvedConstruction] | None = None,
 ) -> tuple[LoadVector, CalcTrace, str]:
     if surface.preset_load is not None:
         trace = CalcTrace(
@@ -51,7 +56,9 @@ def calc_surface_load(
         return surface.preset_load, trace, group
 
     area = _surface_area(surface)
-    u_val = _u_value(surface, constructions)
+    u_resolved = _u_value(surface, constructions, references, resolved_constructions)
+    u_val = u_resolved.u_summer
+    u_val_winter = u_resolved.u_winter
     orientation = surface.orientation or "N"
     indoor_summer = summer_condition.summer_drybulb_c if summer_condition else 26.0
     indoor_winter = winter_condition.winter_drybulb_c if winter_condition else 20.0
@@ -84,7 +91,7 @@ def calc_surface_load(
             else max(indoor_winter - outdoor_winter, 0.0)
         )
         heating_factor = references.lookup_orientation_factor_for_heating(orientation)
-    heat_sensible = round_half_up(area * u_val * heating_delta * heating_factor, 0)
+    heat_sensible = round_half_up(area * u_val_winter * heating_delta * heating_factor, 0)
 
     load = LoadVector(
         cool_9=values["9"],
@@ -104,6 +111,7 @@ def calc_surface_load(
         inputs={
             "area_m2": area,
             "u_value_w_m2k": u_val,
+            "u_value_winter_w_m2k": u_val_winter,
             "orientation": orientation,
             "intermittent_factor": surface.intermittent_factor,
             "indoor_summer_c": indoor_summer,
@@ -116,6 +124,8 @@ def calc_surface_load(
             "etd_table": "execution_temperature_difference",
             "orientation_factor": "others_tables.heating_orientation_factors",
             "delta_source": ref_src,
+            "u_value_source": u_resolved.source,
+            "unresolved_layers": list(u_resolved.unresolved_layers),
         },
         intermediates={
             "delta_t_cooling": values,
@@ -3,8 +3,10 @@ import re
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.routes import router as api_router
+from app.services.metrics import render_metrics
 
 app = FastAPI(title="Heat Load Calc API", version="0.1.0")
 
@@ -53,3 +55,8 @@ app.include_router(api_router, prefix="/v1")
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -9,7 +9,7 @@ except ImportError:  # Python < 3.11
         pass
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class Season(StrEnum):
@@ -342,6 +342,86 @@ class ValidateResponse(BaseModel):
     issues: list[ValidationIssue]
 
 
+EntityName = Literal[
+    "rooms",
+    "surfaces",
+    "openings",
+    "constructions",
+    "glasses",
+    "internal_loads",
+    "mechanical_loads",
+    "ventilation",
+    "systems",
+]
+
+
+class EntityChange(BaseModel):
+    entity: EntityName
+    upsert: list[dict[str, Any]] = Field(default_factory=list)
+    delete: list[str] = Field(default_factory=list)
+
+
+class ValidationSessionResponse(BaseModel):
+    session_id: str
+    valid: bool
+    issues: list[ValidationIssue]
+
+
+class ValidationPatchRequest(BaseModel):
+    changes: list[EntityChange]
+
+
+class ValidationDeltaResponse(BaseModel):
+    session_id: str
+    valid: bool
+    added: list[ValidationIssue]
+    removed: list[ValidationIssue]
+
+
+class JsonPatchOperation(BaseModel):
+    """One RFC 6902 operation."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: str | None = Field(default=None, alias="from")
+
+
+class ProjectSessionResponse(BaseModel):
+    session_id: str
+    version: int
+    valid: bool
+    issues: list[ValidationIssue]
+    calculated: bool
+    # full results for the opened project; patch responses then carry only changed rooms
+    room_results: list[RoomLoadSummary] = Field(default_factory=list)
+    system_results: list[SystemLoadSummary] = Field(default_factory=list)
+    totals: dict[str, float] = Field(default_factory=dict)
+
+
+class ProjectPatchRequest(BaseModel):
+    # rejected with 409 when the session has moved past this version
+    base_version: int | None = None
+    patch: list[JsonPatchOperation] = Field(default_factory=list)
+    changes: list[EntityChange] = Field(default_factory=list)
+
+
+class ProjectPatchResponse(BaseModel):
+    session_id: str
+    version: int
+    valid: bool
+    added: list[ValidationIssue]
+    removed: list[ValidationIssue]
+    # room results are kept only while the project has no error-level issues
+    calculated: bool
+    room_results: list[RoomLoadSummary]
+    removed_room_ids: list[str]
+    system_results: list[SystemLoadSummary]
+    totals: dict[str, float]
+
+
 class CsvDataset(BaseModel):
     filename: str
     content: str
@@ -372,16 +452,33 @@ class PasteImportRequest(BaseModel):
     delete_missing: bool = False
 
 
+class ImportFieldChange(BaseModel):
+    old: Any = None
+    new: Any = None
+
+
+class ImportRecordChange(BaseModel):
+    id: str
+    fields: dict[str, ImportFieldChange]
+
+
 class ImportDiff(BaseModel):
     entity: str
     add: int = 0
     update: int = 0
     delete: int = 0
+    changes: list[ImportRecordChange] = Field(default_factory=list)
 
 
 class ImportPreviewResponse(BaseModel):
     diffs: list[ImportDiff]
     issues: list[ValidationIssue]
+    import_token: str | None = None
+
+
+class ImportCommitRequest(BaseModel):
+    import_token: str
+    project: Project | None = None
 
 
 class ImportApplyResponse(BaseModel):
@@ -407,6 +504,84 @@ class ExcelExportRequest(BaseModel):
     project: Project
     calc_result: CalcResult | None = None
     output_filename: str = "heat_load_result.xlsx"
+    # template: fill the calculation sheet template; per_room: one sheet per room plus a system summary
+    layout: Literal["template", "per_room"] = "template"
+    # xml: patch the template cells in place instead of an openpyxl load/save round trip
+    engine: Literal["openpyxl", "xml"] = "openpyxl"
+
+
+class BulkExportItem(BaseModel):
+    # either an inline project or a stored project id (optionally pinned to a version)
+    project: Project | None = None
+    project_id: str | None = None
+    version: int | None = None
+    calc_result: CalcResult | None = None
+    # archive file stem; defaults to the project id
+    name: str | None = None
+
+    @model_validator(mode="after")
+    def require_one_source(self) -> "BulkExportItem":
+        if (self.project is None) == (self.project_id is None):
+            raise ValueError("Specify exactly one of project or project_id")
+        return self
+
+
+# projects per bulk export request; larger batches are split by the client
+BULK_EXPORT_MAX_ITEMS = 200
+
+
+class BulkExportRequest(BaseModel):
+    items: list[BulkExportItem] = Field(min_length=1, max_length=BULK_EXPORT_MAX_ITEMS)
+    include_json: bool = True
+    include_excel: bool = True
+    # run the calculation for items that carry no calc_result
+    calculate: bool = True
+    engine: Literal["openpyxl", "xml"] = "openpyxl"
+
+
+class StoredProjectResponse(BaseModel):
+    id: str
+    version: int
+    content_hash: str
+    # False when the saved content matched the current head, so no version was added
+    changed: bool
+    valid: bool
+    issues: list[ValidationIssue]
+
+
+class ProjectVersionInfo(BaseModel):
+    version: int
+    content_hash: str
+    created_at: float
+    # parts (entity lists or "header") that differ from the previous version
+    changed_parts: list[str]
+
+
+class StoredExcelExportRequest(BaseModel):
+    version: int | None = None
+    output_filename: str = "heat_load_result.xlsx"
+    layout: Literal["template", "per_room"] = "template"
+    engine: Literal["openpyxl", "xml"] = "openpyxl"
+
+
+class ProfileFunctionStat(BaseModel):
+    function: str
+    calls: int
+    primitive_calls: int
+    total_seconds: float  # excluding subcalls
+    cumulative_seconds: float
+
+
+class ProfileReport(BaseModel):
+    profile_id: str | None = None
+    endpoint: str
+    total_seconds: float
+    # top functions by cumulative time
+    functions: list[ProfileFunctionStat]
+    # round_half_up / lookup_etd / moist_air_state, summed over every definition of the name
+    hot_functions: dict[str, ProfileFunctionStat]
+    # per-entity calc_* functions, keyed by the Project list they iterate (surfaces, openings, ...)
+    entities: dict[str, ProfileFunctionStat]
 
 
 class ReferenceTableResponse(BaseModel):
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import re
+import zipfile
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any
+
+from app.models.schemas import BulkExportItem, BulkExportRequest
+from app.services.calculation import run_calculation
+from app.services.compute_pool import ProjectInvalid, get_compute_pool
+from app.services.excel_export import export_excel, export_excel_xml
+from app.services.json_io import export_project_json
+from app.services.project_store import ProjectNotFound, get_project_store
+from app.services.validation import validate_and_plan
+
+# finished-but-unwritten results are bounded by this many tasks per worker
+_IN_FLIGHT_PER_WORKER = 2
+_UNSAFE_NAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def render_item(
+    item: BulkExportItem, include_json: bool, include_excel: bool, calculate: bool, engine: str
+) -> tuple[bytes | None, bytes | None]:
+    """JSON and workbook bytes for one project; runs inside a pool worker.
+
+    Raises ProjectInvalid when validation finds errors, so nothing is exported for it.
+    """
+    issues, plan = validate_and_plan(item.project)
+    if any(i.level == "error" for i in issues):
+        raise ProjectInvalid(issues)
+    calc = item.calc_result
+    if calc is None and calculate:
+        calc = run_calculation(item.project, plan=plan)
+    json_bytes = None
+    if include_json:
+        payload = export_project_json(item.project, calc.model_dump() if calc is not None else None).payload
+        json_bytes = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    xlsx_bytes = None
+    if include_excel:
+        render = export_excel_xml if engine == "xml" else export_excel
+        xlsx_bytes = render(item.project, calc)
+    return json_bytes, xlsx_bytes
+
+
+def check_stored_items(req: BulkExportRequest) -> None:
+    """Raise ProjectNotFound for any item referencing a missing stored project or version."""
+    stored = [item for item in req.items if item.project_id is not None]
+    if not stored:
+        # inline-only requests never open (or create) the store
+        return
+    store = get_project_store()
+    for item in stored:
+        store.head(item.project_id, item.version)
+
+
+def _with_project(item: BulkExportItem) -> BulkExportItem:
+    if item.project is not None:
+        return item
+    _, project = get_project_store().load(item.project_id, item.version)
+    return item.model_copy(update={"project": project})
+
+
+def _archive_stems(items: list[BulkExportItem]) -> list[str]:
+    stems: list[str] = []
+    used: set[str] = set()
+    for idx, item in enumerate(items, start=1):
+        source = item.name or item.project_id or (item.project.id if item.project is not None else "")
+        base = _UNSAFE_NAME_RE.sub("_", source.strip()) or f"project_{idx}"
+        stem = base
+        n = 2
+        while stem in used:
+            stem = f"{base}_{n}"
+            n += 1
+        used.add(stem)
+        stems.append(stem)
+    return stems
+
+
+class _ChunkSink:
+    """Write-only file object that hands buffered zip output back to the caller."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_bulk_export(req: BulkExportRequest, executor: Executor | None = None) -> Iterator[bytes]:
+    """Yield a zip archive chunk by chunk, adding each project's files as its render finishes.
+
+    Renders run in a process pool with a bounded number of tasks in flight, so at
+    most a few finished projects are held in memory at any time. Projects that fail
+    to render or fail validation are listed in ``errors.json`` at the end of the archive.
+    """
+    pool = get_compute_pool()
+    # renders share the compute pool's workers, queued behind interactive requests
+    executor = executor or pool.executor("bulk")
+    stems = _archive_stems(req.items)
+    window = max(1, pool.workers * _IN_FLIGHT_PER_WORKER)
+    pending: dict[Future, int] = {}
+    errors: list[dict[str, Any]] = []
+    next_idx = 0
+
+    sink = _ChunkSink()
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+            while next_idx < len(req.items) or pending:
+                while next_idx < len(req.items) and len(pending) < window:
+                    idx = next_idx
+                    next_idx += 1
+                    try:
+                        # stored projects are loaded only as their render is queued
+                        item = _with_project(req.items[idx])
+                    except ProjectNotFound as exc:
+                        errors.append({"name": stems[idx], "error": str(exc.args[0])})
+                        continue
+                    future = executor.submit(
+                        render_item, item, req.include_json, req.include_excel, req.calculate, req.engine
+                    )
+                    pending[future] = idx
+                if not pending:
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stem = stems[pending.pop(future)]
+                    try:
+                        json_bytes, xlsx_bytes = future.result()
+                    except ProjectInvalid as exc:
+                        errors.append(
+                            {
+                                "name": stem,
+                                "error": "Project has validation errors",
+                                "issues": [i.model_dump(mode="json") for i in exc.issues if i.level == "error"],
+                            }
+                        )
+                        continue
+                    except Exception as exc:  # noqa: BLE001 - reported in the archive
+                        errors.append({"name": stem, "error": f"{type(exc).__name__}: {exc}"})
+                        continue
+                    if json_bytes is not None:
+                        zf.writestr(f"{stem}.json", json_bytes)
+                    if xlsx_bytes is not None:
+                        # workbooks are already deflated
+                        zf.writestr(f"{stem}.xlsx", xlsx_bytes, compress_type=zipfile.ZIP_STORED)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+            if errors:
+                zf.writestr("errors.json", json.dumps(errors, ensure_ascii=False, indent=2))
+    finally:
+        # stop queued renders if the client disconnects mid-stream
+        for future in pending:
+            future.cancel()
+    yield sink.drain()
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from dataclasses import dataclass
+from time import perf_counter
 
 from app.domain.aggregation import combine, major_cells_from_subtotals
+from app.domain.construction import ResolvedConstruction, resolve_constructions
 from app.domain.internal_loads import calc_internal_load
 from app.domain.mechanical_loads import calc_mechanical_load
-from app.domain.reference_lookup import get_reference_repository
+from app.domain.reference_lookup import ReferenceRepository, get_reference_repository
 from app.domain.solar_gain import calc_opening_solar_gain
 from app.domain.transmission import calc_surface_load
 from app.domain.ventilation import calc_ventilation_load
-from app.models.schemas import CalcResult, DesignCondition, LoadVector, Project, RoomLoadSummary, SystemLoadSummary
+from app.models.schemas import (
+    CalcResult,
+    CalcTrace,
+    DesignCondition,
+    LoadVector,
+    Project,
+    Room,
+    RoomLoadSummary,
+    SystemLoadSummary,
+)
+from app.services.metrics import observe_stage
+from app.services.plan import CalcPlan, build_plan
+
+# bump when calculation output changes so cached results are not reused
+ENGINE_VERSION = 1
 
 
 def _find_design_condition(project: Project, condition_id: str | None) -> DesignCondition | None:
@@ -21,157 +38,181 @@ def _find_design_condition(project: Project, condition_id: str | None) -> Design
     return None
 
 
-def run_calculation(project: Project) -> CalcResult:
+@dataclass
+class CalcContext:
+    """Project-wide inputs shared by every room's calculation."""
+
+    project: Project
+    plan: CalcPlan
+    refs: ReferenceRepository
+    outdoor: dict
+    solar_region: str
+    default_condition: DesignCondition | None
+    resolved_constructions: dict[str, ResolvedConstruction]
+    # stage name -> seconds accumulated over every calc_room call; None disables timing
+    timings: dict[str, float] | None = None
+
+
+@dataclass
+class RoomCalc:
+    summary: RoomLoadSummary
+    traces: list[CalcTrace]
+    major_cells: dict[str, float | None]
+
+
+def build_context(project: Project, plan: CalcPlan | None = None) -> CalcContext:
     refs = get_reference_repository()
+    if plan is None:
+        plan = build_plan(project)
+    return CalcContext(
+        project=project,
+        plan=plan,
+        refs=refs,
+        outdoor=refs.lookup_outdoor(project.region),
+        solar_region=project.solar_region or project.region,
+        # Use first condition as default if available
+        default_condition=project.design_conditions[0] if project.design_conditions else None,
+        resolved_constructions=resolve_constructions(list(plan.constructions.values()), refs),
+    )
 
-    # Build condition map by id
-    condition_map: dict[str, DesignCondition] = {}
-    for cond in project.design_conditions:
-        condition_map[cond.id] = cond
 
-    # Use first condition as default if available
-    default_condition = project.design_conditions[0] if project.design_conditions else None
+def _lap(timings: dict[str, float] | None, stage: str, start: float) -> float:
+    if timings is None:
+        return start
+    now = perf_counter()
+    timings[stage] = timings.get(stage, 0.0) + now - start
+    return now
 
-    outdoor = refs.lookup_outdoor(project.region)
-    solar_region = project.solar_region or project.region
-    constructions = {c.id: c for c in project.constructions}
-    glasses = {g.id: g for g in project.glasses}
 
-    traces = []
-    room_results: list[RoomLoadSummary] = []
-    all_major_cells: dict[str, float | None] = {}
+def calc_room(ctx: CalcContext, room: Room) -> RoomCalc:
+    project = ctx.project
+    plan = ctx.plan
+    refs = ctx.refs
+    outdoor = ctx.outdoor
+    traces: list[CalcTrace] = []
+    timings = ctx.timings
+    lap = perf_counter() if timings is not None else 0.0
 
-    room_surface_map: dict[str, list] = defaultdict(list)
-    room_opening_map: dict[str, list] = defaultdict(list)
-    room_internal_map: dict[str, list] = defaultdict(list)
-    room_mechanical_map: dict[str, list] = defaultdict(list)
-    room_vent_map: dict[str, list] = defaultdict(list)
-
-    for s in project.surfaces:
-        room_surface_map[s.room_id].append(s)
-    for o in project.openings:
-        room_opening_map[o.room_id].append(o)
-    for i in project.internal_loads:
-        room_internal_map[i.room_id].append(i)
-    for m in project.mechanical_loads:
-        room_mechanical_map[m.room_id].append(m)
-    for v in project.ventilation_infiltration:
-        room_vent_map[v.room_id].append(v)
+    # Look up the unified design condition for this room
+    room_condition = plan.condition_map.get(room.design_condition_id or "") or ctx.default_condition
 
-    for room in project.rooms:
-        # Look up the unified design condition for this room
-        room_condition = condition_map.get(room.design_condition_id or "") or default_condition
-
-        # The new unified DesignCondition is passed as both summer and winter
-        # Domain modules now access summer_drybulb_c, winter_drybulb_c etc. directly
-
-        envelope_by_orientation: dict[str, LoadVector] = defaultdict(lambda: LoadVector())
-        internal_vectors: list[LoadVector] = []
-        ventilation_vectors: list[LoadVector] = []
-
-        for surface in room_surface_map.get(room.id, []):
-            vec, trace, group = calc_surface_load(
-                surface=surface,
-                room=room,
-                summer_condition=room_condition,
-                winter_condition=room_condition,
-                constructions=constructions,
-                references=refs,
-                region=project.region,
-                outdoor=outdoor,
-            )
-            traces.append(trace)
-            orientation = surface.orientation or "N"
-            envelope_by_orientation[orientation] = envelope_by_orientation[orientation].add(vec)
-
-        for opening in room_opening_map.get(room.id, []):
-            vec, trace, group = calc_opening_solar_gain(
-                opening=opening,
-                glasses=glasses,
-                references=refs,
-                region=solar_region,
-                design_condition=room_condition,
-                outdoor=outdoor,
-            )
-            traces.append(trace)
-            orientation = opening.orientation or "N"
-            envelope_by_orientation[orientation] = envelope_by_orientation[orientation].add(vec)
-
-        for internal_load in room_internal_map.get(room.id, []):
-            vec, trace, group = calc_internal_load(
-                internal_load,
-                project.metadata.rounding.occupancy,
-                heat_mode=True
-            )
-            traces.append(trace)
-            internal_vectors.append(vec)
-
-        for mechanical_load in room_mechanical_map.get(room.id, []):
-            vec, trace, group = calc_mechanical_load(mechanical_load, heat_mode=True)
-            traces.append(trace)
-            internal_vectors.append(vec)
-
-        for vent in room_vent_map.get(room.id, []):
-            vec, trace, group = calc_ventilation_load(
-                vent=vent,
-                room=room,
-                summer_condition=room_condition,
-                winter_condition=room_condition,
-                outdoor=outdoor,
-                references=refs,
-                outdoor_air_rounding=project.metadata.rounding.outdoor_air,
-            )
-            traces.append(trace)
-            ventilation_vectors.append(vec)
-
-        envelope_total = sum(envelope_by_orientation.values(), LoadVector())
-        internal_total = combine(internal_vectors)
-        ventilation_total = combine(ventilation_vectors)
-
-        cooling_total = envelope_total.add(internal_total).add(ventilation_total)
-
-        correction = project.metadata.correction_factors
-        major_cells = major_cells_from_subtotals(
-            envelope_total,
-            internal_total,
-            ventilation_total,
-            room.area_m2,
-            correction,
+    # The new unified DesignCondition is passed as both summer and winter
+    # Domain modules now access summer_drybulb_c, winter_drybulb_c etc. directly
+
+    envelope_by_orientation: dict[str, LoadVector] = defaultdict(lambda: LoadVector())
+    internal_vectors: list[LoadVector] = []
+    ventilation_vectors: list[LoadVector] = []
+
+    for surface in plan.room_surfaces.get(room.id, []):
+        vec, trace, group = calc_surface_load(
+            surface=surface,
+            room=room,
+            summer_condition=room_condition,
+            winter_condition=room_condition,
+            constructions=plan.constructions,
+            references=refs,
+            region=project.region,
+            outdoor=outdoor,
+            resolved_constructions=ctx.resolved_constructions,
         )
+        traces.append(trace)
+        orientation = surface.orientation or "N"
+        envelope_by_orientation[orientation] = envelope_by_orientation[orientation].add(vec)
+    lap = _lap(timings, "calc_transmission", lap)
 
-        pre = cooling_total
-        post = LoadVector(
-            cool_9=float(major_cells.get("R55") or 0.0),
-            cool_12=float(major_cells.get("X55") or 0.0),
-            cool_14=float(major_cells.get("AB55") or 0.0),
-            cool_16=float(major_cells.get("AF55") or 0.0),
-            cool_latent=float(major_cells.get("N55") or 0.0),
-            heat_sensible=float(major_cells.get("AL55") or 0.0),
-            heat_latent=float(major_cells.get("AJ55") or 0.0),
+    for opening in plan.room_openings.get(room.id, []):
+        vec, trace, group = calc_opening_solar_gain(
+            opening=opening,
+            glasses=plan.glasses,
+            references=refs,
+            region=ctx.solar_region,
+            design_condition=room_condition,
+            outdoor=outdoor,
         )
-        final_totals = {
-            "cool_9_total": float(major_cells.get("R56") or 0.0),
-            "cool_12_total": float(major_cells.get("X56") or 0.0),
-            "cool_14_total": float(major_cells.get("AB56") or 0.0),
-            "cool_16_total": float(major_cells.get("AF56") or 0.0),
-            "heating_total": float(major_cells.get("AJ56") or 0.0),
-        }
+        traces.append(trace)
+        orientation = opening.orientation or "N"
+        envelope_by_orientation[orientation] = envelope_by_orientation[orientation].add(vec)
+    lap = _lap(timings, "calc_solar_gain", lap)
 
-        all_major_cells = major_cells
-        room_results.append(
-            RoomLoadSummary(
-                room_id=room.id,
-                room_name=room.name,
-                envelope_loads=envelope_total,
-                envelope_loads_by_orientation=dict(envelope_by_orientation),
-                internal_loads=internal_total,
-                ventilation_loads=ventilation_total,
-                pre_correction=pre,
-                post_correction=post,
-                final_totals=final_totals,
-            )
+    for internal_load in plan.room_internal_loads.get(room.id, []):
+        vec, trace, group = calc_internal_load(
+            internal_load,
+            project.metadata.rounding.occupancy,
+            heat_mode=True
+        )
+        traces.append(trace)
+        internal_vectors.append(vec)
+    lap = _lap(timings, "calc_internal", lap)
+
+    for mechanical_load in plan.room_mechanical_loads.get(room.id, []):
+        vec, trace, group = calc_mechanical_load(mechanical_load, heat_mode=True)
+        traces.append(trace)
+        internal_vectors.append(vec)
+    lap = _lap(timings, "calc_mechanical", lap)
+
+    for vent in plan.room_ventilation.get(room.id, []):
+        vec, trace, group = calc_ventilation_load(
+            vent=vent,
+            room=room,
+            summer_condition=room_condition,
+            winter_condition=room_condition,
+            outdoor=outdoor,
+            references=refs,
+            outdoor_air_rounding=project.metadata.rounding.outdoor_air,
         )
+        traces.append(trace)
+        ventilation_vectors.append(vec)
+    lap = _lap(timings, "calc_ventilation", lap)
+
+    envelope_total = sum(envelope_by_orientation.values(), LoadVector())
+    internal_total = combine(internal_vectors)
+    ventilation_total = combine(ventilation_vectors)
+
+    cooling_total = envelope_total.add(internal_total).add(ventilation_total)
+
+    correction = project.metadata.correction_factors
+    major_cells = major_cells_from_subtotals(
+        envelope_total,
+        internal_total,
+        ventilation_total,
+        room.area_m2,
+        correction,
+    )
+
+    pre = cooling_total
+    post = LoadVector(
+        cool_9=float(major_cells.get("R55") or 0.0),
+        cool_12=float(major_cells.get("X55") or 0.0),
+        cool_14=float(major_cells.get("AB55") or 0.0),
+        cool_16=float(major_cells.get("AF55") or 0.0),
+        cool_latent=float(major_cells.get("N55") or 0.0),
+        heat_sensible=float(major_cells.get("AL55") or 0.0),
+        heat_latent=float(major_cells.get("AJ55") or 0.0),
+    )
+    final_totals = {
+        "cool_9_total": float(major_cells.get("R56") or 0.0),
+        "cool_12_total": float(major_cells.get("X56") or 0.0),
+        "cool_14_total": float(major_cells.get("AB56") or 0.0),
+        "cool_16_total": float(major_cells.get("AF56") or 0.0),
+        "heating_total": float(major_cells.get("AJ56") or 0.0),
+    }
+
+    summary = RoomLoadSummary(
+        room_id=room.id,
+        room_name=room.name,
+        envelope_loads=envelope_total,
+        envelope_loads_by_orientation=dict(envelope_by_orientation),
+        internal_loads=internal_total,
+        ventilation_loads=ventilation_total,
+        pre_correction=pre,
+        post_correction=post,
+        final_totals=final_totals,
+    )
+    _lap(timings, "aggregation", lap)
+    return RoomCalc(summary=summary, traces=traces, major_cells=major_cells)
 
+
+def summarize_systems(project: Project, room_results: list[RoomLoadSummary]) -> list[SystemLoadSummary]:
     system_results: list[SystemLoadSummary] = []
     room_result_map = {r.room_id: r for r in room_results}
     for system in project.systems:
@@ -196,8 +237,11 @@ def run_calculation(project: Project) -> CalcResult:
                 totals=totals,
             )
         )
+    return system_results
+
 
-    totals = {
+def total_loads(room_results: list[RoomLoadSummary]) -> dict[str, float]:
+    return {
         "cool_9_total": sum(r.final_totals["cool_9_total"] for r in room_results),
         "cool_12_total": sum(r.final_totals["cool_12_total"] for r in room_results),
         "cool_14_total": sum(r.final_totals["cool_14_total"] for r in room_results),
@@ -205,10 +249,32 @@ def run_calculation(project: Project) -> CalcResult:
         "heating_total": sum(r.final_totals["heating_total"] for r in room_results),
     }
 
-    return CalcResult(
+
+def run_calculation(project: Project, plan: CalcPlan | None = None) -> CalcResult:
+    start = perf_counter()
+    ctx = build_context(project, plan)
+    ctx.timings = {}
+    observe_stage("calc_context", perf_counter() - start)
+
+    traces = []
+    room_results: list[RoomLoadSummary] = []
+    all_major_cells: dict[str, float | None] = {}
+
+    for room in project.rooms:
+        calc = calc_room(ctx, room)
+        traces.extend(calc.traces)
+        all_major_cells = calc.major_cells
+        room_results.append(calc.summary)
+
+    lap = perf_counter()
+    result = CalcResult(
         major_cells=all_major_cells,
         room_results=room_results,
-        system_results=system_results,
-        totals=totals,
+        system_results=summarize_systems(project, room_results),
+        totals=total_loads(room_results),
         traces=traces,
     )
+    _lap(ctx.timings, "aggregation", lap)
+    for stage, seconds in ctx.timings.items():
+        observe_stage(stage, seconds)
+    return result
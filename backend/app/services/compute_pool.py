@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, BinaryIO, Callable, TypeVar
+
+from pydantic_core import to_json
+
+from app.models.schemas import (
+    CalcResult,
+    ImportApplyResponse,
+    ImportPreviewResponse,
+    JsonImportRequest,
+    Project,
+    ValidationIssue,
+)
+from app.services.calculation import run_calculation
+from app.services.excel_export import export_excel, export_excel_xml, export_room_report
+from app.services.importers import (
+    DetachedImport,
+    apply_upload_import,
+    apply_xlsx_import,
+    detach_import,
+    preview_upload_import,
+    preview_xlsx_import,
+)
+from app.services.json_io import import_project_json
+from app.services.metrics import (
+    QUEUE_WAIT_SECONDS,
+    collect_samples,
+    record_samples,
+    register_collector,
+    render_family,
+    stage,
+)
+from app.services.validation import validate_and_plan, validate_project
+
+# CPU-bound request handlers run in this pool so they do not hold the server's GIL;
+# 0 workers runs them inline in the request thread.
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# jobs waiting for a worker, per priority class, beyond which requests get 503
+COMPUTE_MAX_QUEUE = int(os.environ.get("COMPUTE_MAX_QUEUE", "32"))
+# per-endpoint cap on requests holding a job (running or queued) or waiting on another
+# request's identical job, beyond which requests get 429; the sum stays well under
+# Starlette's 40 request threads, which block on the jobs
+DEFAULT_LIMITS = {"calc": 8, "excel": 4, "import": 8}
+# calculations and exports of larger projects are scheduled as bulk work
+INTERACTIVE_MAX_ROOMS = int(os.environ.get("INTERACTIVE_MAX_ROOMS", "500"))
+
+T = TypeVar("T")
+
+
+class Overloaded(RuntimeError):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class ProjectInvalid(ValueError):
+    def __init__(self, issues: list[ValidationIssue]):
+        super().__init__(issues)
+        self.issues = issues
+
+
+def _parse_limits(spec: str | None) -> dict[str, int]:
+    limits = dict(DEFAULT_LIMITS)
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+PRIORITY_CLASSES = ("interactive", "bulk")
+# while both classes wait, bulk still gets one dispatch after this many interactive ones
+_INTERACTIVE_BURST = 4
+
+
+@dataclass(eq=False)
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    future: Future
+    priority: str
+    enqueued: float
+
+
+@dataclass
+class ClassStats:
+    queued: int = 0
+    running: int = 0
+    dispatched: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class ComputePool:
+    """Bounded process pool with priority scheduling and per-endpoint admission control.
+
+    Jobs wait in the pool's own queues, one per priority class and client, and are
+    handed to the process pool only when a worker is free. Queued interactive jobs
+    go ahead of queued bulk jobs (bulk still gets one dispatch in every
+    ``_INTERACTIVE_BURST + 1`` while both wait), and within a class clients are served
+    round-robin, so one client's batch cannot hold up everyone else's.
+
+    ``run`` blocks the calling (request) thread on the job's future, which releases
+    the GIL while the job runs in a worker process. Every blocked request thread holds
+    one of its endpoint's ``admission`` slots, so the limits also bound the server's
+    busy threads. Requests over an endpoint's limit fail fast with 429; requests
+    arriving while their class's queue is full get 503. Both carry a Retry-After
+    estimated from the endpoint's recent job durations.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        limits: dict[str, int],
+        executor_factory: Callable[[int], Executor] = ProcessPoolExecutor,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.limits = limits
+        self.in_flight: dict[str, int] = {name: 0 for name in limits}
+        # exponentially weighted job duration per endpoint, seconds
+        self.durations: dict[str, float] = {name: 1.0 for name in limits}
+        self.stats: dict[str, ClassStats] = {cls: ClassStats() for cls in PRIORITY_CLASSES}
+        # class -> client -> jobs; client order is the round-robin order
+        self._queues: dict[str, OrderedDict[str, deque[_Job]]] = {cls: OrderedDict() for cls in PRIORITY_CLASSES}
+        self._running = 0
+        self._interactive_streak = 0
+        self._lock = threading.Lock()
+        self._executor_factory = executor_factory
+        self._executor: Executor | None = None
+
+    def queued(self, priority: str | None = None) -> int:
+        classes = PRIORITY_CLASSES if priority is None else (priority,)
+        return sum(self.stats[cls].queued for cls in classes)
+
+    def _retry_after(self, name: str, priority: str) -> int:
+        waves = (self.queued(priority) + self._running) / max(self.workers, 1)
+        return max(1, math.ceil(self.durations[name] * max(waves, 1.0)))
+
+    # scheduling ---------------------------------------------------------------
+
+    def submit(self, fn: Callable[..., T], *args: Any, priority: str = "interactive", client: str = "") -> Future:
+        """Queue ``fn(*args)`` without admission checks; the future completes with its result."""
+        future: Future = Future()
+        if self.workers <= 0:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                future.set_exception(exc)
+            return future
+        with self._lock:
+            self._queues[priority].setdefault(client, deque()).append(
+                _Job(fn, args, future, priority, time.monotonic())
+            )
+            self.stats[priority].queued += 1
+        self._pump()
+        return future
+
+    def executor(self, priority: str, client: str = "") -> Executor:
+        """An Executor whose jobs go through this pool's queue as ``priority``."""
+        return _ClassExecutor(self, priority, client)
+
+    def _pop_class(self, priority: str) -> _Job | None:
+        clients = self._queues[priority]
+        while clients:
+            client, jobs = next(iter(clients.items()))
+            job = jobs.popleft()
+            if jobs:
+                clients.move_to_end(client)
+            else:
+                del clients[client]
+            self.stats[priority].queued -= 1
+            if not job.future.cancelled():
+                return job
+        return None
+
+    def _next_job(self) -> _Job | None:
+        waiting = {cls for cls in PRIORITY_CLASSES if self._queues[cls]}
+        if "interactive" in waiting and ("bulk" not in waiting or self._interactive_streak < _INTERACTIVE_BURST):
+            job = self._pop_class("interactive")
+            self._interactive_streak = self._interactive_streak + 1 if "bulk" in waiting else 0
+            if job is not None:
+                return job
+        self._interactive_streak = 0
+        return self._pop_class("bulk") or self._pop_class("interactive")
+
+    def _pump(self) -> None:
+        ready = []
+        with self._lock:
+            while self._running < self.workers:
+                job = self._next_job()
+                if job is None:
+                    break
+                self._running += 1
+                stats = self.stats[job.priority]
+                stats.running += 1
+                stats.dispatched += 1
+                waited = time.monotonic() - job.enqueued
+                stats.wait_seconds_total += waited
+                stats.wait_seconds_max = max(stats.wait_seconds_max, waited)
+                QUEUE_WAIT_SECONDS.observe(waited, priority=job.priority)
+                ready.append(job)
+        for job in ready:
+            self._start(job)
+
+    def _start(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            self._finish(job)
+            return
+        executor = self._get_executor()
+        try:
+            # stage timings observed in the worker come back with the result
+            inner = executor.submit(collect_samples, job.fn, *job.args)
+        except BrokenProcessPool as exc:
+            self._reset_executor(executor)
+            job.future.set_exception(exc)
+            self._finish(job)
+            return
+        inner.add_done_callback(lambda done: self._complete(job, executor, done))
+
+    def _complete(self, job: _Job, executor: Executor, inner: Future) -> None:
+        exc = inner.exception()
+        if exc is None:
+            result, samples = inner.result()
+            record_samples(samples)
+            job.future.set_result(result)
+        else:
+            if isinstance(exc, BrokenProcessPool):
+                self._reset_executor(executor)
+            job.future.set_exception(exc)
+        self._finish(job)
+
+    def _finish(self, job: _Job) -> None:
+        with self._lock:
+            self._running -= 1
+            self.stats[job.priority].running -= 1
+        self._pump()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._executor_factory(self.workers)
+            return self._executor
+
+    def _reset_executor(self, broken: Executor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    # request entry point ------------------------------------------------------
+
+    def _admit(self, name: str, priority: str) -> None:
+        with self._lock:
+            if self.in_flight[name] >= self.limits[name]:
+                raise Overloaded(429, f"Too many concurrent {name} requests", self._retry_after(name, priority))
+            if self.workers > 0 and self._running >= self.workers and self.queued(priority) >= self.max_queue:
+                raise Overloaded(503, "Server is busy", self._retry_after(name, priority))
+            self.in_flight[name] += 1
+
+    def _release(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.in_flight[name] -= 1
+            self.durations[name] = 0.8 * self.durations[name] + 0.2 * seconds
+
+    @contextmanager
+    def admission(self, name: str, priority: str = "interactive") -> Iterator[None]:
+        """Hold one of endpoint ``name``'s slots for the block; raises Overloaded when full."""
+        self._admit(name, priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(name, time.perf_counter() - started)
+
+    def call(self, fn: Callable[..., T], *args: Any, priority: str = "interactive", client: str = "") -> T:
+        """Run ``fn(*args)`` in the pool and wait for it; the caller handles admission."""
+        try:
+            return self.submit(fn, *args, priority=priority, client=client).result()
+        except BrokenProcessPool:
+            # a worker died (e.g. out of memory); later jobs get a fresh pool
+            raise Overloaded(503, "Compute worker failed", 1) from None
+
+    def run(self, name: str, fn: Callable[..., T], *args: Any, priority: str = "interactive", client: str = "") -> T:
+        """Run ``fn(*args)`` under endpoint ``name``'s limit; raises Overloaded when full."""
+        with self.admission(name, priority):
+            return self.call(fn, *args, priority=priority, client=client)
+
+
+class _ClassExecutor(Executor):
+    def __init__(self, pool: ComputePool, priority: str, client: str):
+        self._pool = pool
+        self._priority = priority
+        self._client = client
+
+    def submit(self, fn, /, *args, **kwargs):
+        if kwargs:
+            fn = partial(fn, **kwargs)
+        return self._pool.submit(fn, *args, priority=self._priority, client=self._client)
+
+
+def request_priority(request, rooms: int = 0) -> str:
+    """Priority class for a request: bulk when the client asks for it (``X-Priority: bulk``)
+    or the project has more than INTERACTIVE_MAX_ROOMS rooms, interactive otherwise."""
+    if request.headers.get("x-priority", "").strip().lower() == "bulk" or rooms > INTERACTIVE_MAX_ROOMS:
+        return "bulk"
+    return "interactive"
+
+
+def client_id(request) -> str:
+    """Fair-share identity: the ``X-Client-Id`` header, else the peer address."""
+    explicit = request.headers.get("x-client-id")
+    if explicit:
+        return explicit
+    return request.client.host if request.client is not None else ""
+
+
+_pool_lock = threading.Lock()
+_pool: ComputePool | None = None
+
+
+def get_compute_pool() -> ComputePool:
+    """Process-wide pool sized by COMPUTE_WORKERS / COMPUTE_MAX_QUEUE.
+
+    COMPUTE_LIMITS overrides per-endpoint limits, e.g. ``calc=8,excel=4,import=8``.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ComputePool(COMPUTE_WORKERS, COMPUTE_MAX_QUEUE, _parse_limits(os.environ.get("COMPUTE_LIMITS")))
+        return _pool
+
+
+def set_compute_pool(pool: ComputePool | None) -> None:
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+# Jobs: module-level so they pickle; inputs and outputs are kept to plain bytes or
+# models, and results are serialized in the worker rather than the request process.
+
+
+def calc_job(project: Project, validate: bool = True) -> bytes:
+    """Encoded CalcResult; raises ProjectInvalid when validation finds errors."""
+    plan = None
+    if validate:
+        with stage("validate"):
+            issues, plan = validate_and_plan(project)
+        if any(i.level == "error" for i in issues):
+            raise ProjectInvalid(issues)
+    result = run_calculation(project, plan=plan)
+    with stage("serialize"):
+        return to_json(result)
+
+
+def excel_job(project: Project, calc_result: CalcResult | None, layout: str, engine: str) -> bytes:
+    if layout == "per_room" and calc_result is None:
+        calc_result = run_calculation(project)
+    with stage("export_excel"):
+        if layout == "per_room":
+            return export_room_report(project, calc_result)
+        if engine == "xml":
+            return export_excel_xml(project, calc_result)
+        return export_excel(project, calc_result)
+
+
+def _buffers(files: list[tuple[str, bytes]]) -> list[tuple[str, BinaryIO]]:
+    return [(name, io.BytesIO(data)) for name, data in files]
+
+
+def upload_apply_job(files: list[tuple[str, bytes]], project: Project | None, options: dict) -> ImportApplyResponse:
+    return apply_upload_import(_buffers(files), project, **options)
+
+
+def xlsx_apply_job(data: bytes, project: Project | None, has_header: bool, delete_missing: bool) -> ImportApplyResponse:
+    return apply_xlsx_import(io.BytesIO(data), project, has_header, delete_missing)
+
+
+# Import previews cache their records under an import token in the process that ran
+# them; preview jobs detach those records so the API process can cache them instead.
+PreviewResult = tuple[ImportPreviewResponse, DetachedImport | None]
+
+
+def _detached(preview: ImportPreviewResponse) -> PreviewResult:
+    return preview, detach_import(preview.import_token)
+
+
+def preview_job(preview: Callable[..., ImportPreviewResponse], *args: Any) -> PreviewResult:
+    return _detached(preview(*args))
+
+
+def upload_preview_job(files: list[tuple[str, bytes]], project: Project | None, options: dict) -> PreviewResult:
+    return _detached(preview_upload_import(_buffers(files), project, **options))
+
+
+def xlsx_preview_job(data: bytes, project: Project | None, has_header: bool, delete_missing: bool) -> PreviewResult:
+    return _detached(preview_xlsx_import(io.BytesIO(data), project, has_header, delete_missing))
+
+
+def json_import_job(req: JsonImportRequest) -> tuple[Project, list[ValidationIssue]]:
+    project = import_project_json(req)
+    return project, validate_project(project)
+
+
+def _pool_metrics() -> list[str]:
+    pool = _pool
+    if pool is None:
+        return []
+    stats = {cls: ClassStats(**vars(pool.stats[cls])) for cls in PRIORITY_CLASSES}
+    return (
+        render_family(
+            "heatload_compute_queue_depth",
+            "gauge",
+            "Compute jobs waiting for a worker.",
+            [({"priority": cls}, s.queued) for cls, s in stats.items()],
+        )
+        + render_family(
+            "heatload_compute_running",
+            "gauge",
+            "Compute jobs running in workers.",
+            [({"priority": cls}, s.running) for cls, s in stats.items()],
+        )
+        + render_family(
+            "heatload_compute_in_flight",
+            "gauge",
+            "Admitted requests per endpoint group, running or queued.",
+            [({"endpoint": name}, count) for name, count in pool.in_flight.items()],
+        )
+        + render_family("heatload_compute_workers", "gauge", "Compute pool worker processes.", [({}, pool.workers)])
+    )
+
+
+register_collector(_pool_metrics)
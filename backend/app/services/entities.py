@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+from app.models.schemas import (
+    ConstructionAssembly,
+    GlassSpec,
+    InternalLoad,
+    MechanicalLoad,
+    Opening,
+    Project,
+    Room,
+    Surface,
+    System,
+    VentilationInfiltration,
+)
+
+ENTITY_MODELS: dict[str, type[BaseModel]] = {
+    "rooms": Room,
+    "surfaces": Surface,
+    "openings": Opening,
+    "constructions": ConstructionAssembly,
+    "glasses": GlassSpec,
+    "internal_loads": InternalLoad,
+    "mechanical_loads": MechanicalLoad,
+    "ventilation": VentilationInfiltration,
+    "systems": System,
+}
+
+
+def project_attr(entity: str) -> str:
+    return "ventilation_infiltration" if entity == "ventilation" else entity
+
+
+def project_entities(project: Project, entity: str) -> list:
+    return getattr(project, project_attr(entity))
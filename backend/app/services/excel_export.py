@@ -1,18 +1,37 @@
 from __future__ import annotations
 
+import hashlib
 import io
 import json
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 
 import openpyxl
-from openpyxl.cell.cell import MergedCell
+from openpyxl.utils.cell import (
+    column_index_from_string,
+    coordinate_from_string,
+    coordinate_to_tuple,
+    get_column_letter,
+)
 
 try:
     import yaml  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
     yaml = None
 
-from app.models.schemas import CalcResult, Project
+from app.models.schemas import CalcResult, LoadVector, Project, RoomLoadSummary
+from app.services.xlsx_patch import XlsxTemplate, build_template, write_workbook
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+TEMPLATE_PATH = BACKEND_DIR.parent / "熱負荷計算書テンプレート.xlsx"
+CONFIG_DIR = BACKEND_DIR / "app" / "config"
+MAPPING_PATH = CONFIG_DIR / "excel_mapping.yml"
+MAPPING_JSON_PATH = CONFIG_DIR / "excel_mapping.json"
+INJECTION_PATH = CONFIG_DIR / "excel_formula_injection.yml"
+INJECTION_JSON_PATH = CONFIG_DIR / "excel_formula_injection.json"
+
+_UNSET = object()
 
 
 def _resolve_value(data: dict, path: str):
@@ -32,16 +51,28 @@ def _find_sheet_by_trimmed_name(wb: openpyxl.Workbook, name: str):
     return None
 
 
-def _resolve_writable_cell(ws: openpyxl.worksheet.worksheet.Worksheet, cell_ref: str):
-    cell = ws[cell_ref]
-    if not isinstance(cell, MergedCell):
-        return cell
-    row = cell.row
-    col = cell.column
+MergedAnchors = dict[tuple[int, int], tuple[int, int]]
+
+
+def merged_anchor_index(ws: openpyxl.worksheet.worksheet.Worksheet) -> MergedAnchors:
+    """Map every non-anchor (row, col) inside a merged range to its top-left anchor."""
+    index: MergedAnchors = {}
     for merged in ws.merged_cells.ranges:
-        if merged.min_row <= row <= merged.max_row and merged.min_col <= col <= merged.max_col:
-            return ws.cell(row=merged.min_row, column=merged.min_col)
-    return ws[cell_ref]
+        anchor = (merged.min_row, merged.min_col)
+        for row in range(merged.min_row, merged.max_row + 1):
+            for col in range(merged.min_col, merged.max_col + 1):
+                index[(row, col)] = anchor
+        del index[anchor]
+    return index
+
+
+def resolve_anchor(anchors: MergedAnchors, cell_ref: str) -> str:
+    col_letter, row = coordinate_from_string(cell_ref)
+    key = (row, column_index_from_string(col_letter))
+    anchor = anchors.get(key)
+    if anchor is None:
+        return f"{col_letter}{row}"
+    return f"{get_column_letter(anchor[1])}{anchor[0]}"
 
 
 def _load_config(yaml_path: Path, json_path: Path) -> dict:
@@ -54,24 +85,47 @@ def _load_config(yaml_path: Path, json_path: Path) -> dict:
     return {}
 
 
-def export_excel(project: Project, calc_result: CalcResult | None = None) -> bytes:
-    backend_dir = Path(__file__).resolve().parents[2]
-    root_dir = backend_dir.parent
+@dataclass(frozen=True)
+class WritePlan:
+    # (sheet index, anchor cell, value path)
+    writes: tuple[tuple[int, str, str], ...]
+    # (sheet index, cell, formula, mode)
+    injections: tuple[tuple[int, str, str, str], ...]
 
-    template_path = root_dir / "熱負荷計算書テンプレート.xlsx"
-    mapping_path = backend_dir / "app" / "config" / "excel_mapping.yml"
-    mapping_json_path = backend_dir / "app" / "config" / "excel_mapping.json"
-    injection_path = backend_dir / "app" / "config" / "excel_formula_injection.yml"
-    injection_json_path = backend_dir / "app" / "config" / "excel_formula_injection.json"
 
-    wb = openpyxl.load_workbook(template_path)
-    mapping_cfg = _load_config(mapping_path, mapping_json_path)
+@dataclass(frozen=True)
+class ExportTemplate:
+    stamp: tuple[float | None, ...]
+    # digest of the template and write plan; part of cached export keys
+    version: str
+    template_bytes: bytes
+    plan: WritePlan
+    # per sheet index, built once per template and shared by every export
+    merged_anchors: tuple[MergedAnchors, ...]
+    # template value of every injection target, for the if_missing/if_blank checks
+    injection_defaults: dict[tuple[int, str], object]
+    package: XlsxTemplate
 
-    context = {
-        "project": project.model_dump(),
-        "calc": calc_result.model_dump() if calc_result is not None else {},
-    }
 
+def _source_stamp() -> tuple[float | None, ...]:
+    stamps: list[float | None] = []
+    for path in (TEMPLATE_PATH, MAPPING_PATH, MAPPING_JSON_PATH, INJECTION_PATH, INJECTION_JSON_PATH):
+        try:
+            stamps.append(path.stat().st_mtime)
+        except FileNotFoundError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def _compile_plan(
+    wb: openpyxl.Workbook,
+    mapping_cfg: dict,
+    inj_cfg: dict,
+    merged_anchors: tuple[MergedAnchors, ...],
+) -> WritePlan:
+    sheet_index = {ws.title: idx for idx, ws in enumerate(wb.worksheets)}
+
+    writes: list[tuple[int, str, str]] = []
     for sheet_name, entries in (mapping_cfg.get("sheets") or {}).items():
         ws = _find_sheet_by_trimmed_name(wb, sheet_name)
         if ws is None:
@@ -81,26 +135,232 @@ def export_excel(project: Project, calc_result: CalcResult | None = None) -> byt
             source = entry.get("source")
             if not cell or not source:
                 continue
-            value = _resolve_value(context, source)
-            if value is not None:
-                target = _resolve_writable_cell(ws, cell)
-                target.value = value
-
-    inj_cfg = _load_config(injection_path, injection_json_path)
+            idx = sheet_index[ws.title]
+            writes.append((idx, resolve_anchor(merged_anchors[idx], cell), source))
 
+    injections: list[tuple[int, str, str, str]] = []
     for inj in inj_cfg.get("injections", []):
         ws = _find_sheet_by_trimmed_name(wb, inj["sheet"])
         if ws is None:
             continue
-        cell = ws[inj["cell"]]
-        mode = inj.get("mode", "if_missing")
-        if mode == "if_missing" and isinstance(cell.value, str) and cell.value.startswith("="):
+        injections.append((sheet_index[ws.title], inj["cell"], inj["formula"], inj.get("mode", "if_missing")))
+
+    return WritePlan(writes=tuple(writes), injections=tuple(injections))
+
+
+_template_lock = threading.Lock()
+_template: ExportTemplate | None = None
+
+
+def get_export_template() -> ExportTemplate:
+    """Template bytes and compiled write plan, rebuilt when any source file's mtime changes."""
+    global _template
+    stamp = _source_stamp()
+    cached = _template
+    if cached is not None and cached.stamp == stamp:
+        return cached
+    with _template_lock:
+        if _template is not None and _template.stamp == stamp:
+            return _template
+        template_bytes = TEMPLATE_PATH.read_bytes()
+        wb = openpyxl.load_workbook(io.BytesIO(template_bytes))
+        merged_anchors = tuple(merged_anchor_index(ws) for ws in wb.worksheets)
+        plan = _compile_plan(
+            wb,
+            _load_config(MAPPING_PATH, MAPPING_JSON_PATH),
+            _load_config(INJECTION_PATH, INJECTION_JSON_PATH),
+            merged_anchors,
+        )
+        targets: dict[int, set[str]] = {}
+        for sheet_idx, cell_ref, *_ in plan.writes + plan.injections:
+            targets.setdefault(sheet_idx, set()).add(cell_ref)
+        _template = ExportTemplate(
+            stamp=stamp,
+            version=hashlib.sha256(template_bytes + repr(plan).encode()).hexdigest()[:16],
+            template_bytes=template_bytes,
+            plan=plan,
+            merged_anchors=merged_anchors,
+            injection_defaults={
+                (sheet_idx, cell_ref): wb.worksheets[sheet_idx][cell_ref].value
+                for sheet_idx, cell_ref, *_ in plan.injections
+            },
+            package=build_template(template_bytes, targets),
+        )
+        return _template
+
+
+def _cell_values(
+    template: ExportTemplate, project: Project, calc_result: CalcResult | None
+) -> dict[tuple[int, str], object]:
+    """Final value of every cell the export changes, in write order."""
+    context = {
+        "project": project.model_dump(),
+        "calc": calc_result.model_dump() if calc_result is not None else {},
+    }
+    values: dict[tuple[int, str], object] = {}
+    for sheet_idx, cell_ref, source in template.plan.writes:
+        value = _resolve_value(context, source)
+        if value is not None:
+            values[(sheet_idx, cell_ref)] = value
+
+    for sheet_idx, cell_ref, formula, mode in template.plan.injections:
+        key = (sheet_idx, cell_ref)
+        current = values[key] if key in values else template.injection_defaults[key]
+        if mode == "if_missing" and isinstance(current, str) and current.startswith("="):
             continue
-        if mode == "if_blank" and cell.value not in (None, ""):
+        if mode == "if_blank" and current not in (None, ""):
             continue
-        cell.value = inj["formula"]
+        values[key] = formula
+    return values
+
+
+_workbook_lock = threading.Lock()
+# (template version, parsed template workbook) reused by export_excel; every cell an
+# export writes is put back after its save, so the next export starts from the template
+_workbook: tuple[str, openpyxl.Workbook] | None = None
+
+
+def _template_workbook(template: ExportTemplate) -> openpyxl.Workbook:
+    global _workbook
+    if _workbook is None or _workbook[0] != template.version:
+        wb = openpyxl.load_workbook(io.BytesIO(template.template_bytes))
+        wb.calculation.fullCalcOnLoad = True
+        _workbook = (template.version, wb)
+    return _workbook[1]
+
+
+def export_excel(project: Project, calc_result: CalcResult | None = None) -> bytes:
+    template = get_export_template()
+    values = _cell_values(template, project, calc_result)
+    bio = io.BytesIO()
+    with _workbook_lock:
+        wb = _template_workbook(template)
+        sheets = wb.worksheets
+        # saving caches the column outline level, which the next save writes to sheetFormatPr
+        outline_levels = [ws.column_dimensions.max_outline for ws in sheets]
+        # (sheet, (row, column)) -> template value, or _UNSET for cells the template lacks
+        previous: dict[tuple[int, tuple[int, int]], object] = {}
+        try:
+            for (sheet_idx, cell_ref), value in values.items():
+                ws = sheets[sheet_idx]
+                key = coordinate_to_tuple(cell_ref)
+                if (sheet_idx, key) not in previous:
+                    previous[(sheet_idx, key)] = ws._cells[key].value if key in ws._cells else _UNSET
+                ws[cell_ref].value = value
+            wb.save(bio)
+        finally:
+            for (sheet_idx, key), value in previous.items():
+                ws = sheets[sheet_idx]
+                if value is _UNSET:
+                    del ws._cells[key]
+                else:
+                    ws._cells[key].value = value
+            for ws, level in zip(sheets, outline_levels):
+                ws.column_dimensions.max_outline = level
+    return bio.getvalue()
+
+
+def write_excel_xml(project: Project, calc_result: CalcResult | None, fileobj) -> None:
+    """Same cells as ``export_excel`` but patched straight into the template XML.
+
+    Only the mapped ``<c>`` elements are rendered; styles, shared strings and the
+    rest of the package are copied from the indexed template untouched.
+    """
+    template = get_export_template()
+    values: dict[int, dict[str, object]] = {}
+    for (sheet_idx, cell_ref), value in _cell_values(template, project, calc_result).items():
+        values.setdefault(sheet_idx, {})[cell_ref] = value
+    write_workbook(template.package, values, fileobj)
+
+
+def export_excel_xml(project: Project, calc_result: CalcResult | None = None) -> bytes:
+    bio = io.BytesIO()
+    write_excel_xml(project, calc_result, bio)
+    return bio.getvalue()
+
+
+# Per-room report -----------------------------------------------------------
+
+_LOAD_COLUMNS = ("cool_9", "cool_12", "cool_14", "cool_16", "cool_latent", "heat_sensible", "heat_latent")
+_LOAD_HEADERS = ("冷房9時", "冷房12時", "冷房14時", "冷房16時", "冷房潜熱", "暖房顕熱", "暖房潜熱")
+_TOTAL_COLUMNS = ("cool_9_total", "cool_12_total", "cool_14_total", "cool_16_total", "heating_total")
+_TOTAL_HEADERS = ("冷房9時計", "冷房12時計", "冷房14時計", "冷房16時計", "暖房計")
+_INVALID_SHEET_CHARS = str.maketrans({ch: "_" for ch in "[]:*?/\\"})
+_SHEET_NAME_MAX = 31
+
+
+def _sheet_title(name: str, used: set[str]) -> str:
+    base = (name.translate(_INVALID_SHEET_CHARS).strip() or "室")[:_SHEET_NAME_MAX]
+    title = base
+    n = 2
+    while title.lower() in used:
+        suffix = f"({n})"
+        title = base[: _SHEET_NAME_MAX - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def _load_row(label: str, vector: LoadVector) -> list:
+    return [label, *(getattr(vector, col) for col in _LOAD_COLUMNS)]
+
+
+def _room_rows(room: RoomLoadSummary) -> list[list]:
+    rows: list[list] = [
+        ["室ID", room.room_id],
+        ["室名", room.room_name],
+        [],
+        ["区分", *_LOAD_HEADERS],
+        _load_row("外皮負荷", room.envelope_loads),
+    ]
+    for orientation, vector in room.envelope_loads_by_orientation.items():
+        rows.append(_load_row(f"  {orientation}", vector))
+    rows += [
+        _load_row("内部負荷", room.internal_loads),
+        _load_row("外気負荷", room.ventilation_loads),
+        _load_row("補正前", room.pre_correction),
+        _load_row("補正後", room.post_correction),
+        [],
+        ["最終負荷", *_TOTAL_HEADERS],
+        ["", *(room.final_totals.get(col, 0.0) for col in _TOTAL_COLUMNS)],
+    ]
+    return rows
+
+
+def export_room_report(project: Project, calc_result: CalcResult) -> bytes:
+    """Workbook with a system summary sheet followed by one sheet per room.
+
+    Built in openpyxl write-only mode so rows are streamed to disk as each sheet
+    is written; memory stays flat regardless of the number of rooms.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    used: set[str] = set()
+
+    summary = wb.create_sheet(_sheet_title("系統集計", used))
+    summary.append(["系統ID", "系統名", "室数", *_TOTAL_HEADERS])
+    for system in calc_result.system_results:
+        summary.append(
+            [
+                system.system_id,
+                system.system_name,
+                len(system.room_ids),
+                *(system.totals.get(col, 0.0) for col in _TOTAL_COLUMNS),
+            ]
+        )
+    summary.append([])
+    summary.append(
+        [
+            "合計",
+            "",
+            len(calc_result.room_results),
+            *(calc_result.totals.get(col, 0.0) for col in _TOTAL_COLUMNS),
+        ]
+    )
 
-    wb.calculation.fullCalcOnLoad = True
+    for room in calc_result.room_results:
+        ws = wb.create_sheet(_sheet_title(room.room_name or room.room_id, used))
+        for row in _room_rows(room):
+            ws.append(row)
 
     bio = io.BytesIO()
     wb.save(bio)
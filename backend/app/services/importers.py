@@ -2,27 +2,34 @@ from __future__ import annotations
 
 import csv
 import io
-from collections import Counter
+import zipfile
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
+from typing import BinaryIO, Literal, get_args, get_origin
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from app.models.schemas import (
-    ConstructionAssembly,
+    CsvDataset,
     CsvImportRequest,
     ImportApplyResponse,
     ImportDiff,
     ImportPreviewResponse,
-    InternalLoad,
-    MechanicalLoad,
-    Opening,
+    ImportRecordChange,
     PasteImportRequest,
     Project,
-    Room,
-    Surface,
     ValidationIssue,
     ValidationLevel,
-    VentilationInfiltration,
 )
 from app.services.column_aliases import ALIAS_MAPS, DATASET_TO_ENTITY
+from app.services.entities import ENTITY_MODELS, project_attr, project_entities
+from app.services.session_store import SessionStore
 from app.services.validation import validate_project
 
 
@@ -42,70 +49,167 @@ def _to_number(v: str) -> float | str:
         return raw
 
 
-def _canonical_field(entity: str, header: str) -> str | None:
-    normalized = _norm(header)
+def _to_str(v: str) -> str:
+    return v.strip()
+
+
+def _to_float(v: str) -> float | str:
+    raw = v.strip()
+    if raw == "":
+        return ""
+    return float(raw)
+
+
+@lru_cache(maxsize=None)
+def _alias_index(entity: str) -> dict[str, str]:
+    index: dict[str, str] = {}
     for field, aliases in ALIAS_MAPS[entity].items():
         for alias in aliases:
-            if _norm(alias) == normalized:
-                return field
-    return None
+            index.setdefault(_norm(alias), field)
+    return index
 
 
-def _parse_table(entity: str, text: str, has_header: bool) -> tuple[list[dict], list[ValidationIssue]]:
-    issues: list[ValidationIssue] = []
-    lines = [line for line in text.replace("\r\n", "\n").split("\n") if line.strip()]
-    if not lines:
-        return [], issues
+def _canonical_field(entity: str, header: str) -> str | None:
+    return _alias_index(entity).get(_norm(header))
 
-    sample = lines[0]
-    delimiter = "\t" if "\t" in sample else ","
-    reader = csv.reader(io.StringIO("\n".join(lines)), delimiter=delimiter)
-    rows = list(reader)
 
-    headers: list[str]
-    body_rows: list[list[str]]
-    if has_header:
-        headers = rows[0]
-        body_rows = rows[1:]
+def _is_text_type(tp) -> bool:
+    if get_origin(tp) is Literal:
+        return True
+    return isinstance(tp, type) and issubclass(tp, str)
+
+
+@lru_cache(maxsize=None)
+def _converter_for(entity: str, field: str) -> Callable[[str], object]:
+    model_cls = ENTITY_MODELS.get(entity)
+    info = model_cls.model_fields.get(field) if model_cls is not None else None
+    if info is None:
+        return _to_number
+    types = [t for t in (get_args(info.annotation) or (info.annotation,)) if t is not type(None)]
+    if types == [float]:
+        return _to_float
+    if types and all(_is_text_type(t) for t in types):
+        return _to_str
+    return _to_number
+
+
+def _required_fields(entity: str) -> tuple[str, ...]:
+    if entity in {"surfaces", "openings", "internal_loads", "mechanical_loads", "ventilation"}:
+        return ("id", "room_id")
+    return ("id",)
+
+
+def csv_rows(source: Iterable[str]) -> Iterator[list[str]]:
+    """Split CSV/TSV lines into rows; the delimiter is taken from the first non-blank line.
+
+    Blank lines come through as empty rows, so row numbers stay those of the file.
+    """
+    lines = iter(source)
+    blank = 0
+    for first in lines:
+        if first.strip():
+            break
+        blank += 1
+    else:
+        return
+    yield from ([] for _ in range(blank))
+    delimiter = "\t" if "\t" in first else ","
+    for row in csv.reader(chain((first,), lines), delimiter=delimiter):
+        yield [] if len(row) <= 1 and not "".join(row).strip() else row
+
+
+def iter_table(
+    entity: str,
+    source: Iterable[str],
+    has_header: bool,
+    report: Callable[[ValidationIssue], None],
+) -> Iterator[dict]:
+    """Lazily parse CSV/TSV lines into records, reporting issues through ``report`` as found."""
+    return iter_rows(entity, csv_rows(source), has_header, report)
+
+
+def iter_rows(
+    entity: str,
+    rows: Iterable[list[str]],
+    has_header: bool,
+    report: Callable[[ValidationIssue], None],
+) -> Iterator[dict]:
+    """Lazily map raw cell rows to records, reporting issues through ``report`` as found."""
+    return (record for _, record in iter_numbered_rows(entity, rows, has_header, report))
+
+
+def iter_numbered_rows(
+    entity: str,
+    rows: Iterable[list[str]],
+    has_header: bool,
+    report: Callable[[ValidationIssue], None],
+) -> Iterator[tuple[int, dict]]:
+    """Like ``iter_rows`` but yields ``(row, record)`` with the record's 1-based source row.
+
+    Empty rows (blank lines or sheet rows) are skipped silently but still counted.
+    """
+    numbered = enumerate(rows, start=1)
+    for first_idx, first_row in numbered:
+        if first_row:
+            break
     else:
-        canonical = list(ALIAS_MAPS[entity].keys())
-        headers = canonical[: len(rows[0])]
-        body_rows = rows
+        return
 
-    mapped_headers = []
-    for h in headers:
-        canon = _canonical_field(entity, h)
-        mapped_headers.append(canon)
+    if has_header:
+        headers = first_row
+        body_rows: Iterable[tuple[int, list[str]]] = numbered
+    else:
+        headers = list(ALIAS_MAPS[entity].keys())[: len(first_row)]
+        body_rows = chain(((first_idx, first_row),), numbered)
 
-    for idx, canon in enumerate(mapped_headers):
+    columns: list[tuple[int, str, Callable[[str], object]]] = []
+    for idx, header in enumerate(headers):
+        canon = _canonical_field(entity, header)
         if canon is None:
-            issues.append(
+            report(
                 ValidationIssue(
                     level=ValidationLevel.WARN,
                     code="unknown_column",
-                    message=f"未知の列を無視します: {headers[idx]}",
+                    message=f"未知の列を無視します: {header}",
                     entity=entity,
                     col=idx + 1,
                 )
             )
+            continue
+        columns.append((idx, canon, _converter_for(entity, canon)))
+
+    required = _required_fields(entity)
+    seen_ids: set[str] = set()
+    reported_dups: set[str] = set()
 
-    records: list[dict] = []
-    for row_idx, row in enumerate(body_rows, start=2 if has_header else 1):
+    for row_idx, row in body_rows:
+        if not row:
+            continue
+        width = len(row)
         record: dict = {}
-        for col_idx, raw in enumerate(row):
-            if col_idx >= len(mapped_headers):
+        for col_idx, key, convert in columns:
+            if col_idx >= width:
                 continue
-            key = mapped_headers[col_idx]
-            if key is None:
+            try:
+                val = convert(row[col_idx])
+            except ValueError:
+                report(
+                    ValidationIssue(
+                        level=ValidationLevel.ERROR,
+                        code="invalid_value",
+                        message=f"数値に変換できません: {row[col_idx]}",
+                        entity=entity,
+                        field=key,
+                        row=row_idx,
+                        col=col_idx + 1,
+                    )
+                )
                 continue
-            val = _to_number(raw)
             if val == "":
                 continue
             record[key] = val
-        if record:
-            records.append(record)
-        else:
-            issues.append(
+        if not record:
+            report(
                 ValidationIssue(
                     level=ValidationLevel.WARN,
                     code="empty_row",
@@ -114,38 +218,43 @@ def _parse_table(entity: str, text: str, has_header: bool) -> tuple[list[dict],
                     row=row_idx,
                 )
             )
+            continue
 
-    required = {"id"}
-    if entity in {"surfaces", "openings", "internal_loads", "mechanical_loads", "ventilation"}:
-        required.add("room_id")
-
-    for i, rec in enumerate(records, start=1):
-        missing = sorted([field for field in required if field not in rec])
-        for field in missing:
-            issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="missing_required",
-                    message=f"必須列が不足しています: {field}",
-                    entity=entity,
-                    field=field,
-                    row=i,
+        for field in required:
+            if field not in record:
+                report(
+                    ValidationIssue(
+                        level=ValidationLevel.ERROR,
+                        code="missing_required",
+                        message=f"必須列が不足しています: {field}",
+                        entity=entity,
+                        field=field,
+                        row=row_idx,
+                    )
                 )
-            )
+        if "id" in record:
+            rec_id = str(record["id"])
+            if rec_id in seen_ids:
+                if rec_id not in reported_dups:
+                    reported_dups.add(rec_id)
+                    report(
+                        ValidationIssue(
+                            level=ValidationLevel.ERROR,
+                            code="duplicate_id",
+                            message=f"取り込み内でID重複: {rec_id}",
+                            entity=entity,
+                            field="id",
+                            row=row_idx,
+                        )
+                    )
+            else:
+                seen_ids.add(rec_id)
+        yield row_idx, record
 
-    ids = [str(r.get("id")) for r in records if "id" in r]
-    dup_ids = [x for x, c in Counter(ids).items() if c > 1]
-    for dup in dup_ids:
-        issues.append(
-            ValidationIssue(
-                level=ValidationLevel.ERROR,
-                code="duplicate_id",
-                message=f"取り込み内でID重複: {dup}",
-                entity=entity,
-                field="id",
-            )
-        )
 
+def _parse_table(entity: str, text: str, has_header: bool) -> tuple[list[dict], list[ValidationIssue]]:
+    issues: list[ValidationIssue] = []
+    records = list(iter_table(entity, io.StringIO(text), has_header, issues.append))
     return records, issues
 
 
@@ -161,23 +270,60 @@ def _default_project() -> Project:
     return Project(id="new-project", name="新規プロジェクト", region="東京", solar_region="東京")
 
 
-def _upsert_list(current: list, incoming: list[dict], model_cls, delete_missing: bool) -> tuple[list, ImportDiff]:
+@lru_cache(maxsize=None)
+def _list_adapter(model_cls: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model_cls])
+
+
+def _field_changes(old: BaseModel, new: BaseModel, keys: Iterable[str], fields: dict) -> dict[str, dict]:
+    old_values = old.__dict__
+    new_values = new.__dict__
+    changes: dict[str, dict] = {}
+    for key in keys:
+        if key not in fields:
+            continue
+        before = old_values[key]
+        after = new_values[key]
+        if before != after:
+            changes[key] = {"old": before, "new": after}
+    return changes
+
+
+def _upsert_list(current: list, incoming: Iterable[dict], model_cls, delete_missing: bool) -> tuple[list, ImportDiff]:
+    """Merge incoming records into ``current`` and validate them as one batch.
+
+    Updates overlay the incoming fields on the existing model's already-validated field
+    values (no model_dump round trip); the whole batch is then validated with a single
+    ``TypeAdapter(list[Model])`` call. Raises pydantic.ValidationError on invalid rows.
+    """
     by_id = {str(x.id): x for x in current}
     incoming_ids = set()
-    add = 0
-    update = 0
+    batch: list[dict] = []
+    previous: list[BaseModel | None] = []
 
     for rec in incoming:
         rec_id = str(rec["id"])
         incoming_ids.add(rec_id)
-        if rec_id in by_id:
-            merged = by_id[rec_id].model_dump()
-            merged.update(rec)
-            by_id[rec_id] = model_cls.model_validate(merged)
-            update += 1
-        else:
-            by_id[rec_id] = model_cls.model_validate(rec)
+        old = by_id.get(rec_id)
+        previous.append(old)
+        batch.append({**old.__dict__, **rec} if old is not None else rec)
+
+    validated = _list_adapter(model_cls).validate_python(batch)
+
+    add = 0
+    update = 0
+    changes: list[dict] = []
+    model_fields = model_cls.model_fields
+    for rec, old, new in zip(batch, previous, validated):
+        rec_id = str(new.id)
+        if old is None:
             add += 1
+        else:
+            update += 1
+            fields = _field_changes(old, new, rec.keys(), model_fields)
+            if fields:
+                changes.append({"id": rec_id, "fields": fields})
+        by_id[rec_id] = new
 
     delete = 0
     if delete_missing:
@@ -186,84 +332,339 @@ def _upsert_list(current: list, incoming: list[dict], model_cls, delete_missing:
                 del by_id[rec_id]
                 delete += 1
 
-    return list(by_id.values()), ImportDiff(entity=model_cls.__name__.lower(), add=add, update=update, delete=delete)
+    diff = ImportDiff(
+        entity=model_cls.__name__.lower(),
+        add=add,
+        update=update,
+        delete=delete,
+        changes=_list_adapter(ImportRecordChange).validate_python(changes),
+    )
+    return list(by_id.values()), diff
 
 
-def preview_csv_import(req: CsvImportRequest) -> ImportPreviewResponse:
-    project = req.project or _default_project()
+# (dataset name, opener) where opener() returns a fresh iterable of cell rows
+DatasetSource = tuple[str, Callable[[], Iterable[list[str]]]]
+
+
+def _text_sources(datasets: list[CsvDataset]) -> list[DatasetSource]:
+    return [(ds.filename, lambda content=ds.content: csv_rows(io.StringIO(content))) for ds in datasets]
+
+
+def _binary_lines(fileobj: BinaryIO, encoding: str) -> Iterator[str]:
+    fileobj.seek(0)
+    wrapper = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+    try:
+        yield from wrapper
+    finally:
+        # Leave the underlying upload open so the dataset can be re-read.
+        wrapper.detach()
+
+
+def binary_sources(files: list[tuple[str, BinaryIO]], encoding: str = "utf-8-sig") -> list[DatasetSource]:
+    """CSV dataset sources that decode seekable binary files (e.g. multipart uploads) line by line."""
+    return [(filename, lambda f=fileobj: csv_rows(_binary_lines(f, encoding))) for filename, fileobj in files]
+
+
+def _cell_text(value: object) -> str:
+    return "" if value is None else str(value)
+
+
+def _sheet_rows(ws) -> Iterator[list[str]]:
+    for values in ws.iter_rows(values_only=True):
+        row = [_cell_text(v) for v in values]
+        while row and not row[-1].strip():
+            row.pop()
+        # empty rows are kept (as []) so row numbers match the sheet
+        yield row
+
+
+class WorkbookError(ValueError):
+    """The uploaded file is not a readable .xlsx workbook."""
+
+
+@contextmanager
+def _open_workbook(fileobj: BinaryIO) -> Iterator[openpyxl.Workbook]:
+    # read_only streams each sheet's XML; data_only reads cached formula results.
+    try:
+        wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as exc:
+        # KeyError: a zip that lacks the workbook parts openpyxl expects
+        raise WorkbookError(str(exc)) from exc
+    try:
+        yield wb
+    finally:
+        wb.close()
+
+
+def xlsx_sources(wb: openpyxl.Workbook) -> list[DatasetSource]:
+    """One dataset per worksheet, named by sheet title and read row by row."""
+    return [(ws.title, lambda ws=ws: _sheet_rows(ws)) for ws in wb.worksheets]
+
+
+def _skipped_dataset_issue(filename: str) -> ValidationIssue:
+    return ValidationIssue(
+        level=ValidationLevel.WARN,
+        code="dataset_skipped",
+        message=f"対象外ファイルをスキップしました: {filename}",
+    )
+
+
+# (entity, records, source row of each record)
+ParsedDataset = tuple[str, list[dict], list[int]]
+
+
+@dataclass
+class _ParsedImport:
+    project: Project
+    datasets: list[ParsedDataset]
+    diffs: list[ImportDiff]
+    issues: list[ValidationIssue]
+    delete_missing: bool
+
+
+# Parsed-but-uncommitted imports keyed by import token; weight is the cached cell count
+# (parsed records plus the captured project's entity fields).
+_IMPORT_CACHE_MAX_CELLS = 5_000_000
+_import_cache: SessionStore[_ParsedImport] = SessionStore(
+    max_entries=64, ttl_seconds=600.0, max_weight=_IMPORT_CACHE_MAX_CELLS
+)
+
+
+def _project_cells(project: Project) -> int:
+    return sum(
+        len(model.model_fields) * len(project_entities(project, entity)) for entity, model in ENTITY_MODELS.items()
+    )
+
+
+def _parse_sources(
+    project: Project,
+    sources: list[DatasetSource],
+    has_header: bool,
+    delete_missing: bool,
+    collect_limit: int | None,
+) -> tuple[list[ImportDiff], list[ValidationIssue], list[ParsedDataset] | None]:
+    """Parse every dataset once, computing diffs and optionally keeping the records.
+
+    Records are kept while their cell count stays within ``collect_limit`` (no limit when
+    None); past that the collected records are dropped and only diffs/issues are returned.
+    """
     issues: list[ValidationIssue] = []
     diffs: list[ImportDiff] = []
+    datasets: list[ParsedDataset] | None = []
+    cells = 0
 
-    for ds in req.datasets:
-        entity = _dataset_entity_from_filename(ds.filename)
+    for filename, open_source in sources:
+        entity = _dataset_entity_from_filename(filename)
         if not entity:
-            issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.WARN,
-                    code="dataset_skipped",
-                    message=f"対象外ファイルをスキップしました: {ds.filename}",
-                )
-            )
+            issues.append(_skipped_dataset_issue(filename))
             continue
 
-        records, parse_issues = _parse_table(entity, ds.content, req.has_header)
-        issues.extend(parse_issues)
-
-        current = getattr(project, "ventilation_infiltration" if entity == "ventilation" else entity)
-        current_ids = {str(x.id) for x in current}
-        incoming_ids = [str(r.get("id")) for r in records if "id" in r]
-
-        add = sum(1 for rid in incoming_ids if rid not in current_ids)
-        update = sum(1 for rid in incoming_ids if rid in current_ids)
-        delete = max(len(current_ids - set(incoming_ids)), 0) if req.delete_missing else 0
+        current_ids = {str(x.id) for x in project_entities(project, entity)}
+        incoming_ids: set[str] = set()
+        collected: list[dict] | None = [] if datasets is not None else None
+        source_rows: list[int] = []
+        add = 0
+        update = 0
+        for row, rec in iter_numbered_rows(entity, open_source(), has_header, issues.append):
+            if collected is not None:
+                cells += len(rec)
+                if collect_limit is not None and cells > collect_limit:
+                    collected = datasets = None
+                else:
+                    collected.append(rec)
+                    source_rows.append(row)
+            if "id" not in rec:
+                continue
+            rec_id = str(rec["id"])
+            incoming_ids.add(rec_id)
+            if rec_id in current_ids:
+                update += 1
+            else:
+                add += 1
+        delete = len(current_ids - incoming_ids) if delete_missing else 0
         diffs.append(ImportDiff(entity=entity, add=add, update=update, delete=delete))
+        if datasets is not None and collected is not None:
+            datasets.append((entity, collected, source_rows))
 
-    return ImportPreviewResponse(diffs=diffs, issues=issues)
+    return diffs, issues, datasets
 
 
-def apply_csv_import(req: CsvImportRequest) -> ImportApplyResponse:
-    project = req.project or _default_project()
-    preview = preview_csv_import(req)
-    issues = list(preview.issues)
+def _model_error_issues(entity: str, exc: ValidationError, source_rows: list[int]) -> list[ValidationIssue]:
+    """Issues for a failed batch validation; ``loc[0]`` is the batch index, mapped back to its source row."""
+    issues: list[ValidationIssue] = []
+    for err in exc.errors():
+        loc = err.get("loc", ())
+        row = source_rows[loc[0]] if loc and isinstance(loc[0], int) and loc[0] < len(source_rows) else None
+        field = ".".join(str(x) for x in loc[1:]) or None
+        issues.append(
+            ValidationIssue(
+                level=ValidationLevel.ERROR,
+                code="invalid_value",
+                message=f"値が不正です: {err.get('msg', '')}",
+                entity=entity,
+                field=field,
+                row=row,
+            )
+        )
+    return issues
 
-    if any(i.level == ValidationLevel.ERROR for i in issues):
-        return ImportApplyResponse(project=project, diffs=preview.diffs, issues=issues)
 
-    from app.models.schemas import GlassSpec
+def _has_errors(issues: list[ValidationIssue]) -> bool:
+    return any(i.level == ValidationLevel.ERROR for i in issues)
 
-    model_map = {
-        "rooms": Room,
-        "surfaces": Surface,
-        "openings": Opening,
-        "constructions": ConstructionAssembly,
-        "glasses": GlassSpec,
-        "internal_loads": InternalLoad,
-        "mechanical_loads": MechanicalLoad,
-        "ventilation": VentilationInfiltration,
-    }
 
+def _commit(
+    project: Project,
+    datasets: list[ParsedDataset],
+    issues: list[ValidationIssue],
+    delete_missing: bool,
+) -> ImportApplyResponse:
+    issues = list(issues)
+    updates: list[tuple[str, list]] = []
     applied_diffs: list[ImportDiff] = []
-
-    for ds in req.datasets:
-        entity = _dataset_entity_from_filename(ds.filename)
-        if not entity:
+    for entity, records, source_rows in datasets:
+        current = project_entities(project, entity)
+        try:
+            updated, diff = _upsert_list(current, records, ENTITY_MODELS[entity], delete_missing)
+        except ValidationError as exc:
+            issues.extend(_model_error_issues(entity, exc, source_rows))
             continue
-        records, _ = _parse_table(entity, ds.content, req.has_header)
-        if entity == "ventilation":
-            current = project.ventilation_infiltration
-            updated, diff = _upsert_list(current, records, model_map[entity], req.delete_missing)
-            project.ventilation_infiltration = updated
-        else:
-            current = getattr(project, entity)
-            updated, diff = _upsert_list(current, records, model_map[entity], req.delete_missing)
-            setattr(project, entity, updated)
+        updates.append((entity, updated))
         diff.entity = entity
         applied_diffs.append(diff)
 
+    if _has_errors(issues):
+        return ImportApplyResponse(project=project, diffs=applied_diffs, issues=issues)
+
+    for entity, updated in updates:
+        setattr(project, project_attr(entity), updated)
     issues.extend(validate_project(project))
     return ImportApplyResponse(project=project, diffs=applied_diffs, issues=issues)
 
 
+def preview_import(
+    project: Project,
+    sources: list[DatasetSource],
+    has_header: bool,
+    delete_missing: bool,
+) -> ImportPreviewResponse:
+    """Preview an import and, when it is error free and fits the cache, issue an import token."""
+    project_cells = _project_cells(project)
+    diffs, issues, datasets = _parse_sources(
+        project, sources, has_header, delete_missing, max(0, _IMPORT_CACHE_MAX_CELLS - project_cells)
+    )
+    token = None
+    if datasets is not None and not _has_errors(issues):
+        record_cells = sum(len(rec) for _, records, _ in datasets for rec in records)
+        weight = record_cells + project_cells + len(diffs) + len(issues) + 1
+        token = _import_cache.put(
+            _ParsedImport(
+                project=project,
+                datasets=datasets,
+                diffs=diffs,
+                issues=issues,
+                delete_missing=delete_missing,
+            ),
+            weight=weight,
+        )
+    return ImportPreviewResponse(diffs=diffs, issues=issues, import_token=token)
+
+
+def apply_import(
+    project: Project,
+    sources: list[DatasetSource],
+    has_header: bool,
+    delete_missing: bool,
+) -> ImportApplyResponse:
+    diffs, issues, datasets = _parse_sources(project, sources, has_header, delete_missing, None)
+    if _has_errors(issues) or datasets is None:
+        return ImportApplyResponse(project=project, diffs=diffs, issues=issues)
+    return _commit(project, datasets, issues, delete_missing)
+
+
+# a preview's cached records and their cache weight, as moved between processes
+DetachedImport = tuple[_ParsedImport, int]
+
+
+def detach_import(token: str | None) -> DetachedImport | None:
+    """Remove the records cached under ``token`` so they can be committed or cached elsewhere."""
+    return _import_cache.take(token) if token else None
+
+
+def adopt_import(detached: DetachedImport | None) -> str | None:
+    """Cache records from ``detach_import`` (e.g. run in a pool worker) under a new import token."""
+    if detached is None:
+        return None
+    parsed, weight = detached
+    return _import_cache.put(parsed, weight=weight)
+
+
+def commit_detached_import(detached: DetachedImport, project: Project | None = None) -> ImportApplyResponse:
+    parsed, _ = detached
+    return _commit(project or parsed.project, parsed.datasets, parsed.issues, parsed.delete_missing)
+
+
+def commit_import(token: str, project: Project | None = None) -> ImportApplyResponse | None:
+    """Apply the records cached by a preview; returns None when the token is unknown or expired.
+
+    Tokens are single use. ``project`` overrides the project captured at preview time.
+    """
+    detached = detach_import(token)
+    if detached is None:
+        return None
+    return commit_detached_import(detached, project)
+
+
+def preview_csv_import(req: CsvImportRequest) -> ImportPreviewResponse:
+    project = req.project or _default_project()
+    return preview_import(project, _text_sources(req.datasets), req.has_header, req.delete_missing)
+
+
+def apply_csv_import(req: CsvImportRequest) -> ImportApplyResponse:
+    project = req.project or _default_project()
+    return apply_import(project, _text_sources(req.datasets), req.has_header, req.delete_missing)
+
+
+def preview_upload_import(
+    files: list[tuple[str, BinaryIO]],
+    project: Project | None,
+    has_header: bool,
+    delete_missing: bool,
+    encoding: str = "utf-8-sig",
+) -> ImportPreviewResponse:
+    return preview_import(project or _default_project(), binary_sources(files, encoding), has_header, delete_missing)
+
+
+def apply_upload_import(
+    files: list[tuple[str, BinaryIO]],
+    project: Project | None,
+    has_header: bool,
+    delete_missing: bool,
+    encoding: str = "utf-8-sig",
+) -> ImportApplyResponse:
+    return apply_import(project or _default_project(), binary_sources(files, encoding), has_header, delete_missing)
+
+
+def preview_xlsx_import(
+    fileobj: BinaryIO,
+    project: Project | None,
+    has_header: bool,
+    delete_missing: bool,
+) -> ImportPreviewResponse:
+    with _open_workbook(fileobj) as wb:
+        return preview_import(project or _default_project(), xlsx_sources(wb), has_header, delete_missing)
+
+
+def apply_xlsx_import(
+    fileobj: BinaryIO,
+    project: Project | None,
+    has_header: bool,
+    delete_missing: bool,
+) -> ImportApplyResponse:
+    with _open_workbook(fileobj) as wb:
+        return apply_import(project or _default_project(), xlsx_sources(wb), has_header, delete_missing)
+
+
 def preview_paste_import(req: PasteImportRequest) -> ImportPreviewResponse:
     project = req.project or _default_project()
     fake = CsvImportRequest(
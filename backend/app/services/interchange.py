@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+try:
+    import msgpack  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    zstandard = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+_WILDCARDS = ("*/*", "application/*")
+# bodies below this are sent uncompressed; the framing costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+# decoded request bodies larger than this are rejected (also guards against compression bombs)
+MAX_DECODED_BYTES = 512 * 1024 * 1024
+_INFLATE_STEP = 1024 * 1024
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class InterchangeError(ValueError):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _media_ranges(header: str | None) -> list[tuple[str, float]]:
+    ranges = []
+    for part in (header or "").split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((fields[0].lower(), q))
+    return ranges
+
+
+def _canonical_media_type(value: str) -> str | None:
+    if value in _MSGPACK_ALIASES:
+        return MSGPACK_MEDIA_TYPE
+    if value == JSON_MEDIA_TYPE or value.endswith("+json"):
+        return JSON_MEDIA_TYPE
+    return None
+
+
+def supported_media_types() -> list[str]:
+    return [JSON_MEDIA_TYPE] + ([MSGPACK_MEDIA_TYPE] if msgpack is not None else [])
+
+
+def supported_encodings() -> list[str]:
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """Response media type for an Accept header; JSON unless the client prefers MessagePack.
+
+    Accept values naming neither type (``text/html``, ``application/xml``...) get JSON;
+    406 is raised only when MessagePack is the sole acceptable type and is not installed.
+    """
+    ranges = _media_ranges(accept)
+    if not ranges:
+        return JSON_MEDIA_TYPE
+    best: tuple[float, str] | None = None
+    for media_type in supported_media_types():
+        q = max(
+            (q for value, q in ranges if value in _WILDCARDS or _canonical_media_type(value) == media_type),
+            default=0.0,
+        )
+        # ties keep the earlier (JSON) type
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, media_type)
+    if best is not None:
+        return best[1]
+    if any(q > 0 and _canonical_media_type(value) == MSGPACK_MEDIA_TYPE for value, q in ranges):
+        raise InterchangeError(406, f"Acceptable media types: {', '.join(supported_media_types())}")
+    return JSON_MEDIA_TYPE
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Preferred content coding from Accept-Encoding, or None for identity."""
+    ranges = dict(_media_ranges(accept_encoding))
+    for encoding in supported_encodings():
+        if ranges.get(encoding, ranges.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def encode_body(content: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        if msgpack is None:
+            raise InterchangeError(406, "MessagePack support requires the msgpack package")
+        return msgpack.packb(to_jsonable_python(content), use_bin_type=True)
+    return to_json(content)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=5)
+
+
+class _Sink:
+    """File-like target for zstandard's stream writer; each decompressed piece goes to ``write``."""
+
+    def __init__(self, write):
+        self.write = write
+
+
+class BodyDecoder:
+    """Incrementally decompresses and decodes a request body as its chunks arrive.
+
+    JSON is collected (decompressed) and validated in one pydantic-core pass at the
+    end; MessagePack is fed to a streaming unpacker chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        content_type: str | None,
+        content_encoding: str | None,
+        max_bytes: int = MAX_DECODED_BYTES,
+    ):
+        media = (content_type or JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+        self.media_type = _canonical_media_type(media)
+        if self.media_type is None:
+            raise InterchangeError(415, f"Unsupported Content-Type: {media}")
+        if self.media_type == MSGPACK_MEDIA_TYPE and msgpack is None:
+            raise InterchangeError(415, "MessagePack support requires the msgpack package")
+
+        encoding = (content_encoding or "identity").strip().lower()
+        self._zlib = encoding in ("gzip", "x-gzip", "deflate")
+        if self._zlib:
+            # wbits=47 accepts both gzip and zlib framing
+            self._inflater = zlib.decompressobj(wbits=47)
+        elif encoding == "zstd" and zstandard is not None:
+            # the writer hands output to _take in pieces of at most _INFLATE_STEP bytes
+            self._inflater = zstandard.ZstdDecompressor().stream_writer(_Sink(self._take), write_size=_INFLATE_STEP)
+        elif encoding == "identity":
+            self._inflater = None
+        else:
+            raise InterchangeError(415, f"Unsupported Content-Encoding: {encoding}")
+
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._buffer = bytearray()
+        self._unpacker = (
+            msgpack.Unpacker(raw=False, max_buffer_size=max_bytes) if self.media_type == MSGPACK_MEDIA_TYPE else None
+        )
+
+    def _take(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise InterchangeError(413, f"Decoded body exceeds {self.max_bytes} bytes")
+        if self._unpacker is not None:
+            self._unpacker.feed(data)
+        else:
+            self._buffer += data
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self._inflater is None:
+            self._take(chunk)
+            return
+        errors = (zlib.error, zstandard.ZstdError) if zstandard is not None else (zlib.error,)
+        try:
+            # inflate in bounded steps so a compression bomb trips max_bytes early
+            if not self._zlib:
+                self._inflater.write(chunk)
+                return
+            data = chunk
+            while data:
+                self._take(self._inflater.decompress(data, _INFLATE_STEP))
+                data = self._inflater.unconsumed_tail
+        except errors as exc:
+            raise InterchangeError(400, f"Invalid compressed body: {exc}") from exc
+
+    def decode(self, model: type[ModelT]) -> ModelT:
+        """Validate the complete body as ``model``; raises pydantic.ValidationError."""
+        if self._zlib:
+            self._take(self._inflater.flush())
+        if self._unpacker is None:
+            return model.model_validate_json(bytes(self._buffer))
+        try:
+            obj = next(self._unpacker)
+        except StopIteration:
+            raise InterchangeError(400, "Empty or truncated MessagePack body") from None
+        except ValueError as exc:
+            raise InterchangeError(400, f"Invalid MessagePack body: {exc}") from exc
+        return model.model_validate(obj)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from app.models.schemas import JsonExportResponse, JsonImportRequest, Project
+from pydantic_core import to_json
+
+from app.models.schemas import CalcResult, JsonExportResponse, JsonImportRequest, Project
 
 
 def import_project_json(req: JsonImportRequest) -> Project:
@@ -14,3 +16,11 @@ def export_project_json(project: Project, calc_result: dict | None = None) -> Js
     if calc_result is not None:
         payload["calc_result"] = calc_result
     return JsonExportResponse(payload=payload)
+
+
+def export_project_json_bytes(project: Project, calc_result: CalcResult | None = None) -> bytes:
+    """Serialized ``JsonExportResponse`` built straight from the models, without the dict copy."""
+    body = b'{"payload":{"project":' + to_json(project)
+    if calc_result is not None:
+        body += b',"calc_result":' + to_json(calc_result)
+    return body + b"}}"
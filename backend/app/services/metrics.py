@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# In-process metrics rendered in the Prometheus text exposition format (0.0.4).
+# Stage timings observed inside compute pool workers are collected per job and
+# shipped back with the result (see ``collect_samples``), so they land here too.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[str, Labels, float]
+
+
+def _format_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    pairs = list(labels) + ([extra] if extra is not None else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts, sum, count)
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        sink = _collector.samples if hasattr(_collector, "samples") else None
+        if sink is not None:
+            sink.append((self.name, key, value))
+            return
+        self._record(key, value)
+
+    def _record(self, key: Labels, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][idx] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        for key in sorted(series):
+            counts, total = series[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+def render_family(name: str, kind: str, help_text: str, samples: list[tuple[dict[str, str], float]]) -> list[str]:
+    """Lines for a counter or gauge family read from a snapshot at scrape time."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+    return lines
+
+
+REQUEST_SECONDS = Histogram("heatload_request_duration_seconds", "API request latency by route.")
+STAGE_SECONDS = Histogram("heatload_stage_duration_seconds", "Time spent per processing stage, per request.")
+PROJECT_SIZE = Histogram("heatload_project_entities", "Entities per calculated or exported project.", SIZE_BUCKETS)
+QUEUE_WAIT_SECONDS = Histogram("heatload_compute_queue_wait_seconds", "Time compute jobs wait for a worker.")
+
+_HISTOGRAMS = {h.name: h for h in (REQUEST_SECONDS, STAGE_SECONDS, PROJECT_SIZE, QUEUE_WAIT_SECONDS)}
+_collectors: list[Callable[[], list[str]]] = []
+_collector = threading.local()
+
+
+def register_collector(collector: Callable[[], list[str]]) -> None:
+    """Add a callable rendering counter/gauge lines from live state at scrape time."""
+    _collectors.append(collector)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def stage(name: str):
+    return STAGE_SECONDS.time(stage=name)
+
+
+def observe_project(project: Any) -> None:
+    PROJECT_SIZE.observe(len(project.rooms), entity="rooms")
+    PROJECT_SIZE.observe(len(project.surfaces), entity="surfaces")
+    PROJECT_SIZE.observe(len(project.openings), entity="openings")
+
+
+def collect_samples(fn: Callable[..., Any], *args: Any) -> tuple[Any, list[Sample]]:
+    """Run ``fn(*args)`` and return its result with the histogram samples it observed.
+
+    Used in pool workers, whose own registry is never scraped; the parent process
+    records the samples with ``record_samples``.
+    """
+    _collector.samples = []
+    try:
+        return fn(*args), _collector.samples
+    finally:
+        del _collector.samples
+
+
+def record_samples(samples: list[Sample]) -> None:
+    for name, labels, value in samples:
+        _HISTOGRAMS[name]._record(labels, value)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for histogram in _HISTOGRAMS.values():
+        lines.extend(histogram.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
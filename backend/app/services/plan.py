@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from app.models.schemas import (
+    ConstructionAssembly,
+    DesignCondition,
+    GlassSpec,
+    InternalLoad,
+    MechanicalLoad,
+    Opening,
+    Project,
+    Surface,
+    VentilationInfiltration,
+)
+
+
+@dataclass
+class CalcPlan:
+    """Id maps and per-room groupings consumed by ``run_calculation``."""
+
+    condition_map: dict[str, DesignCondition] = field(default_factory=dict)
+    constructions: dict[str, ConstructionAssembly] = field(default_factory=dict)
+    glasses: dict[str, GlassSpec] = field(default_factory=dict)
+    room_surfaces: dict[str, list[Surface]] = field(default_factory=lambda: defaultdict(list))
+    room_openings: dict[str, list[Opening]] = field(default_factory=lambda: defaultdict(list))
+    room_internal_loads: dict[str, list[InternalLoad]] = field(default_factory=lambda: defaultdict(list))
+    room_mechanical_loads: dict[str, list[MechanicalLoad]] = field(default_factory=lambda: defaultdict(list))
+    room_ventilation: dict[str, list[VentilationInfiltration]] = field(default_factory=lambda: defaultdict(list))
+
+
+def build_plan(project: Project) -> CalcPlan:
+    plan = CalcPlan(
+        condition_map={c.id: c for c in project.design_conditions},
+        constructions={c.id: c for c in project.constructions},
+        glasses={g.id: g for g in project.glasses},
+    )
+    for s in project.surfaces:
+        plan.room_surfaces[s.room_id].append(s)
+    for o in project.openings:
+        plan.room_openings[o.room_id].append(o)
+    for i in project.internal_loads:
+        plan.room_internal_loads[i.room_id].append(i)
+    for m in project.mechanical_loads:
+        plan.room_mechanical_loads[m.room_id].append(m)
+    for v in project.ventilation_infiltration:
+        plan.room_ventilation[v.room_id].append(v)
+    return plan
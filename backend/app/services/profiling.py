@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import cProfile
+import pstats
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, TypeVar
+
+from app.models.schemas import ProfileFunctionStat, ProfileReport
+from app.services.session_store import SessionStore
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+TOP_FUNCTIONS = 40
+HOT_FUNCTIONS = ("round_half_up", "lookup_etd", "moist_air_state")
+# per-entity domain entry points called once per entity by calc_room
+ENTITY_FUNCTIONS = {
+    "calc_surface_load": "surfaces",
+    "calc_opening_solar_gain": "openings",
+    "calc_internal_load": "internal_loads",
+    "calc_mechanical_load": "mechanical_loads",
+    "calc_ventilation_load": "ventilation_infiltration",
+}
+
+T = TypeVar("T")
+
+_profiles: SessionStore[ProfileReport] = SessionStore(max_entries=32, ttl_seconds=3600.0)
+
+
+def _label(filename: str, line: int, name: str) -> str:
+    path = Path(filename)
+    try:
+        filename = path.relative_to(BACKEND_DIR).as_posix()
+    except ValueError:
+        filename = path.name if path.is_absolute() else filename
+    return f"{filename}:{line}({name})"
+
+
+def _merged(entries: list[tuple[tuple[str, int, str], tuple]], label: str) -> ProfileFunctionStat:
+    return ProfileFunctionStat(
+        function=label,
+        primitive_calls=sum(stat[0] for _, stat in entries),
+        calls=sum(stat[1] for _, stat in entries),
+        total_seconds=sum(stat[2] for _, stat in entries),
+        cumulative_seconds=sum(stat[3] for _, stat in entries),
+    )
+
+
+def build_report(stats: pstats.Stats, endpoint: str, total_seconds: float) -> ProfileReport:
+    entries = list(stats.stats.items())  # (file, line, name) -> (cc, nc, tt, ct, callers)
+    by_name: dict[str, list] = {}
+    for entry in entries:
+        by_name.setdefault(entry[0][2], []).append(entry)
+    top = sorted(entries, key=lambda entry: entry[1][3], reverse=True)[:TOP_FUNCTIONS]
+    return ProfileReport(
+        endpoint=endpoint,
+        total_seconds=total_seconds,
+        functions=[_merged([entry], _label(*entry[0])) for entry in top],
+        hot_functions={name: _merged(by_name.get(name, []), name) for name in HOT_FUNCTIONS},
+        entities={
+            entity: _merged(by_name.get(name, []), name) for name, entity in ENTITY_FUNCTIONS.items()
+        },
+    )
+
+
+def profile_call(endpoint: str, fn: Callable[..., T], *args: Any) -> tuple[T, ProfileReport]:
+    """Run ``fn(*args)`` under cProfile; runs inside the compute pool worker."""
+    profiler = cProfile.Profile()
+    start = perf_counter()
+    result = profiler.runcall(fn, *args)
+    total = perf_counter() - start
+    return result, build_report(pstats.Stats(profiler), endpoint, total)
+
+
+def store_profile(report: ProfileReport) -> str:
+    """Keep ``report`` for an hour (at most 32 reports); returns its id."""
+    return _profiles.put(report)
+
+
+def get_profile(profile_id: str) -> ProfileReport | None:
+    report = _profiles.get(profile_id)
+    return report.model_copy(update={"profile_id": profile_id}) if report is not None else None
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import copy
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.models.schemas import (
+    EntityChange,
+    JsonPatchOperation,
+    Project,
+    RoomLoadSummary,
+    SystemLoadSummary,
+    ValidationIssue,
+)
+from app.services.calculation import build_context, calc_room, summarize_systems, total_loads
+from app.services.entities import ENTITY_MODELS, project_attr
+from app.services.plan import build_plan
+from app.services.session_store import SessionStore
+from app.services.validation import ValidationSession
+
+_ENTITY_BY_ATTR = {project_attr(entity): entity for entity in ENTITY_MODELS}
+# entities whose items belong to a room through room_id
+_ROOM_SCOPED = ("surfaces", "openings", "internal_loads", "mechanical_loads", "ventilation")
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+class VersionConflict(ValueError):
+    pass
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _pointer(path: str) -> list[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {path!r}")
+    return [_unescape(token) for token in path[1:].split("/")]
+
+
+def _index(token: str, size: int, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return size
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    idx = int(token)
+    if idx > size or (idx == size and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {idx}")
+    return idx
+
+
+def _walk(doc: Any, tokens: list[str], path: str) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise JsonPatchError(f"Path not found: {path}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(token, len(doc), allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: {path}")
+    return doc
+
+
+def _json_get(doc: Any, tokens: list[str], path: str) -> Any:
+    return _walk(doc, tokens, path)
+
+
+def _json_add(doc: Any, tokens: list[str], value: Any, path: str) -> Any:
+    if not tokens:
+        return value
+    parent = _walk(doc, tokens[:-1], path)
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(key, len(parent), allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Path not found: {path}")
+    return doc
+
+
+def _json_remove(doc: Any, tokens: list[str], path: str) -> tuple[Any, Any]:
+    if not tokens:
+        raise JsonPatchError("The document root cannot be removed")
+    parent = _walk(doc, tokens[:-1], path)
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path not found: {path}")
+        return doc, parent.pop(key)
+    if isinstance(parent, list):
+        return doc, parent.pop(_index(key, len(parent), allow_end=False))
+    raise JsonPatchError(f"Path not found: {path}")
+
+
+class _Workspace:
+    """Copy-on-write view of a Project that JSON Patch operations are applied to.
+
+    Entity lists are addressed item by item: an operation below ``/surfaces/3`` only
+    dumps and re-validates that one surface, so the cost follows the edit.
+    """
+
+    def __init__(self, project: Project):
+        self.project = project
+        self.lists: dict[str, list[BaseModel]] = {}
+        self.header: dict[str, Any] | None = None
+        self.header_changed = False
+        # entity -> ids whose items were replaced, added or removed
+        self.touched: dict[str, set[str]] = {}
+
+    def _list(self, attr: str) -> list[BaseModel]:
+        if attr not in self.lists:
+            self.lists[attr] = list(getattr(self.project, attr))
+        return self.lists[attr]
+
+    def _header(self) -> dict[str, Any]:
+        if self.header is None:
+            self.header = self.project.model_dump(mode="json", exclude=set(_ENTITY_BY_ATTR))
+        return self.header
+
+    def _touch(self, entity: str, *items: BaseModel | None) -> None:
+        ids = self.touched.setdefault(entity, set())
+        ids.update(item.id for item in items if item is not None)
+
+    def _model(self, entity: str, value: Any) -> BaseModel:
+        return ENTITY_MODELS[entity].model_validate(value)
+
+    # JSON Patch primitives ------------------------------------------------
+
+    def get(self, path: str) -> Any:
+        tokens = _pointer(path)
+        if not tokens:
+            return self.build().model_dump(mode="json")
+        if tokens[0] not in _ENTITY_BY_ATTR:
+            return _json_get(self._header(), tokens, path)
+        items = self._list(tokens[0])
+        if len(tokens) == 1:
+            return [item.model_dump(mode="json") for item in items]
+        item = items[_index(tokens[1], len(items), allow_end=False)]
+        return _json_get(item.model_dump(mode="json"), tokens[2:], path)
+
+    def add(self, path: str, value: Any) -> None:
+        self._write(path, value, replace=False)
+
+    def replace(self, path: str, value: Any) -> None:
+        self.get(path)  # target must exist
+        self._write(path, value, replace=True)
+
+    def remove(self, path: str) -> Any:
+        tokens = _pointer(path)
+        if not tokens:
+            raise JsonPatchError("The document root cannot be removed")
+        if tokens[0] not in _ENTITY_BY_ATTR:
+            self.header, removed = _json_remove(self._header(), tokens, path)
+            self.header_changed = True
+            return removed
+        entity = _ENTITY_BY_ATTR[tokens[0]]
+        items = self._list(tokens[0])
+        if len(tokens) == 1:
+            removed = [item.model_dump(mode="json") for item in items]
+            self._touch(entity, *items)
+            items.clear()
+            return removed
+        idx = _index(tokens[1], len(items), allow_end=False)
+        if len(tokens) == 2:
+            old = items.pop(idx)
+            self._touch(entity, old)
+            return old.model_dump(mode="json")
+        doc, removed = _json_remove(items[idx].model_dump(mode="json"), tokens[2:], path)
+        self._set_item(entity, items, idx, doc)
+        return removed
+
+    def _set_item(self, entity: str, items: list[BaseModel], idx: int, value: Any) -> None:
+        new = self._model(entity, value)
+        self._touch(entity, items[idx], new)
+        items[idx] = new
+
+    def _write(self, path: str, value: Any, replace: bool) -> None:
+        tokens = _pointer(path)
+        if not tokens:
+            raise JsonPatchError("Replacing the whole project is not supported in a session")
+        if tokens[0] not in _ENTITY_BY_ATTR:
+            if replace:
+                self.header, _ = _json_remove(self._header(), tokens, path)
+            self.header = _json_add(self._header(), tokens, value, path)
+            self.header_changed = True
+            return
+        entity = _ENTITY_BY_ATTR[tokens[0]]
+        items = self._list(tokens[0])
+        if len(tokens) == 1:
+            if not isinstance(value, list):
+                raise JsonPatchError(f"{path} must be an array")
+            new_items = [self._model(entity, raw) for raw in value]
+            self._touch(entity, *items, *new_items)
+            items[:] = new_items
+            return
+        if len(tokens) == 2:
+            idx = _index(tokens[1], len(items), allow_end=not replace)
+            if replace:
+                self._set_item(entity, items, idx, value)
+            else:
+                new = self._model(entity, value)
+                self._touch(entity, new)
+                items.insert(idx, new)
+            return
+        idx = _index(tokens[1], len(items), allow_end=False)
+        doc = items[idx].model_dump(mode="json")
+        if replace:
+            doc, _ = _json_remove(doc, tokens[2:], path)
+        self._set_item(entity, items, idx, _json_add(doc, tokens[2:], value, path))
+
+    # Operations -------------------------------------------------------------
+
+    def apply_patch(self, ops: list[JsonPatchOperation]) -> None:
+        for op in ops:
+            has_value = "value" in op.model_fields_set
+            if op.op in ("add", "replace", "test") and not has_value:
+                raise JsonPatchError(f"'{op.op}' operation at {op.path} requires a value")
+            if op.op in ("move", "copy") and op.from_ is None:
+                raise JsonPatchError(f"'{op.op}' operation at {op.path} requires 'from'")
+            if op.op == "add":
+                self.add(op.path, op.value)
+            elif op.op == "replace":
+                self.replace(op.path, op.value)
+            elif op.op == "remove":
+                self.remove(op.path)
+            elif op.op == "move":
+                if op.path.startswith(op.from_ + "/"):
+                    raise JsonPatchError(f"Cannot move {op.from_} into its own child {op.path}")
+                self.add(op.path, self.remove(op.from_))
+            elif op.op == "copy":
+                self.add(op.path, copy.deepcopy(self.get(op.from_)))
+            elif op.op == "test":
+                if self.get(op.path) != op.value:
+                    raise JsonPatchError(f"Test failed at {op.path}")
+
+    def apply_changes(self, changes: list[EntityChange]) -> None:
+        """Entity-level delta: delete by id, then upsert (replacing the first item with that id)."""
+        for change in changes:
+            entity = change.entity
+            items = self._list(project_attr(entity))
+            upserts = [self._model(entity, raw) for raw in change.upsert]
+            deleted = set(change.delete)
+            if deleted:
+                self._touch(entity, *(item for item in items if item.id in deleted))
+                items[:] = [item for item in items if item.id not in deleted]
+            positions: dict[str, int] = {}
+            repeated: set[str] = set()
+            for idx, item in enumerate(items):
+                if item.id in positions:
+                    repeated.add(item.id)
+                positions.setdefault(item.id, idx)
+            collapse: set[str] = set()
+            for new in upserts:
+                self._touch(entity, new)
+                idx = positions.get(new.id)
+                if idx is None:
+                    positions[new.id] = len(items)
+                    items.append(new)
+                    continue
+                items[idx] = new
+                if new.id in repeated:
+                    collapse.add(new.id)
+            if collapse:
+                # later duplicates of an upserted id collapse into the upserted item
+                items[:] = [item for pos, item in enumerate(items) if item.id not in collapse or positions[item.id] == pos]
+
+    def build(self) -> Project:
+        if self.header_changed:
+            lists = {attr: self.lists.get(attr, getattr(self.project, attr)) for attr in _ENTITY_BY_ATTR}
+            return Project.model_validate({**self.header, **lists})
+        return self.project.model_copy(update=self.lists)
+
+
+@dataclass
+class SessionDelta:
+    version: int
+    valid: bool
+    added: list[ValidationIssue]
+    removed: list[ValidationIssue]
+    calculated: bool
+    room_results: list[RoomLoadSummary] = field(default_factory=list)
+    removed_room_ids: list[str] = field(default_factory=list)
+    system_results: list[SystemLoadSummary] = field(default_factory=list)
+    totals: dict[str, float] = field(default_factory=dict)
+
+
+class ProjectSession:
+    """A Project held server-side; edits re-validate and re-calculate only what they touch.
+
+    Room results are kept while the project has no error-level issues and are
+    recomputed for the rooms an edit reaches (directly, through room_id, or through
+    a construction/glass the room's surfaces and openings use).
+    """
+
+    def __init__(self, project: Project):
+        self._lock = threading.Lock()
+        self.project = project
+        self.version = 0
+        self.validation = ValidationSession(project)
+        self._room_results: dict[str, list[RoomLoadSummary]] | None = None
+        self._recalculate(None)
+
+    @property
+    def valid(self) -> bool:
+        return not any(i.level == "error" for i in self.validation.issues)
+
+    @property
+    def calculated(self) -> bool:
+        return self._room_results is not None
+
+    def room_results(self) -> list[RoomLoadSummary]:
+        if self._room_results is None:
+            return []
+        return [summary for summaries in self._room_results.values() for summary in summaries]
+
+    def _recalculate(self, room_ids: set[str] | None) -> tuple[list[RoomLoadSummary], list[str]]:
+        """Refresh results for ``room_ids`` (None: all rooms); return (changed, removed ids)."""
+        if not self.valid:
+            self._room_results = None
+            return [], []
+        previous = self._room_results
+        if previous is None:
+            room_ids = None
+        ctx = build_context(self.project, build_plan(self.project))
+
+        if room_ids is None:
+            results: dict[str, list[RoomLoadSummary]] = {}
+            for room in self.project.rooms:
+                results.setdefault(room.id, []).append(calc_room(ctx, room).summary)
+        else:
+            fresh: dict[str, list[RoomLoadSummary]] = {}
+            for room in self.project.rooms:
+                if room.id in room_ids:
+                    fresh.setdefault(room.id, []).append(calc_room(ctx, room).summary)
+            # rebuild in project order so duplicate ids and reordering stay consistent
+            results = {}
+            for room in self.project.rooms:
+                if room.id not in results:
+                    results[room.id] = fresh[room.id] if room.id in fresh else previous.get(room.id, [])
+        self._room_results = results
+
+        old = previous or {}
+        changed = [
+            summary
+            for room_id, summaries in results.items()
+            if old.get(room_id) != summaries
+            for summary in summaries
+        ]
+        removed = [room_id for room_id in old if room_id not in results]
+        return changed, removed
+
+    def _affected_rooms(self, before: Project, after: Project, touched: dict[str, set[str]]) -> set[str]:
+        rooms: set[str] = set(touched.get("rooms", ()))
+        for entity in _ROOM_SCOPED:
+            ids = touched.get(entity)
+            if not ids:
+                continue
+            for project in (before, after):
+                for item in getattr(project, project_attr(entity)):
+                    if item.id in ids:
+                        rooms.add(item.room_id)
+        construction_ids = touched.get("constructions", set())
+        glass_ids = touched.get("glasses", set())
+        if construction_ids:
+            rooms.update(s.room_id for s in after.surfaces if s.construction_id in construction_ids)
+        if glass_ids:
+            rooms.update(o.room_id for o in after.openings if o.glass_id in glass_ids)
+        return rooms
+
+    def apply(
+        self,
+        patch: list[JsonPatchOperation],
+        changes: list[EntityChange],
+        base_version: int | None = None,
+    ) -> SessionDelta:
+        """Apply a JSON Patch and/or entity delta atomically and report what changed.
+
+        Raises JsonPatchError / pydantic.ValidationError without modifying the session.
+        """
+        with self._lock:
+            if base_version is not None and base_version != self.version:
+                raise VersionConflict(f"Session is at version {self.version}, not {base_version}")
+            workspace = _Workspace(self.project)
+            workspace.apply_patch(patch)
+            workspace.apply_changes(changes)
+            before = self.project
+            after = workspace.build()
+
+            validation_changes = []
+            for entity, ids in workspace.touched.items():
+                # every item with a touched id, so duplicates stay visible to validation
+                current = [item for item in getattr(after, project_attr(entity)) if item.id in ids]
+                validation_changes.append(
+                    EntityChange(
+                        entity=entity,
+                        upsert=[item.model_dump() for item in current],
+                        delete=sorted(ids - {item.id for item in current}),
+                    )
+                )
+            added, removed = self.validation.apply(validation_changes)
+
+            self.project = after
+            self.version += 1
+            room_ids = None if workspace.header_changed else self._affected_rooms(before, after, workspace.touched)
+            changed_rooms, removed_rooms = self._recalculate(room_ids)
+            room_results = self.room_results()
+            return SessionDelta(
+                version=self.version,
+                valid=self.valid,
+                added=added,
+                removed=removed,
+                calculated=self.calculated,
+                room_results=changed_rooms,
+                removed_room_ids=removed_rooms,
+                system_results=summarize_systems(after, room_results) if self.calculated else [],
+                totals=total_loads(room_results) if self.calculated else {},
+            )
+
+
+_sessions: SessionStore[ProjectSession] = SessionStore(max_entries=64, ttl_seconds=1800.0)
+
+
+def open_project_session(project: Project) -> tuple[str, ProjectSession]:
+    session = ProjectSession(project)
+    return _sessions.put(session), session
+
+
+def get_project_session(session_id: str) -> ProjectSession | None:
+    return _sessions.get(session_id)
+
+
+def close_project_session(session_id: str) -> bool:
+    return _sessions.pop(session_id) is not None
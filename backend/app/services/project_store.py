@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from app.models.schemas import Project, ValidationIssue
+from app.services.entities import ENTITY_MODELS, project_attr
+from app.services.validation import RULES_VERSION, validate_project
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_STORE_PATH = BACKEND_DIR / "data" / "projects.sqlite3"
+
+# part name -> item model; "header" holds every Project field that is not an entity list
+_LIST_PARTS = {project_attr(entity): model for entity, model in ENTITY_MODELS.items()}
+HEADER_PART = "header"
+_PART_CACHE_MAX = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    head INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    parts TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (project_id, version)
+);
+CREATE TABLE IF NOT EXISTS validations (
+    key TEXT PRIMARY KEY,
+    issues TEXT NOT NULL
+);
+"""
+
+
+class ProjectNotFound(KeyError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredVersion:
+    project_id: str
+    version: int
+    content_hash: str
+    # part name -> blob hash; unchanged parts share blobs with earlier versions
+    parts: dict[str, str]
+    created_at: float
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _split(project: Project) -> dict[str, bytes]:
+    parts = {HEADER_PART: to_json(project.model_dump(mode="json", exclude=set(_LIST_PARTS)))}
+    for attr in _LIST_PARTS:
+        parts[attr] = to_json(getattr(project, attr))
+    return parts
+
+
+def content_hash(part_hashes: dict[str, str]) -> str:
+    return _digest("\n".join(f"{name}:{part_hashes[name]}" for name in sorted(part_hashes)).encode())
+
+
+def project_hash(project: Project) -> str:
+    """Content hash of ``project``; equals ``StoredVersion.content_hash`` for the same content."""
+    return content_hash({name: _digest(data) for name, data in _split(project).items()})
+
+
+class ProjectStore:
+    """SQLite-backed project store with versioned, structurally shared snapshots.
+
+    Each version records one content-addressed blob per entity list plus one for
+    the remaining project fields; saving a version only writes blobs for parts that
+    changed. Decoded parts are cached by blob hash, so versions that share a part
+    also share its model objects in memory.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._parts: OrderedDict[str, Any] = OrderedDict()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # blobs ------------------------------------------------------------------
+
+    def _decode_part(self, name: str, blob_hash: str) -> Any:
+        cached = self._parts.get(blob_hash)
+        if cached is not None:
+            self._parts.move_to_end(blob_hash)
+            return cached
+        row = self._conn.execute("SELECT data FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+        if row is None:
+            raise ProjectNotFound(f"Missing snapshot part {name}: {blob_hash}")
+        raw = zlib.decompress(row[0])
+        if name == HEADER_PART:
+            value = json.loads(raw)
+        else:
+            value = _LIST_ADAPTERS[name].validate_json(raw)
+        self._parts[blob_hash] = value
+        if len(self._parts) > _PART_CACHE_MAX:
+            self._parts.popitem(last=False)
+        return value
+
+    # versions ---------------------------------------------------------------
+
+    def _version_row(self, project_id: str, version: int | None) -> StoredVersion:
+        if version is None:
+            row = self._conn.execute(
+                "SELECT v.version, v.content_hash, v.parts, v.created_at FROM versions v "
+                "JOIN projects p ON p.id = v.project_id AND p.head = v.version WHERE p.id = ?",
+                (project_id,),
+            ).fetchone()
+        else:
+            row = self._conn.execute(
+                "SELECT version, content_hash, parts, created_at FROM versions WHERE project_id = ? AND version = ?",
+                (project_id, version),
+            ).fetchone()
+        if row is None:
+            suffix = "" if version is None else f" version {version}"
+            raise ProjectNotFound(f"Project not found: {project_id}{suffix}")
+        return StoredVersion(project_id, row[0], row[1], json.loads(row[2]), row[3])
+
+    def head(self, project_id: str, version: int | None = None) -> StoredVersion:
+        with self._lock:
+            return self._version_row(project_id, version)
+
+    def versions(self, project_id: str) -> list[StoredVersion]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, content_hash, parts, created_at FROM versions WHERE project_id = ? ORDER BY version",
+                (project_id,),
+            ).fetchall()
+        if not rows:
+            raise ProjectNotFound(f"Project not found: {project_id}")
+        return [StoredVersion(project_id, r[0], r[1], json.loads(r[2]), r[3]) for r in rows]
+
+    def load(self, project_id: str, version: int | None = None) -> tuple[StoredVersion, Project]:
+        with self._lock:
+            stored = self._version_row(project_id, version)
+            data = dict(self._decode_part(HEADER_PART, stored.parts[HEADER_PART]))
+            for attr in _LIST_PARTS:
+                data[attr] = self._decode_part(attr, stored.parts[attr])
+        # list items are already models, so only the header fields are validated here
+        return stored, Project.model_validate(data)
+
+    def save(self, project: Project, create: bool = False) -> tuple[StoredVersion, bool]:
+        """Store ``project`` as the new head of ``project.id``; returns (version, created).
+
+        Nothing is written when the content matches the current head.
+        """
+        encoded = _split(project)
+        part_hashes = {name: _digest(data) for name, data in encoded.items()}
+        digest = content_hash(part_hashes)
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT head FROM projects WHERE id = ?", (project.id,)).fetchone()
+            if exists is not None and create:
+                raise FileExistsError(f"Project already exists: {project.id}")
+            if exists is None and not create:
+                raise ProjectNotFound(f"Project not found: {project.id}")
+            if exists is not None:
+                head = self._version_row(project.id, None)
+                if head.content_hash == digest:
+                    return head, False
+            version = (exists[0] + 1) if exists is not None else 1
+
+            known = {
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT hash FROM blobs WHERE hash IN ({','.join('?' * len(part_hashes))})",
+                    list(part_hashes.values()),
+                )
+            }
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+                    [
+                        (part_hashes[name], zlib.compress(data, 6))
+                        for name, data in encoded.items()
+                        if part_hashes[name] not in known
+                    ],
+                )
+                if exists is None:
+                    self._conn.execute(
+                        "INSERT INTO projects (id, head, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                        (project.id, version, now, now),
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE projects SET head = ?, updated_at = ? WHERE id = ?", (version, now, project.id)
+                    )
+                self._conn.execute(
+                    "INSERT INTO versions (project_id, version, content_hash, parts, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (project.id, version, digest, json.dumps(part_hashes, sort_keys=True), now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return StoredVersion(project.id, version, digest, part_hashes, now), True
+
+    def delete(self, project_id: str) -> bool:
+        """Remove a project and its versions, then drop blobs no version references."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                deleted = self._conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount
+                if deleted:
+                    referenced = {
+                        blob_hash
+                        for (parts,) in self._conn.execute("SELECT parts FROM versions")
+                        for blob_hash in json.loads(parts).values()
+                    }
+                    stale = [
+                        (h,) for (h,) in self._conn.execute("SELECT hash FROM blobs") if h not in referenced
+                    ]
+                    self._conn.executemany("DELETE FROM blobs WHERE hash = ?", stale)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return bool(deleted)
+
+    # validation results -----------------------------------------------------
+
+    def issues(self, stored: StoredVersion, project: Project) -> list[ValidationIssue]:
+        """Validation issues for a stored version, re-validating only unseen content."""
+        key = f"{stored.content_hash}:{RULES_VERSION}"
+        with self._lock:
+            row = self._conn.execute("SELECT issues FROM validations WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return _ISSUES_ADAPTER.validate_json(row[0])
+        issues = validate_project(project)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validations (key, issues) VALUES (?, ?)",
+                (key, _ISSUES_ADAPTER.dump_json(issues)),
+            )
+        return issues
+
+
+_ISSUES_ADAPTER = TypeAdapter(list[ValidationIssue])
+_LIST_ADAPTERS = {attr: TypeAdapter(list[model]) for attr, model in _LIST_PARTS.items()}
+
+
+_store_lock = threading.Lock()
+_store: ProjectStore | None = None
+
+
+def get_project_store() -> ProjectStore:
+    """Process-wide store at PROJECT_STORE_PATH (default ``backend/data/projects.sqlite3``)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProjectStore(os.environ.get("PROJECT_STORE_PATH", str(DEFAULT_STORE_PATH)))
+        return _store
+
+
+def set_project_store(store: ProjectStore | None) -> None:
+    global _store
+    with _store_lock:
+        _store = store
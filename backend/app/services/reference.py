@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from app.domain.reference_lookup import get_reference_repository
+from functools import lru_cache
+
+from pydantic_core import to_json
+
+from app.domain.reference_lookup import ReferenceRepository, get_reference_repository
+from app.services.metrics import register_collector, render_family
 
 
 def _with_solar_position(data: dict) -> dict:
@@ -51,6 +56,35 @@ def get_reference_table(table_name: str) -> dict:
     return data
 
 
+@lru_cache(maxsize=None)
+def get_reference_table_json(table_name: str) -> bytes:
+    """Serialized ``ReferenceTableResponse``; the tables are static, so each is encoded once."""
+    data = get_reference_table(table_name)
+    return b'{"table_name":' + to_json(table_name) + b',"data":' + to_json(data) + b"}"
+
+
 def get_nearest_region(lat: float, lon: float, tag: str | None = None) -> dict:
     repo = get_reference_repository()
     return repo.lookup_nearest_region(lat, lon, tag)
+
+
+def _reference_metrics() -> list[str]:
+    # per-table loaders on the repository are lru_cache'd methods
+    tables = [
+        member.cache_info()
+        for member in vars(ReferenceRepository).values()
+        if hasattr(member, "cache_info")
+    ]
+    encoded = get_reference_table_json.cache_info()
+    samples = [
+        ({"cache": "reference_tables", "result": "hit"}, sum(info.hits for info in tables)),
+        ({"cache": "reference_tables", "result": "miss"}, sum(info.misses for info in tables)),
+        ({"cache": "reference_json", "result": "hit"}, encoded.hits),
+        ({"cache": "reference_json", "result": "miss"}, encoded.misses),
+    ]
+    return render_family(
+        "heatload_reference_cache_lookups_total", "counter", "Reference data cache lookups in the API process by outcome.", samples
+    )
+
+
+register_collector(_reference_metrics)
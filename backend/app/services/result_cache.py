@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from pydantic_core import to_json
+
+from app.domain.reference_lookup import get_reference_repository
+from app.models.schemas import CalcResult, Project
+from app.services.calculation import ENGINE_VERSION
+from app.services.excel_export import get_export_template
+from app.services.metrics import register_collector, render_family
+from app.services.project_store import project_hash
+from app.services.validation import RULES_VERSION
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# access times are refreshed at most this often, so disk hits rarely write
+_TOUCH_INTERVAL = 60.0
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+class DiskCache:
+    """SQLite-backed, size-bounded cache tier shared by every process on the host.
+
+    Each write is a single transaction, so readers never see partial entries and a
+    crash leaves the previous contents intact. Entries are evicted least recently
+    accessed first once the stored (compressed) size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_DISK_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT data, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > _TOUCH_INTERVAL:
+                self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return zlib.decompress(row[0])
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def put(self, key: str, body: bytes) -> None:
+        data = zlib.compress(body, 1)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, data, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, data, len(data), time.time()),
+                )
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    stale = []
+                    for old_key, size in self._conn.execute(
+                        "SELECT key, size FROM entries WHERE key != ? ORDER BY accessed", (key,)
+                    ):
+                        stale.append((old_key,))
+                        total -= size
+                        if total <= self.max_bytes:
+                            break
+                    self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: bytes | None = None
+        self.error: BaseException | None = None
+
+
+class ResultCache:
+    """Content-addressed LRU of encoded results, bounded by their total size in bytes.
+
+    With a ``disk`` tier, misses fall through to it (and hits are promoted back into
+    memory), and every put is written through, so results survive restarts.
+    ``get_or_compute`` coalesces concurrent misses for the same key.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk: DiskCache | None = None):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # callers that waited on another request's computation instead of running their own
+        self.coalesced = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+        body = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if body is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, body)
+        return body
+
+    def __contains__(self, key: str) -> bool:
+        """Whether ``key`` is cached in either tier; unlike ``get`` it does not count as a lookup."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.disk is not None and key in self.disk
+
+    def put(self, key: str, body: bytes) -> None:
+        self._remember(key, body)
+        if self.disk is not None:
+            self.disk.put(key, body)
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+        """Cached body for ``key``, computing it at most once across concurrent callers.
+
+        While one caller runs ``compute``, others asking for the same key wait for it
+        and share its result, or re-raise its exception.
+        """
+        body = self.get(key)
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                return body
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = compute()
+            self.put(key, flight.result)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _remember(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def calc_cache_key(project: Project, content_hash: str | None = None) -> str:
+    """Key of the calculation result for ``project``.
+
+    ``content_hash`` may be passed when already known (e.g. a stored version) to
+    skip hashing the project again. The key also covers the reference data, the
+    calculation engine and the validation rules, since a cache hit skips both.
+    """
+    digest = content_hash or project_hash(project)
+    reference_version = get_reference_repository().data_version()
+    return f"calc:{digest}:{reference_version}:{ENGINE_VERSION}:{RULES_VERSION}"
+
+
+def excel_cache_key(
+    project: Project,
+    calc_result: CalcResult | None,
+    layout: str,
+    engine: str,
+    content_hash: str | None = None,
+) -> str:
+    """Key of a rendered workbook; also covers the template and its write plan."""
+    digest = content_hash or project_hash(project)
+    calc_digest = hashlib.sha256(to_json(calc_result)).hexdigest() if calc_result is not None else "-"
+    reference_version = get_reference_repository().data_version()
+    template_version = get_export_template().version
+    return (
+        f"excel:{digest}:{calc_digest}:{layout}:{engine}:{template_version}:{reference_version}:{ENGINE_VERSION}"
+    )
+
+
+def etag_for(key: str) -> str:
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str, exists: Callable[[], bool] | None = None) -> bool:
+    """True when an If-None-Match header matches ``etag`` (weak comparison).
+
+    ``*`` matches only when ``exists()`` confirms a current representation, i.e.
+    the result is already cached; without ``exists`` it never matches.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.removeprefix("W/") == etag:
+            return True
+        if tag == "*" and exists is not None and exists():
+            return True
+    return False
+
+
+_cache_lock = threading.Lock()
+_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache bounded by RESULT_CACHE_MAX_BYTES (default 256 MiB).
+
+    Setting RESULT_CACHE_PATH adds the on-disk tier at that SQLite file, bounded by
+    RESULT_CACHE_DISK_MAX_BYTES (default 2 GiB).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            disk_path = os.environ.get("RESULT_CACHE_PATH")
+            disk = (
+                DiskCache(disk_path, int(os.environ.get("RESULT_CACHE_DISK_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)))
+                if disk_path
+                else None
+            )
+            _cache = ResultCache(int(os.environ.get("RESULT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)), disk)
+        return _cache
+
+
+def set_result_cache(cache: ResultCache | None) -> None:
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def _cache_metrics() -> list[str]:
+    cache = _cache
+    if cache is None:
+        return []
+    lookups = [
+        ({"cache": "result", "result": "hit"}, cache.hits),
+        ({"cache": "result", "result": "disk_hit"}, cache.disk_hits),
+        ({"cache": "result", "result": "miss"}, cache.misses),
+    ]
+    return (
+        render_family("heatload_cache_lookups_total", "counter", "Cache lookups by outcome.", lookups)
+        + render_family(
+            "heatload_cache_coalesced_total",
+            "counter",
+            "Requests that shared another request's in-flight computation.",
+            [({"cache": "result"}, cache.coalesced)],
+        )
+        + render_family(
+            "heatload_cache_bytes", "gauge", "Bytes held in memory by the cache.", [({"cache": "result"}, cache.size)]
+        )
+    )
+
+
+register_collector(_cache_metrics)
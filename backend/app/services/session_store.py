@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SessionStore(Generic[T]):
+    """In-process LRU store with idle TTL for server-side session state.
+
+    ``max_weight`` optionally bounds the summed weight of the entries (e.g. cached
+    cell count); least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 1800.0, max_weight: int | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight
+        self._entries: OrderedDict[str, tuple[float, int, T]] = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str) -> tuple[float, int, T] | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[1]
+        return entry
+
+    def _evict_expired(self, now: float) -> None:
+        while self._entries:
+            key, (touched, _, _) = next(iter(self._entries.items()))
+            if now - touched <= self.ttl_seconds:
+                break
+            self._remove(key)
+
+    def accepts(self, weight: int) -> bool:
+        return self.max_weight is None or weight <= self.max_weight
+
+    def put(self, value: T, weight: int = 1) -> str | None:
+        """Store ``value`` and return its key, or None when it alone exceeds ``max_weight``."""
+        if not self.accepts(weight):
+            return None
+        key = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            self._entries[key] = (now, weight, value)
+            self._weight += weight
+            while len(self._entries) > self.max_entries or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                self._remove(next(iter(self._entries)))
+        return key
+
+    def get(self, key: str) -> T | None:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._entries[key] = (now, entry[1], entry[2])
+            return entry[2]
+
+    def pop(self, key: str) -> T | None:
+        taken = self.take(key)
+        return taken[0] if taken is not None else None
+
+    def take(self, key: str) -> tuple[T, int] | None:
+        """Remove ``key`` and return its value with its weight, e.g. to ``put`` it elsewhere."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._remove(key)
+        return (entry[2], entry[1]) if entry is not None else None
+
+    @property
+    def weight(self) -> int:
+        return self._weight
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
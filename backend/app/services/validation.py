@@ -1,148 +1,160 @@
 from __future__ import annotations
 
-from collections import Counter
+import threading
+from collections import defaultdict
 
-from app.models.schemas import Project, ValidationIssue, ValidationLevel
+from pydantic import BaseModel
 
+from app.models.schemas import EntityChange, Project, ValidationIssue, ValidationLevel
+from app.services.entities import ENTITY_MODELS, project_entities
+from app.services.plan import CalcPlan
+from app.services.session_store import SessionStore
 
-def _duplicate_issues(entity_name: str, items: list, key: str = "id") -> list[ValidationIssue]:
-    values = [getattr(item, key) for item in items if getattr(item, key)]
-    counts = Counter(values)
-    duplicates = [v for v, c in counts.items() if c > 1]
-    issues: list[ValidationIssue] = []
-    for dup in duplicates:
-        issues.append(
-            ValidationIssue(
-                level=ValidationLevel.ERROR,
-                code="duplicate_id",
-                message=f"{entity_name} に重複IDがあります: {dup}",
-                entity=entity_name,
-                field=key,
-            )
-        )
-    return issues
+# bump when rules change so persisted validation results are not reused
+RULES_VERSION = 1
 
+_DUPLICATE_ORDER = (
+    "rooms",
+    "surfaces",
+    "openings",
+    "constructions",
+    "glasses",
+    "internal_loads",
+    "mechanical_loads",
+    "ventilation",
+    "systems",
+)
 
-def validate_project(project: Project) -> list[ValidationIssue]:
-    issues: list[ValidationIssue] = []
 
-    issues.extend(_duplicate_issues("rooms", project.rooms))
-    issues.extend(_duplicate_issues("surfaces", project.surfaces))
-    issues.extend(_duplicate_issues("openings", project.openings))
-    issues.extend(_duplicate_issues("constructions", project.constructions))
-    issues.extend(_duplicate_issues("glasses", project.glasses))
-    issues.extend(_duplicate_issues("internal_loads", project.internal_loads))
-    issues.extend(_duplicate_issues("mechanical_loads", project.mechanical_loads))
-    issues.extend(_duplicate_issues("ventilation", project.ventilation_infiltration))
-    issues.extend(_duplicate_issues("systems", project.systems))
-
-    room_ids = {room.id for room in project.rooms}
-    construction_ids = {x.id for x in project.constructions}
-    glass_ids = {x.id for x in project.glasses}
-    surface_ids = {x.id for x in project.surfaces}
-    system_ids = {x.id for x in project.systems}
+def _duplicate_issue(entity_name: str, dup: str, key: str = "id") -> ValidationIssue:
+    return ValidationIssue(
+        level=ValidationLevel.ERROR,
+        code="duplicate_id",
+        message=f"{entity_name} に重複IDがあります: {dup}",
+        entity=entity_name,
+        field=key,
+    )
+
+
+def _reference_issue(entity_name: str, field: str, message: str) -> ValidationIssue:
+    return ValidationIssue(
+        level=ValidationLevel.ERROR,
+        code="reference_not_found",
+        message=message,
+        entity=entity_name,
+        field=field,
+    )
+
+
+class _IdIndex:
+    """id -> item map (last wins) that remembers duplicated non-empty ids."""
+
+    __slots__ = ("items", "dups")
+
+    def __init__(self) -> None:
+        self.items: dict = {}
+        self.dups: set[str] = set()
+
+    def add(self, item) -> None:
+        item_id = item.id
+        if item_id and item_id in self.items:
+            self.dups.add(item_id)
+        self.items[item_id] = item
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self.items
+
+    def duplicate_issues(self, entity_name: str) -> list[ValidationIssue]:
+        if not self.dups:
+            return []
+        return [_duplicate_issue(entity_name, v) for v in self.items if v in self.dups]
+
+
+def _index_all(items: list) -> _IdIndex:
+    index = _IdIndex()
+    for item in items:
+        index.add(item)
+    return index
+
 
+def _scan(project: Project, plan: CalcPlan | None) -> list[ValidationIssue]:
+    """Single pass over every entity list producing issues and, optionally, the calc plan."""
+    indexes: dict[str, _IdIndex] = {
+        "systems": _index_all(project.systems),
+        "constructions": _index_all(project.constructions),
+        "glasses": _index_all(project.glasses),
+    }
+    systems = indexes["systems"]
+    constructions = indexes["constructions"]
+    glasses = indexes["glasses"]
+    if plan is not None:
+        plan.condition_map = {c.id: c for c in project.design_conditions}
+        plan.constructions = constructions.items
+        plan.glasses = glasses.items
+
+    issues: list[ValidationIssue] = []
+
+    rooms = indexes["rooms"] = _IdIndex()
     for room in project.rooms:
-        if room.system_id and room.system_id not in system_ids:
+        rooms.add(room)
+        if room.system_id and room.system_id not in systems:
             issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"room.system_id が systems に存在しません: {room.system_id}",
-                    entity="rooms",
-                    field="system_id",
-                )
+                _reference_issue("rooms", "system_id", f"room.system_id が systems に存在しません: {room.system_id}")
             )
 
+    surfaces = indexes["surfaces"] = _IdIndex()
     for surface in project.surfaces:
-        if surface.room_id not in room_ids:
+        surfaces.add(surface)
+        if plan is not None:
+            plan.room_surfaces[surface.room_id].append(surface)
+        if surface.room_id not in rooms:
             issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"surface.room_id が rooms に存在しません: {surface.room_id}",
-                    entity="surfaces",
-                    field="room_id",
-                )
+                _reference_issue("surfaces", "room_id", f"surface.room_id が rooms に存在しません: {surface.room_id}")
             )
-        if surface.construction_id and surface.construction_id not in construction_ids:
+        if surface.construction_id and surface.construction_id not in constructions:
             issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"surface.construction_id が constructions に存在しません: {surface.construction_id}",
-                    entity="surfaces",
-                    field="construction_id",
+                _reference_issue(
+                    "surfaces",
+                    "construction_id",
+                    f"surface.construction_id が constructions に存在しません: {surface.construction_id}",
                 )
             )
 
+    openings = indexes["openings"] = _IdIndex()
     for opening in project.openings:
-        if opening.room_id not in room_ids:
+        openings.add(opening)
+        if plan is not None:
+            plan.room_openings[opening.room_id].append(opening)
+        if opening.room_id not in rooms:
             issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"opening.room_id が rooms に存在しません: {opening.room_id}",
-                    entity="openings",
-                    field="room_id",
-                )
+                _reference_issue("openings", "room_id", f"opening.room_id が rooms に存在しません: {opening.room_id}")
             )
-        if opening.surface_id and opening.surface_id not in surface_ids:
+        if opening.surface_id and opening.surface_id not in surfaces:
             issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"opening.surface_id が surfaces に存在しません: {opening.surface_id}",
-                    entity="openings",
-                    field="surface_id",
+                _reference_issue(
+                    "openings", "surface_id", f"opening.surface_id が surfaces に存在しません: {opening.surface_id}"
                 )
             )
-        if opening.glass_id and opening.glass_id not in glass_ids:
+        if opening.glass_id and opening.glass_id not in glasses:
             issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"opening.glass_id が glasses に存在しません: {opening.glass_id}",
-                    entity="openings",
-                    field="glass_id",
-                )
+                _reference_issue("openings", "glass_id", f"opening.glass_id が glasses に存在しません: {opening.glass_id}")
             )
 
-    for load in project.internal_loads:
-        if load.room_id not in room_ids:
-            issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"internal_load.room_id が rooms に存在しません: {load.room_id}",
-                    entity="internal_loads",
-                    field="room_id",
+    room_children = (
+        ("internal_loads", "internal_load", project.internal_loads, plan.room_internal_loads if plan else None),
+        ("mechanical_loads", "mechanical_load", project.mechanical_loads, plan.room_mechanical_loads if plan else None),
+        ("ventilation", "ventilation", project.ventilation_infiltration, plan.room_ventilation if plan else None),
+    )
+    for entity_name, label, items, groups in room_children:
+        index = indexes[entity_name] = _IdIndex()
+        for item in items:
+            index.add(item)
+            if groups is not None:
+                groups[item.room_id].append(item)
+            if item.room_id not in rooms:
+                issues.append(
+                    _reference_issue(entity_name, "room_id", f"{label}.room_id が rooms に存在しません: {item.room_id}")
                 )
-            )
-
-    for load in project.mechanical_loads:
-        if load.room_id not in room_ids:
-            issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"mechanical_load.room_id が rooms に存在しません: {load.room_id}",
-                    entity="mechanical_loads",
-                    field="room_id",
-                )
-            )
-
-    for vent in project.ventilation_infiltration:
-        if vent.room_id not in room_ids:
-            issues.append(
-                ValidationIssue(
-                    level=ValidationLevel.ERROR,
-                    code="reference_not_found",
-                    message=f"ventilation.room_id が rooms に存在しません: {vent.room_id}",
-                    entity="ventilation",
-                    field="room_id",
-                )
-            )
 
     if not project.rooms:
         issues.append(
@@ -154,4 +166,219 @@ def validate_project(project: Project) -> list[ValidationIssue]:
             )
         )
 
-    return issues
+    ordered: list[ValidationIssue] = []
+    for entity_name in _DUPLICATE_ORDER:
+        ordered.extend(indexes[entity_name].duplicate_issues(entity_name))
+    ordered.extend(issues)
+    return ordered
+
+
+def validate_project(project: Project) -> list[ValidationIssue]:
+    return _scan(project, None)
+
+
+def validate_and_plan(project: Project) -> tuple[list[ValidationIssue], CalcPlan]:
+    """Validate and build the calculation plan in one traversal of the project."""
+    plan = CalcPlan()
+    issues = _scan(project, plan)
+    return issues, plan
+
+
+# entity -> (field, target entity, required)
+_REFERENCE_RULES: dict[str, tuple[tuple[str, str, bool], ...]] = {
+    "rooms": (("system_id", "systems", False),),
+    "surfaces": (("room_id", "rooms", True), ("construction_id", "constructions", False)),
+    "openings": (("room_id", "rooms", True), ("surface_id", "surfaces", False), ("glass_id", "glasses", False)),
+    "internal_loads": (("room_id", "rooms", True),),
+    "mechanical_loads": (("room_id", "rooms", True),),
+    "ventilation": (("room_id", "rooms", True),),
+}
+
+_LABELS = {
+    "rooms": "room",
+    "surfaces": "surface",
+    "openings": "opening",
+    "internal_loads": "internal_load",
+    "mechanical_loads": "mechanical_load",
+    "ventilation": "ventilation",
+}
+
+# (code, entity, entity id, field, occurrence of the id)
+IssueKey = tuple[str, str, str, str, int]
+_EMPTY_PROJECT_KEY: IssueKey = ("empty_project", "project", "", "", 0)
+
+
+class ValidationSession:
+    """Keeps id indexes and reverse references so edits re-check only what they touch.
+
+    Every item is tracked, grouped by id in project order, so duplicated and empty ids
+    are checked like ``validate_project`` does. Upserting an id replaces all items
+    that had it with the upserted ones; deleting an id removes them all.
+    """
+
+    def __init__(self, project: Project):
+        self._lock = threading.Lock()
+        self._items: dict[str, dict[str, list[BaseModel]]] = {entity: {} for entity in ENTITY_MODELS}
+        # (target entity, target id) -> {(entity, id, field)}
+        self._referrers: dict[tuple[str, str], set[tuple[str, str, str]]] = defaultdict(set)
+        self._issues: dict[IssueKey, ValidationIssue] = {}
+
+        for entity in ENTITY_MODELS:
+            items = self._items[entity]
+            for item in project_entities(project, entity):
+                items.setdefault(item.id, []).append(item)
+
+        touched: dict[IssueKey, ValidationIssue | None] = {}
+        for entity, items in self._items.items():
+            for item_id, group in items.items():
+                for item in group:
+                    self._link(entity, item)
+                self._check_item(entity, item_id, touched)
+                self._check_duplicate(entity, item_id, touched)
+        self._check_empty_project(touched)
+
+    @property
+    def issues(self) -> list[ValidationIssue]:
+        return list(self._issues.values())
+
+    def _link(self, entity: str, item: BaseModel) -> None:
+        for field, target, required in _REFERENCE_RULES.get(entity, ()):
+            value = getattr(item, field)
+            if value or required:
+                self._referrers[(target, value)].add((entity, item.id, field))
+
+    def _unlink(self, entity: str, item: BaseModel) -> None:
+        for field, target, required in _REFERENCE_RULES.get(entity, ()):
+            value = getattr(item, field)
+            if not (value or required):
+                continue
+            refs = self._referrers.get((target, value))
+            if refs is not None:
+                refs.discard((entity, item.id, field))
+                if not refs:
+                    del self._referrers[(target, value)]
+
+    def _set_issue(
+        self,
+        key: IssueKey,
+        issue: ValidationIssue | None,
+        touched: dict[IssueKey, ValidationIssue | None],
+    ) -> None:
+        if key not in touched:
+            touched[key] = self._issues.get(key)
+        if issue is None:
+            self._issues.pop(key, None)
+        else:
+            self._issues[key] = issue
+
+    def _check_item(
+        self,
+        entity: str,
+        item_id: str,
+        touched: dict[IssueKey, ValidationIssue | None],
+        previous: int = 0,
+    ) -> None:
+        """Re-check references of every item with ``item_id``; ``previous`` is how many there were before."""
+        group = self._items[entity].get(item_id, [])
+        for field, target, required in _REFERENCE_RULES.get(entity, ()):
+            for n in range(max(len(group), previous)):
+                issue = None
+                if n < len(group):
+                    value = getattr(group[n], field)
+                    if (value or required) and value not in self._items[target]:
+                        issue = _reference_issue(
+                            entity, field, f"{_LABELS[entity]}.{field} が {target} に存在しません: {value}"
+                        )
+                self._set_issue(("reference_not_found", entity, item_id, field, n), issue, touched)
+
+    def _check_duplicate(self, entity: str, item_id: str, touched: dict[IssueKey, ValidationIssue | None]) -> None:
+        duplicated = bool(item_id) and len(self._items[entity].get(item_id, ())) > 1
+        issue = _duplicate_issue(entity, item_id) if duplicated else None
+        self._set_issue(("duplicate_id", entity, item_id, "id", 0), issue, touched)
+
+    def _check_empty_project(self, touched: dict[IssueKey, ValidationIssue | None]) -> None:
+        issue = None
+        if not self._items["rooms"]:
+            issue = ValidationIssue(
+                level=ValidationLevel.WARN,
+                code="empty_project",
+                message="rooms が0件です。",
+                entity="project",
+            )
+        self._set_issue(_EMPTY_PROJECT_KEY, issue, touched)
+
+    def apply(self, changes: list[EntityChange]) -> tuple[list[ValidationIssue], list[ValidationIssue]]:
+        """Apply entity upserts/deletes and return (added, removed) issues."""
+        with self._lock:
+            touched: dict[IssueKey, ValidationIssue | None] = {}
+            # (entity, id) -> how many items had the id before this change
+            recheck: dict[tuple[str, str], int] = {}
+            # (entity, id) -> whether any item had the id before this change
+            existed: dict[tuple[str, str], bool] = {}
+
+            # Parse every payload first so an invalid one leaves the session untouched.
+            parsed = [
+                (change.entity, change.delete, [ENTITY_MODELS[change.entity].model_validate(raw) for raw in change.upsert])
+                for change in changes
+            ]
+            for entity, delete_ids, upserts in parsed:
+                items = self._items[entity]
+                replaced: dict[str, list[BaseModel]] = {}
+                for item in upserts:
+                    replaced.setdefault(item.id, []).append(item)
+                for item_id in [*delete_ids, *replaced]:
+                    old = items.pop(item_id, None)
+                    existed.setdefault((entity, item_id), old is not None)
+                    if old is None:
+                        continue
+                    for item in old:
+                        self._unlink(entity, item)
+                    recheck[(entity, item_id)] = max(recheck.get((entity, item_id), 0), len(old))
+                for item_id, group in replaced.items():
+                    items[item_id] = group
+                    for item in group:
+                        self._link(entity, item)
+                    recheck.setdefault((entity, item_id), 0)
+
+            presence_changed = [
+                (entity, item_id)
+                for (entity, item_id), was_present in existed.items()
+                if was_present != (item_id in self._items[entity])
+            ]
+            for target in presence_changed:
+                for ref_entity, ref_id, _ in self._referrers.get(target, ()):
+                    recheck.setdefault((ref_entity, ref_id), 0)
+
+            for (entity, item_id), previous in recheck.items():
+                self._check_item(entity, item_id, touched, previous)
+                self._check_duplicate(entity, item_id, touched)
+            if any(entity == "rooms" for entity, _ in presence_changed):
+                self._check_empty_project(touched)
+
+            added: list[ValidationIssue] = []
+            removed: list[ValidationIssue] = []
+            for key, before in touched.items():
+                after = self._issues.get(key)
+                if before == after:
+                    continue
+                if before is not None:
+                    removed.append(before)
+                if after is not None:
+                    added.append(after)
+            return added, removed
+
+
+_sessions: SessionStore[ValidationSession] = SessionStore(max_entries=128, ttl_seconds=1800.0)
+
+
+def open_validation_session(project: Project) -> tuple[str, ValidationSession]:
+    session = ValidationSession(project)
+    return _sessions.put(session), session
+
+
+def get_validation_session(session_id: str) -> ValidationSession | None:
+    return _sessions.get(session_id)
+
+
+def close_validation_session(session_id: str) -> bool:
+    return _sessions.pop(session_id) is not None
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import io
+import math
+import posixpath
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterable
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+# Cell-level xlsx patching: the template package is indexed once, then every export
+# only renders the mapped <c> elements and re-zips; nothing else is parsed.
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_WORKBOOK_PART = "xl/workbook.xml"
+_WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+_CONTENT_TYPES_PART = "[Content_Types].xml"
+
+_SHEET_DATA_RE = re.compile(rb"<sheetData\b[^>]*?(?:/>|>(.*?)</sheetData>)", re.S)
+_EMPTY_ROW_RE = re.compile(rb"<row\b([^>]*?)/>")
+_ROW_RE = re.compile(rb"<row\b[^>]*?>(.*?)</row>", re.S)
+_CELL_RE = re.compile(rb"<c\b([^>]*?)(?:/>|>.*?</c>)", re.S)
+_REF_ATTR_RE = re.compile(rb'(?:^|\s)r="([A-Z]*)(\d+)"')
+_STYLE_ATTR_RE = re.compile(rb'\ss="\d+"')
+_CALC_PR_RE = re.compile(rb"<calcPr\b([^>]*?)(/?)>")
+_FULL_CALC_ATTR_RE = re.compile(rb'\sfullCalcOnLoad="[^"]*"')
+
+
+@dataclass(frozen=True)
+class _CellSlot:
+    ref: str
+    style: bytes  # b' s="N"' copied from the template cell, or b""
+    original: bytes  # template XML of the cell, b"" when the template has none
+
+
+@dataclass(frozen=True)
+class _RowPiece:
+    # open/close are empty when the cells go into an existing <row>
+    open: bytes
+    close: bytes
+    cells: tuple[_CellSlot, ...]
+
+
+@dataclass(frozen=True)
+class SheetPatch:
+    """Sheet XML split around the target cells: ``chunks`` interleave ``slots``."""
+
+    chunks: tuple[bytes, ...]
+    slots: tuple[tuple[_RowPiece, ...], ...]
+
+    def render(self, values: dict[str, Any]) -> bytes:
+        out = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            for piece in slot:
+                cells = b"".join(_render_cell(cell, values.get(cell.ref)) for cell in piece.cells)
+                if piece.open and not cells:
+                    continue
+                out.append(piece.open + cells + piece.close)
+            out.append(chunk)
+        return b"".join(out)
+
+
+@dataclass(frozen=True)
+class XlsxTemplate:
+    # every package part as written on export, already stripped of calcChain
+    parts: tuple[tuple[zipfile.ZipInfo, bytes], ...]
+    # worksheet index (workbook order) -> part name
+    sheet_parts: tuple[str, ...]
+    patches: dict[str, SheetPatch]
+
+
+def _render_cell(cell: _CellSlot, value: Any) -> bytes:
+    if value is None:
+        return cell.original
+    head = b'<c r="' + cell.ref.encode() + b'"' + cell.style
+    if isinstance(value, bool):
+        return head + b' t="b"><v>' + (b"1" if value else b"0") + b"</v></c>"
+    if isinstance(value, float) and not math.isfinite(value):
+        # openpyxl writes nan/inf as an empty numeric cell; "nan" is not a valid <v>
+        return head + b' t="n"><v></v></c>'
+    if isinstance(value, (int, float)):
+        return head + b"><v>" + repr(value).encode() + b"</v></c>"
+    if isinstance(value, str):
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise IllegalCharacterError(f"{value} cannot be used in worksheets.")
+        if len(value) > 1 and value.startswith("="):
+            return head + b"><f>" + escape(value[1:]).encode() + b"</f><v></v></c>"
+        return head + b' t="inlineStr"><is><t xml:space="preserve">' + escape(value).encode() + b"</t></is></c>"
+    raise ValueError(f"Cannot convert {value!r} to Excel")
+
+
+def _split_ref(ref: str) -> tuple[int, int]:
+    col, row = coordinate_from_string(ref)
+    return row, column_index_from_string(col)
+
+
+def _ref_of(attrs: bytes) -> tuple[int, int]:
+    match = _REF_ATTR_RE.search(attrs)
+    if match is None:
+        raise ValueError("Template rows and cells must carry an r attribute")
+    col = column_index_from_string(match.group(1).decode()) if match.group(1) else 0
+    return int(match.group(2)), col
+
+
+def index_sheet(xml: bytes, refs: Iterable[str]) -> SheetPatch:
+    """Locate (or choose insertion points for) ``refs`` in one worksheet XML part."""
+    xml = _EMPTY_ROW_RE.sub(rb"<row\1></row>", xml)
+    data = _SHEET_DATA_RE.search(xml)
+    if data is None:
+        raise ValueError("Worksheet has no sheetData element")
+    if data.group(1) is None:
+        xml = xml[: data.start()] + b"<sheetData></sheetData>" + xml[data.end() :]
+        data = _SHEET_DATA_RE.search(xml)
+    data_start, data_end = data.start(1), data.end(1)
+
+    targets: dict[int, list[tuple[int, str]]] = {}
+    for ref in sorted(set(refs), key=_split_ref):
+        row, col = _split_ref(ref)
+        targets.setdefault(row, []).append((col, ref))
+
+    # (start, end) -> pieces; insertions share start == end
+    edits: dict[tuple[int, int], list[_RowPiece]] = {}
+    rows_seen: set[int] = set()
+    row_starts: list[tuple[int, int]] = []
+    for row_match in _ROW_RE.finditer(xml, data_start, data_end):
+        row_no, _ = _ref_of(xml[row_match.start() : row_match.start(1)])
+        row_starts.append((row_no, row_match.start()))
+        if row_no not in targets:
+            continue
+        rows_seen.add(row_no)
+        existing = [
+            (_ref_of(cell.group(1))[1], cell)
+            for cell in _CELL_RE.finditer(xml, row_match.start(1), row_match.end(1))
+        ]
+        for col, ref in targets[row_no]:
+            hit = next((cell for c, cell in existing if c == col), None)
+            if hit is not None:
+                style = _STYLE_ATTR_RE.search(hit.group(1))
+                slot = _CellSlot(ref, style.group(0) if style else b"", hit.group(0))
+                edits[(hit.start(), hit.end())] = [_RowPiece(b"", b"", (slot,))]
+                continue
+            pos = next((cell.start() for c, cell in existing if c > col), row_match.end(1))
+            pieces = edits.setdefault((pos, pos), [_RowPiece(b"", b"", ())])
+            pieces[0] = _RowPiece(b"", b"", pieces[0].cells + (_CellSlot(ref, b"", b""),))
+
+    for row_no in sorted(targets.keys() - rows_seen):
+        pos = next((start for r, start in row_starts if r > row_no), data_end)
+        cells = tuple(_CellSlot(ref, b"", b"") for _, ref in targets[row_no])
+        edits.setdefault((pos, pos), []).append(_RowPiece(b'<row r="%d">' % row_no, b"</row>", cells))
+
+    chunks: list[bytes] = []
+    slots: list[tuple[_RowPiece, ...]] = []
+    cursor = 0
+    for start, end in sorted(edits):
+        chunks.append(xml[cursor:start])
+        slots.append(tuple(edits[(start, end)]))
+        cursor = end
+    chunks.append(xml[cursor:])
+    return SheetPatch(chunks=tuple(chunks), slots=tuple(slots))
+
+
+def _sheet_parts(workbook_xml: bytes, rels_xml: bytes) -> tuple[str, ...]:
+    targets = {
+        rel.get("Id"): rel.get("Target")
+        for rel in ElementTree.fromstring(rels_xml).iter(f"{{{_NS_PKG_REL}}}Relationship")
+    }
+    parts = []
+    for sheet in ElementTree.fromstring(workbook_xml).iter(f"{{{_NS_MAIN}}}sheet"):
+        target = targets[sheet.get(f"{{{_NS_DOC_REL}}}id")]
+        if target.startswith("/"):
+            parts.append(target.lstrip("/"))
+        else:
+            parts.append(posixpath.normpath(posixpath.join("xl", target)))
+    return tuple(parts)
+
+
+def _set_full_calc_on_load(workbook_xml: bytes) -> bytes:
+    match = _CALC_PR_RE.search(workbook_xml)
+    if match is not None:
+        attrs = _FULL_CALC_ATTR_RE.sub(b"", match.group(1))
+        tag = b"<calcPr" + attrs + b' fullCalcOnLoad="1"' + match.group(2) + b">"
+        return workbook_xml[: match.start()] + tag + workbook_xml[match.end() :]
+    for anchor in (b"</definedNames>", b"</sheets>"):
+        pos = workbook_xml.find(anchor)
+        if pos >= 0:
+            pos += len(anchor)
+            return workbook_xml[:pos] + b'<calcPr fullCalcOnLoad="1"/>' + workbook_xml[pos:]
+    raise ValueError("Workbook part has no sheets element")
+
+
+def _drop_calc_chain(parts: dict[str, bytes]) -> None:
+    # cells change type on export; Excel rebuilds the chain on the full recalculation
+    rels = parts[_WORKBOOK_RELS_PART]
+    rels = re.sub(rb"<Relationship\b[^>]*?/calcChain\"[^>]*?/>", b"", rels)
+    parts[_WORKBOOK_RELS_PART] = rels
+    parts[_CONTENT_TYPES_PART] = re.sub(
+        rb'<Override\b[^>]*?PartName="/xl/calcChain.xml"[^>]*?/>', b"", parts[_CONTENT_TYPES_PART]
+    )
+    parts.pop("xl/calcChain.xml", None)
+
+
+def build_template(template_bytes: bytes, targets: dict[int, Iterable[str]]) -> XlsxTemplate:
+    """Index ``template_bytes`` for writes to ``targets`` (worksheet index -> cell refs)."""
+    with zipfile.ZipFile(io.BytesIO(template_bytes)) as zf:
+        infos = zf.infolist()
+        parts = {info.filename: zf.read(info) for info in infos}
+
+    sheet_parts = _sheet_parts(parts[_WORKBOOK_PART], parts[_WORKBOOK_RELS_PART])
+    parts[_WORKBOOK_PART] = _set_full_calc_on_load(parts[_WORKBOOK_PART])
+    _drop_calc_chain(parts)
+    patches = {sheet_parts[idx]: index_sheet(parts[sheet_parts[idx]], refs) for idx, refs in targets.items()}
+    return XlsxTemplate(
+        parts=tuple((info, parts[info.filename]) for info in infos if info.filename in parts),
+        sheet_parts=sheet_parts,
+        patches=patches,
+    )
+
+
+def write_workbook(template: XlsxTemplate, values: dict[int, dict[str, Any]], fileobj: BinaryIO) -> None:
+    """Write the patched package to ``fileobj``; it may be a non-seekable stream."""
+    by_part = {template.sheet_parts[idx]: cells for idx, cells in values.items()}
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+        for info, data in template.parts:
+            patch = template.patches.get(info.filename)
+            if patch is not None:
+                data = patch.render(by_part.get(info.filename, {}))
+            out = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            out.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(out, data)
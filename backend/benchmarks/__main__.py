@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from benchmarks.suite import (
+    BENCHMARKS,
+    DEFAULT_MIN_DELTA_S,
+    DEFAULT_SIZES,
+    DEFAULT_THRESHOLD,
+    Measurement,
+    ProjectShape,
+    SuiteResult,
+    find_regressions,
+    run_suite,
+)
+from benchmarks.synthetic import REGIONS
+
+
+def _print_measurement(m: Measurement) -> None:
+    rooms = "-" if m.rooms is None else f"{m.rooms:,}"
+    print(f"{m.benchmark:<20} rooms={rooms:>8}  best={m.best_s * 1000:10.1f} ms  median={m.median_s * 1000:10.1f} ms")
+
+
+def _run(args: argparse.Namespace) -> int:
+    shape = ProjectShape(
+        surfaces_per_room=args.surfaces_per_room,
+        openings_per_room=args.openings_per_room,
+        region=args.region,
+        design_conditions=args.design_conditions,
+        seed=args.seed,
+    )
+    result = run_suite(args.sizes, args.benchmarks, args.repeat, shape, _print_measurement)
+    if args.output:
+        result.save(args.output)
+        print(f"saved {args.output}")
+    return 0
+
+
+def _report(baseline: SuiteResult, current: SuiteResult, args: argparse.Namespace) -> int:
+    regressions = find_regressions(baseline, current, args.threshold, args.min_delta)
+    for r in regressions:
+        rooms = "-" if r.rooms is None else f"{r.rooms:,}"
+        print(
+            f"REGRESSION {r.benchmark} rooms={rooms}: "
+            f"{r.baseline_s * 1000:.1f} ms -> {r.current_s * 1000:.1f} ms ({r.ratio:.2f}x)"
+        )
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+def _check(args: argparse.Namespace) -> int:
+    baseline = SuiteResult.load(args.baseline)
+    benchmarks = args.benchmarks or sorted({m.benchmark for m in baseline.measurements})
+    current = run_suite(baseline.sizes, benchmarks, baseline.repeat, baseline.shape, _print_measurement)
+    if args.output:
+        current.save(args.output)
+    return _report(baseline, current, args)
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = SuiteResult.load(args.baseline)
+    current = SuiteResult.load(args.current)
+    if current.shape != baseline.shape:
+        print(f"warning: project shapes differ ({baseline.shape} vs {current.shape})", file=sys.stderr)
+    for m in current.measurements:
+        _print_measurement(m)
+    return _report(baseline, current, args)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Scaling benchmarks on synthetic projects.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the suite and optionally save the results as a baseline.")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Room counts.")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--surfaces-per-room", type=int, default=ProjectShape.surfaces_per_room)
+    run.add_argument("--openings-per-room", type=int, default=ProjectShape.openings_per_room)
+    run.add_argument("--region", choices=REGIONS, default=ProjectShape.region)
+    run.add_argument("--design-conditions", type=int, default=ProjectShape.design_conditions)
+    run.add_argument("--seed", type=int, default=ProjectShape.seed)
+    run.add_argument("--output", help="Write the results to this JSON file.")
+    run.set_defaults(handler=_run)
+
+    check = sub.add_parser("check", help="Re-run a baseline's suite and fail on slowdowns.")
+    check.add_argument("baseline", help="Baseline JSON written by `run --output`.")
+    check.add_argument("--output", help="Also write the new results to this JSON file.")
+    check.set_defaults(handler=_check)
+
+    compare = sub.add_parser("compare", help="Compare two saved results without running anything.")
+    compare.add_argument("baseline", help="Baseline JSON written by `run --output`.")
+    compare.add_argument("current", help="Results to check against the baseline.")
+    compare.set_defaults(handler=_compare)
+
+    for p in (check, compare):
+        p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown (0.25 = 25%%).")
+        p.add_argument(
+            "--min-delta", type=float, default=DEFAULT_MIN_DELTA_S, help="Ignore slowdowns below this many seconds."
+        )
+
+    for p in (run, check):
+        p.add_argument("--benchmarks", nargs="+", choices=sorted(BENCHMARKS), help="Subset to run (default: all).")
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from app.models.schemas import CsvImportRequest, Project
+from app.services.calculation import run_calculation
+from app.services.excel_export import export_excel
+from app.services.importers import apply_csv_import
+from app.services.validation import validate_project
+from benchmarks.synthetic import build_project, csv_datasets
+
+BASELINE_FORMAT = 1
+DEFAULT_SIZES = (10, 100, 1_000, 10_000)
+DEFAULT_THRESHOLD = 0.25
+# slowdowns smaller than this are treated as noise whatever the ratio
+DEFAULT_MIN_DELTA_S = 0.005
+REFERENCE_TABLES = (
+    "design_outdoor_conditions",
+    "design_indoor_conditions",
+    "execution_temperature_difference",
+    "standard_solar_gain",
+    "glass_properties",
+    "material_thermal_constants",
+    "location_data_regions",
+)
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # builds the timed callable for a project; everything it does itself is untimed
+    setup: Callable[[Project], Callable[[], Any]]
+    # False for benchmarks that do not depend on the project; they run once per suite
+    scales: bool = True
+
+
+def _calculation(project: Project) -> Callable[[], Any]:
+    return lambda: run_calculation(project)
+
+
+def _validation(project: Project) -> Callable[[], Any]:
+    return lambda: validate_project(project)
+
+
+def _csv_import(project: Project) -> Callable[[], Any]:
+    base = project.model_copy(
+        update={
+            attr: []
+            for attr in ("rooms", "surfaces", "openings", "internal_loads", "mechanical_loads", "ventilation_infiltration")
+        }
+    )
+    req = CsvImportRequest(project=base, datasets=csv_datasets(project))
+    return lambda: apply_csv_import(req)
+
+
+def _excel_export(project: Project) -> Callable[[], Any]:
+    calc_result = run_calculation(project)
+    return lambda: export_excel(project, calc_result)
+
+
+def _reference_endpoints(project: Project) -> Callable[[], Any]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+
+    def fetch() -> None:
+        for table in REFERENCE_TABLES:
+            client.get(f"/v1/reference/{table}").raise_for_status()
+
+    return fetch
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    b.name: b
+    for b in (
+        Benchmark("run_calculation", _calculation),
+        Benchmark("validate_project", _validation),
+        Benchmark("csv_import", _csv_import),
+        Benchmark("export_excel", _excel_export),
+        Benchmark("reference_endpoints", _reference_endpoints, scales=False),
+    )
+}
+
+
+@dataclass(frozen=True)
+class ProjectShape:
+    """Arguments of ``build_project`` besides the room count."""
+
+    surfaces_per_room: int = 4
+    openings_per_room: int = 2
+    region: str = "東京"
+    design_conditions: int = 2
+    seed: int = 0
+
+
+@dataclass
+class Measurement:
+    benchmark: str
+    rooms: int | None
+    best_s: float
+    median_s: float
+
+
+@dataclass
+class SuiteResult:
+    sizes: list[int]
+    repeat: int
+    shape: ProjectShape
+    measurements: list[Measurement] = field(default_factory=list)
+    environment: dict[str, Any] = field(default_factory=dict)
+    created_at: str = ""
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "format": BASELINE_FORMAT,
+            "created_at": self.created_at,
+            "environment": self.environment,
+            "sizes": self.sizes,
+            "repeat": self.repeat,
+            "shape": asdict(self.shape),
+            "measurements": [asdict(m) for m in self.measurements],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> SuiteResult:
+        if data.get("format") != BASELINE_FORMAT:
+            raise ValueError(f"Unsupported baseline format: {data.get('format')}")
+        return cls(
+            sizes=list(data["sizes"]),
+            repeat=int(data["repeat"]),
+            shape=ProjectShape(**data["shape"]),
+            measurements=[Measurement(**m) for m in data["measurements"]],
+            environment=data.get("environment", {}),
+            created_at=data.get("created_at", ""),
+        )
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> SuiteResult:
+        return cls.from_json(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def _environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _time(fn: Callable[[], Any], repeat: int, warm_up: bool) -> tuple[float, float]:
+    if warm_up:
+        fn()  # loads reference tables, the Excel template and other per-process caches
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples), statistics.median(samples)
+
+
+def run_suite(
+    sizes: list[int] | tuple[int, ...] = DEFAULT_SIZES,
+    benchmarks: list[str] | None = None,
+    repeat: int = 3,
+    shape: ProjectShape = ProjectShape(),
+    progress: Callable[[Measurement], None] | None = None,
+) -> SuiteResult:
+    """Time each benchmark on a synthetic project of every size (best and median of ``repeat``)."""
+    selected = [BENCHMARKS[name] for name in (benchmarks or BENCHMARKS)]
+    result = SuiteResult(
+        sizes=list(sizes),
+        repeat=repeat,
+        shape=shape,
+        environment=_environment(),
+        created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+    warmed: set[str] = set()
+
+    def measure(bench: Benchmark, project: Project, rooms: int | None) -> None:
+        best, median = _time(bench.setup(project), repeat, bench.name not in warmed)
+        warmed.add(bench.name)
+        measurement = Measurement(bench.name, rooms, best, median)
+        result.measurements.append(measurement)
+        if progress is not None:
+            progress(measurement)
+
+    for rooms in sizes:
+        project = build_project(rooms, **asdict(shape))
+        for bench in selected:
+            if bench.scales:
+                measure(bench, project, rooms)
+    for bench in selected:
+        if not bench.scales:
+            measure(bench, build_project(1, **asdict(shape)), None)
+    return result
+
+
+@dataclass(frozen=True)
+class Regression:
+    benchmark: str
+    rooms: int | None
+    baseline_s: float
+    current_s: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_s / self.baseline_s if self.baseline_s else float("inf")
+
+
+def find_regressions(
+    baseline: SuiteResult,
+    current: SuiteResult,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_s: float = DEFAULT_MIN_DELTA_S,
+) -> list[Regression]:
+    """Measurements whose best time grew by more than ``threshold`` (0.25 = 25 %) over the baseline.
+
+    Only benchmark/size pairs present in both results are compared.
+    """
+    previous = {(m.benchmark, m.rooms): m.best_s for m in baseline.measurements}
+    regressions = []
+    for m in current.measurements:
+        base = previous.get((m.benchmark, m.rooms))
+        if base is None:
+            continue
+        if m.best_s > base * (1.0 + threshold) and m.best_s - base > min_delta_s:
+            regressions.append(Regression(m.benchmark, m.rooms, base, m.best_s))
+    return regressions
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import csv
+import io
+import random
+
+from app.models.schemas import CsvDataset, Project
+from app.services.column_aliases import ALIAS_MAPS
+from app.services.entities import ENTITY_MODELS, project_entities
+
+# Regions with rows in every reference table the calculation reads (outdoor
+# conditions, ETD and standard solar gain).
+REGIONS = ("札幌", "仙台", "東京", "大阪", "福岡", "那覇")
+ORIENTATIONS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
+ROOMS_PER_FLOOR = 20
+ROOMS_PER_SYSTEM = 50
+
+# (summer drybulb, summer RH, winter drybulb, winter RH), cycled over design conditions
+_CONDITIONS = ((26.0, 50.0, 22.0, 40.0), (24.0, 45.0, 22.0, 40.0), (27.0, 55.0, 20.0, 35.0), (26.0, 50.0, 18.0, 40.0))
+_USAGES = ("事務室", "会議室", "応接室", "休憩室", "倉庫")
+_CONSTRUCTIONS = (
+    {"id": "c-ext", "name": "外壁", "layers": [("タイル", 10), ("コンクリート", 150), ("せっこうボード", 12)]},
+    {"id": "c-roof", "name": "屋根", "layers": [("アスファルト類", 10), ("コンクリート", 200), ("ロックウール化粧吸音板", 12)]},
+    {"id": "c-int", "name": "間仕切", "layers": [("せっこうボード", 12), ("せっこうボード", 12)]},
+    {"id": "c-floor", "name": "床", "u_value_w_m2k": 2.4},
+)
+_GLASSES = (
+    {"id": "g1", "glass_code": "2FA06", "glass_type": "複層ガラス", "sc": 0.89, "u_value_w_m2k": 3.5},
+    {"id": "g2", "glass_code": "T", "glass_type": "単板ガラス", "sc": 1.0, "u_value_w_m2k": 6.0},
+)
+_SASHES = (("引違い", "A"), ("引違い", "B"), ("片引き", "A"))
+
+
+def build_project(
+    rooms: int,
+    surfaces_per_room: int = 4,
+    openings_per_room: int = 2,
+    region: str = "東京",
+    design_conditions: int = 2,
+    seed: int = 0,
+) -> Project:
+    """Synthetic project of ``rooms`` rooms; the same arguments always give the same project.
+
+    Each room gets ``surfaces_per_room`` surfaces (exterior walls facing round the
+    compass, then partitions, a roof on the top floor and a floor slab),
+    ``openings_per_room`` windows on its exterior walls, lighting, occupancy and
+    equipment loads, and outdoor air. Every other room also has a mechanical load
+    and every fifth one sash infiltration. Rooms are spread over
+    ``design_conditions`` conditions and over systems of ``ROOMS_PER_SYSTEM``.
+    """
+    rng = random.Random(seed)
+    floors = max(1, -(-rooms // ROOMS_PER_FLOOR))
+    data: dict = {
+        "id": f"bench-{rooms}",
+        "name": f"bench {rooms}",
+        "region": region,
+        "solar_region": region,
+        "design_conditions": [
+            {
+                "id": f"dc{i}",
+                "summer_drybulb_c": cond[0],
+                "summer_rh_pct": cond[1],
+                "winter_drybulb_c": cond[2],
+                "winter_rh_pct": cond[3],
+            }
+            for i, cond in ((i, _CONDITIONS[i % len(_CONDITIONS)]) for i in range(max(1, design_conditions)))
+        ],
+        "constructions": [
+            {
+                "id": c["id"],
+                "name": c["name"],
+                "u_value_w_m2k": c.get("u_value_w_m2k"),
+                "layers": [
+                    {"layer_no": n, "material_name": name, "thickness_mm": mm}
+                    for n, (name, mm) in enumerate(c.get("layers", ()), start=1)
+                ],
+            }
+            for c in _CONSTRUCTIONS
+        ],
+        "glasses": list(_GLASSES),
+        "systems": [
+            {
+                "id": f"sys{s}",
+                "name": f"系統{s + 1}",
+                "room_ids": [f"r{i}" for i in range(s * ROOMS_PER_SYSTEM, min(rooms, (s + 1) * ROOMS_PER_SYSTEM))],
+            }
+            for s in range(-(-rooms // ROOMS_PER_SYSTEM))
+        ],
+    }
+    room_rows, surfaces, openings, internal_loads, mechanical_loads, ventilation = [], [], [], [], [], []
+    for i in range(rooms):
+        room_id = f"r{i}"
+        floor = i // ROOMS_PER_FLOOR + 1
+        area = round(rng.uniform(10.0, 120.0), 1)
+        height = rng.choice((2.5, 2.7, 3.0))
+        room_rows.append(
+            {
+                "id": room_id,
+                "name": f"室{i}",
+                "usage": _USAGES[i % len(_USAGES)],
+                "floor": f"{floor}F",
+                "area_m2": area,
+                "ceiling_height_m": height,
+                "design_condition_id": f"dc{i % max(1, design_conditions)}",
+                "system_id": f"sys{i // ROOMS_PER_SYSTEM}",
+            }
+        )
+        exterior = []
+        for j in range(surfaces_per_room):
+            surface = {"id": f"s{i}-{j}", "room_id": room_id, "area_m2": round(rng.uniform(5.0, 40.0), 1)}
+            if j == surfaces_per_room - 1 and j >= 2:
+                if floor == floors:
+                    surface.update(kind="roof", orientation="水平", construction_id="c-roof")
+                else:
+                    surface.update(kind="floor", adjacent_type="internal", construction_id="c-floor")
+            elif j % 3 == 2:
+                surface.update(
+                    kind="internal", adjacent_type="unconditioned", adjacent_temp_c=30.0, construction_id="c-int"
+                )
+            else:
+                orientation = ORIENTATIONS[(i + j * 2) % len(ORIENTATIONS)]
+                surface.update(kind="wall", orientation=orientation, construction_id="c-ext")
+                exterior.append(surface)
+            surfaces.append(surface)
+        for k in range(openings_per_room):
+            wall = exterior[k % len(exterior)] if exterior else None
+            openings.append(
+                {
+                    "id": f"o{i}-{k}",
+                    "room_id": room_id,
+                    "surface_id": wall["id"] if wall else None,
+                    "orientation": wall["orientation"] if wall else ORIENTATIONS[k % len(ORIENTATIONS)],
+                    "width_m": rng.choice((0.9, 1.2, 1.8, 2.4)),
+                    "height_m": rng.choice((1.1, 1.5, 1.8)),
+                    "glass_id": _GLASSES[k % len(_GLASSES)]["id"],
+                    "shading_sc": rng.choice((1.0, 0.7, 0.5)),
+                }
+            )
+        internal_loads.extend(
+            [
+                {"id": f"il{i}-l", "room_id": room_id, "kind": "lighting", "sensible_w": round(area * 12.0)},
+                {
+                    "id": f"il{i}-o",
+                    "room_id": room_id,
+                    "kind": "occupancy",
+                    "sensible_w": round(area * 0.15 * 55.0),
+                    "latent_w": round(area * 0.15 * 65.0),
+                },
+                {"id": f"il{i}-e", "room_id": room_id, "kind": "equipment", "sensible_w": round(area * 20.0)},
+            ]
+        )
+        if i % 2 == 0:
+            mechanical_loads.append(
+                {"id": f"ml{i}", "room_id": room_id, "sensible_w": rng.choice((200.0, 500.0, 1200.0))}
+            )
+        vent = {"id": f"v{i}", "room_id": room_id, "outdoor_air_m3h": round(area * 0.15 * 25.0)}
+        if i % 5 == 0:
+            sash_type, airtightness = _SASHES[(i // 5) % len(_SASHES)]
+            vent.update(
+                infiltration_mode="sash",
+                sash_type=sash_type,
+                airtightness=airtightness,
+                wind_speed_ms=4.0,
+                infiltration_area_m2=round(rng.uniform(1.0, 6.0), 1),
+            )
+        ventilation.append(vent)
+    data.update(
+        rooms=room_rows,
+        surfaces=surfaces,
+        openings=openings,
+        internal_loads=internal_loads,
+        mechanical_loads=mechanical_loads,
+        ventilation_infiltration=ventilation,
+    )
+    return Project.model_validate(data)
+
+
+def csv_datasets(project: Project) -> list[CsvDataset]:
+    """``project``'s importable entity lists as CSV files, one per dataset, with canonical headers."""
+    datasets = []
+    for entity, aliases in ALIAS_MAPS.items():
+        model_fields = ENTITY_MODELS[entity].model_fields
+        columns = [field for field in aliases if field in model_fields]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for item in project_entities(project, entity):
+            writer.writerow(["" if (value := getattr(item, field)) is None else value for field in columns])
+        datasets.append(CsvDataset(filename=f"{entity}.csv", content=buffer.getvalue()))
+    return datasets
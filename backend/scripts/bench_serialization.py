@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic_core import to_json  # noqa: E402
+
+from app.services.calculation import run_calculation  # noqa: E402
+from benchmarks.synthetic import build_project  # noqa: E402
+
+
+def _best_of(repeat: int, fn) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare CalcResult JSON serialization paths.")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rooms in args.rooms:
+        result = run_calculation(build_project(rooms))
+        encoder, size = _best_of(
+            args.repeat, lambda: json.dumps(jsonable_encoder(result), ensure_ascii=False).encode("utf-8")
+        )
+        direct, _ = _best_of(args.repeat, lambda: to_json(result))
+        print(
+            f"rooms={rooms:>6} traces={len(result.traces):>7} bytes={size:>11,}  "
+            f"jsonable_encoder={encoder * 1000:8.1f} ms  to_json={direct * 1000:7.1f} ms  "
+            f"speedup={encoder / direct:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
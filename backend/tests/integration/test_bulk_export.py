@@ -0,0 +1,64 @@
+import io
+import json
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import BULK_EXPORT_MAX_ITEMS
+from app.services.project_store import set_project_store
+
+client = TestClient(app)
+
+
+def test_bulk_export_of_inline_projects_does_not_open_the_store(tmp_path, monkeypatch):
+    path = tmp_path / "projects.sqlite3"
+    monkeypatch.setenv("PROJECT_STORE_PATH", str(path))
+    set_project_store(None)
+    try:
+        project = {"id": "p1", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "室", "area_m2": 20}]}
+        res = client.post("/v1/export/bulk", json={"items": [{"project": project}], "include_excel": False})
+        assert res.status_code == 200
+        assert not path.exists()
+    finally:
+        set_project_store(None)
+
+
+def test_bulk_export_streams_json_and_workbooks_per_project():
+    project = {"id": "p1", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "会議室", "area_m2": 20}]}
+    body = {
+        "items": [{"project": project}, {"project": {**project, "name": "案件B"}}, {"project": project, "name": "a/b"}],
+        "engine": "xml",
+    }
+    res = client.post("/v1/export/bulk", json=body)
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(res.content))
+    assert sorted(archive.namelist()) == ["a_b.json", "a_b.xlsx", "p1.json", "p1.xlsx", "p1_2.json", "p1_2.xlsx"]
+    payload = json.loads(archive.read("p1_2.json"))
+    assert payload["project"]["name"] == "案件B"
+    assert payload["calc_result"]["room_results"][0]["room_id"] == "r1"
+
+
+def test_bulk_export_reports_invalid_projects_in_errors_json():
+    valid = {"id": "p1", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "室", "area_m2": 20}]}
+    invalid = {
+        **valid,
+        "id": "p2",
+        "internal_loads": [{"id": "l1", "room_id": "missing", "kind": "lighting", "sensible_w": 100}],
+    }
+    res = client.post("/v1/export/bulk", json={"items": [{"project": valid}, {"project": invalid}], "engine": "xml"})
+    assert res.status_code == 200
+
+    archive = zipfile.ZipFile(io.BytesIO(res.content))
+    assert sorted(archive.namelist()) == ["errors.json", "p1.json", "p1.xlsx"]
+    [error] = json.loads(archive.read("errors.json"))
+    assert error["name"] == "p2"
+    assert [i["code"] for i in error["issues"]] == ["reference_not_found"]
+
+
+def test_bulk_export_rejects_too_many_items():
+    project = {"id": "p1", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "室", "area_m2": 20}]}
+    res = client.post("/v1/export/bulk", json={"items": [{"project": project}] * (BULK_EXPORT_MAX_ITEMS + 1)})
+    assert res.status_code == 422
@@ -0,0 +1,99 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import Project
+from app.services.compute_pool import ComputePool, Overloaded, ProjectInvalid, calc_job, set_compute_pool
+
+client = TestClient(app)
+
+PROJECT = {"id": "pool", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "会議室", "area_m2": 20}]}
+
+
+def test_jobs_run_in_worker_processes():
+    pool = ComputePool(1, 4, {"calc": 2})
+    project = Project.model_validate(PROJECT)
+    assert pool.run("calc", calc_job, project) == calc_job(project)
+
+    invalid = Project.model_validate({**PROJECT, "rooms": [{"id": "r1", "name": "a", "area_m2": 1}, {"id": "r1", "name": "b", "area_m2": 1}]})
+    with pytest.raises(ProjectInvalid) as exc:
+        pool.run("calc", calc_job, invalid)
+    assert any(i.level == "error" for i in exc.value.issues)
+    assert pool.in_flight["calc"] == 0
+
+
+def _blocked_pool(max_queue=8, limits=None):
+    pool = ComputePool(1, max_queue, limits or {"calc": 8, "excel": 8}, executor_factory=ThreadPoolExecutor)
+    release = threading.Event()
+    pool.submit(release.wait, 5)
+    return pool, release
+
+
+def test_interactive_jobs_go_first_and_clients_share_fairly():
+    pool, release = _blocked_pool()
+    order = []
+    futures = [pool.submit(order.append, f"a{i}", priority="bulk", client="a") for i in range(3)]
+    futures.append(pool.submit(order.append, "b0", priority="bulk", client="b"))
+    futures += [pool.submit(order.append, f"i{i}", priority="interactive", client="c") for i in range(2)]
+    assert pool.queued("bulk") == 4 and pool.queued("interactive") == 2
+    release.set()
+    for future in futures:
+        future.result(5)
+    assert order == ["i0", "i1", "a0", "b0", "a1", "a2"]
+    assert pool.stats["bulk"].dispatched == 4
+    assert pool.stats["interactive"].wait_seconds_total > 0
+
+
+def test_admission_limits():
+    pool, release = _blocked_pool(max_queue=1, limits={"calc": 1, "excel": 8})
+    queued = threading.Thread(target=pool.run, args=("calc", time.sleep, 0))
+    queued.start()
+    deadline = time.monotonic() + 5
+    while pool.queued() == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with pytest.raises(Overloaded) as exc:
+        pool.run("calc", time.sleep, 0)
+    assert exc.value.status_code == 429 and exc.value.retry_after >= 1
+    with pytest.raises(Overloaded) as exc:
+        pool.run("excel", time.sleep, 0)
+    assert exc.value.status_code == 503
+    # bulk work has its own queue, so it is not turned away by a full interactive one
+    bulk = pool.submit(time.sleep, 0, priority="bulk")
+    release.set()
+    queued.join()
+    bulk.result(5)
+    assert pool.run("excel", len, "ok") == 2
+
+
+def test_overloaded_endpoint_returns_retry_after():
+    set_compute_pool(ComputePool(0, 0, {"calc": 0, "excel": 0, "import": 0}))
+    try:
+        res = client.post("/v1/calc/run", json={"project": {**PROJECT, "name": "overloaded"}})
+    finally:
+        set_compute_pool(None)
+    assert res.status_code == 429
+    assert int(res.headers["retry-after"]) >= 1
+
+
+def test_requests_waiting_on_an_identical_calculation_take_a_slot():
+    pool, release = _blocked_pool(limits={"calc": 1, "excel": 1, "import": 1})
+    set_compute_pool(pool)
+    body = {"project": {**PROJECT, "name": "coalesced"}}
+    try:
+        leader = threading.Thread(target=client.post, args=("/v1/calc/run",), kwargs={"json": body})
+        leader.start()
+        deadline = time.monotonic() + 5
+        while pool.queued() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # would otherwise wait on the leader's calculation without any limit
+        assert client.post("/v1/calc/run", json=body).status_code == 429
+        release.set()
+        leader.join()
+        assert pool.in_flight["calc"] == 0
+    finally:
+        release.set()
+        set_compute_pool(None)
@@ -0,0 +1,98 @@
+import io
+import zipfile
+
+import openpyxl
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import routes
+from app.services import importers
+from app.services.compute_pool import DEFAULT_LIMITS, ComputePool, set_compute_pool
+
+client = TestClient(app)
+
+
+def test_csv_upload_apply_streams_multipart_files():
+    files = [
+        ("files", ("rooms.csv", "id,name,area\nr1,会議室,20\n".encode("cp932"), "text/csv")),
+        ("files", ("surfaces.csv", "id,room_id,kind\ns1,r1,wall\n".encode("cp932"), "text/csv")),
+    ]
+    res = client.post("/v1/import/csv/upload/apply", files=files, data={"encoding": "cp932"})
+    assert res.status_code == 200
+    data = res.json()
+    assert [(d["entity"], d["add"]) for d in data["diffs"]] == [("rooms", 1), ("surfaces", 1)]
+    assert data["project"]["rooms"][0]["name"] == "会議室"
+
+
+def test_xlsx_apply_maps_sheets_to_entities():
+    wb = openpyxl.Workbook()
+    rooms = wb.active
+    rooms.title = "rooms"
+    rooms.append(["室ID", "室名", "面積"])
+    rooms.append([101, "会議室", 20.5])
+    notes = wb.create_sheet("notes")
+    notes.append(["memo"])
+    bio = io.BytesIO()
+    wb.save(bio)
+
+    files = {"file": ("schedule.xlsx", bio.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    res = client.post("/v1/import/xlsx/apply", files=files)
+    assert res.status_code == 200
+    data = res.json()
+    assert [(d["entity"], d["add"]) for d in data["diffs"]] == [("rooms", 1)]
+    room = data["project"]["rooms"][0]
+    assert (room["id"], room["name"], room["area_m2"]) == ("101", "会議室", 20.5)
+    assert [i["code"] for i in data["issues"]] == ["dataset_skipped"]
+
+
+def test_xlsx_preview_rejects_non_workbook():
+    res = client.post("/v1/import/xlsx/preview", files={"file": ("x.xlsx", b"not a zip", "application/octet-stream")})
+    assert res.status_code == 400
+
+    # a zip without workbook parts (openpyxl raises KeyError) is also a bad upload
+    bio = io.BytesIO()
+    with zipfile.ZipFile(bio, "w") as archive:
+        archive.writestr("readme.txt", "x")
+    files = {"file": ("x.xlsx", bio.getvalue(), "application/octet-stream")}
+    assert client.post("/v1/import/xlsx/preview", files=files).status_code == 400
+
+
+def test_xlsx_import_does_not_hide_internal_key_errors(monkeypatch):
+    def broken(*args):
+        raise KeyError("bug")
+
+    monkeypatch.setattr(importers, "preview_import", broken)
+    # run inline so the patched function is the one called
+    set_compute_pool(ComputePool(0, 0, dict(DEFAULT_LIMITS)))
+    wb = openpyxl.Workbook()
+    bio = io.BytesIO()
+    wb.save(bio)
+    files = {"file": ("x.xlsx", bio.getvalue(), "application/octet-stream")}
+    try:
+        with pytest.raises(KeyError):
+            client.post("/v1/import/xlsx/preview", files=files)
+    finally:
+        set_compute_pool(None)
+
+
+def test_preview_token_from_a_worker_commits_in_the_api_process():
+    res = client.post(
+        "/v1/import/csv/preview", json={"datasets": [{"filename": "rooms.csv", "content": "id,name,area\nr1,A,10\n"}]}
+    )
+    assert res.status_code == 200
+    token = res.json()["import_token"]
+    assert token is not None
+
+    res = client.post("/v1/import/commit", json={"import_token": token})
+    assert res.status_code == 200
+    assert [r["id"] for r in res.json()["project"]["rooms"]] == ["r1"]
+    assert client.post("/v1/import/commit", json={"import_token": token}).status_code == 404
+
+
+def test_oversized_uploads_are_rejected_before_reading(monkeypatch):
+    monkeypatch.setattr(routes, "IMPORT_MAX_UPLOAD_BYTES", 16)
+    files = [("files", ("rooms.csv", b"id,name,area\nr1,A,10\n", "text/csv"))]
+    assert client.post("/v1/import/csv/upload/apply", files=files).status_code == 413
+    xlsx = {"file": ("x.xlsx", b"x" * 17, "application/octet-stream")}
+    assert client.post("/v1/import/xlsx/preview", files=xlsx).status_code == 413
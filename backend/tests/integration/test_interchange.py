@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import interchange
+from app.services.interchange import BodyDecoder, InterchangeError
+
+client = TestClient(app)
+
+PROJECT = {"id": "p1", "name": "案件", "region": "東京", "rooms": [{"id": f"r{i}", "name": "室", "area_m2": 20} for i in range(50)]}
+
+
+def test_import_json_accepts_gzip_body_and_compresses_response():
+    body = gzip.compress(json.dumps({"payload": PROJECT}).encode())
+    res = client.post(
+        "/v1/import/json",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip", "Accept-Encoding": "gzip"},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert len(res.json()["project"]["rooms"]) == 50
+
+
+def test_export_json_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    res = client.post("/v1/export/json", json={"project": PROJECT}, headers={"Accept": "application/msgpack"})
+    assert res.headers["content-type"] == "application/msgpack"
+    payload = msgpack.unpackb(res.content)["payload"]
+    assert payload["project"]["id"] == "p1"
+
+    imported = client.post(
+        "/v1/import/json",
+        content=msgpack.packb({"payload": payload["project"]}),
+        headers={"Content-Type": "application/msgpack", "Accept": "application/json"},
+    )
+    assert imported.status_code == 200
+    assert imported.json()["project"]["rooms"][0]["id"] == "r0"
+
+
+def _feed_in_chunks(decoder: BodyDecoder, body: bytes) -> None:
+    for i in range(0, len(body), 4096):
+        decoder.feed(body[i : i + 4096])
+
+
+def test_gzip_compression_bomb_is_rejected_early():
+    bomb = gzip.compress(b"\0" * (64 * 1024 * 1024))
+    decoder = BodyDecoder("application/json", "gzip", max_bytes=4 * 1024 * 1024)
+    with pytest.raises(InterchangeError) as exc:
+        _feed_in_chunks(decoder, bomb)
+    assert exc.value.status_code == 413
+    # decompression stops within one step of the limit
+    assert decoder.size <= 5 * 1024 * 1024
+
+
+def test_zstd_compression_bomb_is_rejected_early():
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor(level=19).compressobj()
+    zeros = b"\0" * (1024 * 1024)
+    bomb = b"".join(compressor.compress(zeros) for _ in range(64)) + compressor.flush()
+    decoder = BodyDecoder("application/json", "zstd", max_bytes=4 * 1024 * 1024)
+    with pytest.raises(InterchangeError) as exc:
+        _feed_in_chunks(decoder, bomb)
+    assert exc.value.status_code == 413
+    assert decoder.size <= 5 * 1024 * 1024
+
+
+def test_import_json_accepts_zstd_body():
+    zstandard = pytest.importorskip("zstandard")
+    body = zstandard.ZstdCompressor().compress(json.dumps({"payload": PROJECT}).encode())
+    res = client.post(
+        "/v1/import/json", content=body, headers={"Content-Type": "application/json", "Content-Encoding": "zstd"}
+    )
+    assert res.status_code == 200
+    assert len(res.json()["project"]["rooms"]) == 50
+
+
+def test_interchange_rejects_unsupported_formats():
+    assert client.post("/v1/import/json", content=b"x", headers={"Content-Type": "text/csv"}).status_code == 415
+    res = client.post(
+        "/v1/import/json", content=b"not gzip", headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    )
+    assert res.status_code == 400
+    assert client.post("/v1/import/json", content=b"{", headers={"Content-Type": "application/json"}).status_code == 422
+
+
+def test_accept_without_a_supported_type_falls_back_to_json(monkeypatch):
+    for accept in ("text/html", "application/xml", "application/json;q=0, text/html"):
+        res = client.post("/v1/export/json", json={"project": PROJECT}, headers={"Accept": accept})
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("application/json")
+
+    monkeypatch.setattr(interchange, "msgpack", None)
+    res = client.post("/v1/export/json", json={"project": PROJECT}, headers={"Accept": "application/msgpack"})
+    assert res.status_code == 406
@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metrics import Histogram, collect_samples, record_samples
+
+client = TestClient(app)
+
+PROJECT = {"id": "metrics", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "会議室", "area_m2": 20}]}
+
+
+def test_histogram_renders_cumulative_buckets_and_worker_samples():
+    hist = Histogram("test_seconds", "Test.", buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    _, samples = collect_samples(lambda: hist.observe(0.5, stage="a"))
+    assert samples == [("test_seconds", (("stage", "a"),), 0.5)]
+    lines = hist.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 1' in lines
+
+    record_samples([("heatload_stage_duration_seconds", (("stage", "unit_test"),), 0.5)])
+    assert 'stage="unit_test"' in client.get("/metrics").text
+
+
+def test_metrics_endpoint_exposes_routes_stages_sizes_and_caches():
+    assert client.post("/v1/calc/run", json={"project": PROJECT}).status_code == 200
+    client.get("/v1/reference/glass_properties")
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+    assert 'heatload_request_duration_seconds_count{method="POST",route="/calc/run"}' in text
+    for stage in ("request_parse", "validate", "calc_transmission", "aggregation", "serialize"):
+        assert f'heatload_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'heatload_project_entities_bucket{entity="rooms",le="1"}' in text
+    assert 'heatload_cache_lookups_total{cache="result",result="miss"}' in text
+    assert 'heatload_reference_cache_lookups_total{cache="reference_json",result="hit"}' in text
+    assert 'heatload_compute_queue_depth{priority="bulk"} 0' in text
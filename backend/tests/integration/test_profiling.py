@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+PROJECT = {
+    "id": "profiled",
+    "name": "案件",
+    "region": "東京",
+    "rooms": [{"id": "r1", "name": "会議室", "area_m2": 20}],
+    "ventilation_infiltration": [{"id": "v1", "room_id": "r1", "outdoor_air_m3h": 100}],
+}
+
+
+def test_profiling_requires_admin_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/v1/calc/run?profile=true", json={"project": PROJECT}).status_code == 403
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    res = client.post("/v1/calc/run?profile=true", json={"project": PROJECT}, headers={"X-Admin-Token": "wrong"})
+    assert res.status_code == 403
+
+
+def test_profiled_calc_and_export_store_reports(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    headers = {"Authorization": "Bearer secret"}
+    res = client.post("/v1/calc/run?profile=true", json={"project": PROJECT}, headers=headers)
+    assert res.status_code == 200
+    assert res.json() == client.post("/v1/calc/run", json={"project": PROJECT}).json()
+
+    report = client.get(f"/v1/profiles/{res.headers['x-profile-id']}", headers=headers).json()
+    assert report["endpoint"] == "calc" and report["total_seconds"] > 0
+    assert report["functions"]
+    assert set(report["hot_functions"]) == {"round_half_up", "lookup_etd", "moist_air_state"}
+    assert report["hot_functions"]["round_half_up"]["calls"] > 0
+    assert report["entities"]["ventilation_infiltration"]["calls"] == 1
+    assert report["entities"]["surfaces"]["calls"] == 0
+
+    res = client.post("/v1/export/excel?profile=true", json={"project": PROJECT, "engine": "xml"}, headers=headers)
+    assert res.status_code == 200 and res.content[:2] == b"PK"
+    report = client.get(f"/v1/profiles/{res.headers['x-profile-id']}", headers=headers).json()
+    assert report["endpoint"] == "excel"
+    assert client.get("/v1/profiles/missing", headers=headers).status_code == 404
@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+PROJECT = {
+    "id": "p1",
+    "name": "案件",
+    "region": "東京",
+    "rooms": [{"id": f"r{i}", "name": "室", "area_m2": 20, "system_id": "sys1"} for i in range(3)],
+    "internal_loads": [{"id": f"il{i}", "room_id": f"r{i}", "kind": "lighting", "sensible_w": 300} for i in range(3)],
+    "systems": [{"id": "sys1", "name": "系統1", "room_ids": ["r0", "r1", "r2"]}],
+}
+
+
+def test_session_open_returns_full_results_that_patches_update():
+    opened = client.post("/v1/projects/session", json=PROJECT).json()
+    expected = client.post("/v1/calc/run", json={"project": PROJECT}).json()
+
+    assert opened["calculated"]
+    assert opened["room_results"] == expected["room_results"]
+    assert opened["system_results"] == expected["system_results"]
+    assert opened["totals"] == expected["totals"]
+
+    patched = client.post(
+        f"/v1/projects/session/{opened['session_id']}/patch",
+        json={"patch": [{"op": "replace", "path": "/internal_loads/1/sensible_w", "value": 900}]},
+    ).json()
+    assert [r["room_id"] for r in patched["room_results"]] == ["r1"]
+    rooms = {r["room_id"]: r for r in opened["room_results"]}
+    rooms.update({r["room_id"]: r for r in patched["room_results"]})
+    changed = {**PROJECT, "internal_loads": [dict(il) for il in PROJECT["internal_loads"]]}
+    changed["internal_loads"][1]["sensible_w"] = 900
+    assert list(rooms.values()) == client.post("/v1/calc/run", json={"project": changed}).json()["room_results"]
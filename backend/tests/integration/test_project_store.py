@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import Project
+from app.services.project_store import ProjectNotFound, ProjectStore, set_project_store
+
+client = TestClient(app)
+
+PROJECT = {
+    "id": "p1",
+    "name": "案件",
+    "region": "東京",
+    "rooms": [{"id": "r1", "name": "会議室", "area_m2": 20}, {"id": "r2", "name": "事務室", "area_m2": 30}],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProjectStore(tmp_path / "projects.sqlite3")
+    set_project_store(store)
+    yield store
+    set_project_store(None)
+    store.close()
+
+
+def test_versions_share_unchanged_parts(store):
+    project = Project.model_validate(PROJECT)
+    v1, created = store.save(project, create=True)
+    assert created and v1.version == 1
+
+    same, changed = store.save(project)
+    assert not changed and same.version == 1
+
+    renamed = project.model_copy(update={"name": "案件B"})
+    v2, _ = store.save(renamed)
+    assert v2.version == 2
+    assert v2.parts["rooms"] == v1.parts["rooms"]
+    assert v2.parts["header"] != v1.parts["header"]
+
+    _, old = store.load("p1", 1)
+    _, head = store.load("p1")
+    assert old.name == "案件" and head.name == "案件B"
+    # shared parts decode to the same model objects
+    assert old.rooms[0] is head.rooms[0]
+
+    with pytest.raises(FileExistsError):
+        store.save(project, create=True)
+    assert store.delete("p1")
+    with pytest.raises(ProjectNotFound):
+        store.load("p1")
+
+
+def test_project_crud_and_calc_by_id(store):
+    res = client.post("/v1/projects", json=PROJECT)
+    assert res.status_code == 201
+    assert res.json()["version"] == 1 and res.json()["valid"]
+    assert client.post("/v1/projects", json=PROJECT).status_code == 409
+
+    res = client.put("/v1/projects/p1", json={**PROJECT, "name": "案件B"})
+    assert res.json()["version"] == 2 and res.json()["changed"]
+    assert not client.put("/v1/projects/p1", json={**PROJECT, "name": "案件B"}).json()["changed"]
+    assert client.put("/v1/projects/p1", json={**PROJECT, "id": "other"}).status_code == 400
+
+    res = client.get("/v1/projects/p1", params={"version": 1})
+    assert res.json()["name"] == "案件"
+    assert res.headers["x-project-version"] == "1"
+
+    versions = client.get("/v1/projects/p1/versions").json()
+    assert [v["changed_parts"] for v in versions][1] == ["header"]
+
+    inline = client.post("/v1/calc/run", json={"project": {**PROJECT, "name": "案件B"}}).json()
+    assert client.post("/v1/projects/p1/calc/run").json() == inline
+
+    res = client.post("/v1/projects/p1/export/excel", json={"engine": "xml"})
+    assert res.status_code == 200 and res.content[:2] == b"PK"
+    res = client.post("/v1/export/bulk", json={"items": [{"project_id": "p1", "version": 1}]})
+    assert res.status_code == 200
+    assert client.post("/v1/export/bulk", json={"items": [{"project_id": "missing"}]}).status_code == 404
+
+    assert client.delete("/v1/projects/p1").status_code == 200
+    assert client.get("/v1/projects/p1").status_code == 404
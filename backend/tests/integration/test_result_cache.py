@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import Project
+from app.services.project_store import ProjectStore, project_hash
+from app.services.result_cache import DiskCache, ResultCache, calc_cache_key, get_result_cache
+
+client = TestClient(app)
+
+PROJECT = {"id": "p1", "name": "案件", "region": "東京", "rooms": [{"id": "r1", "name": "会議室", "area_m2": 20}]}
+
+
+def test_lru_evicts_by_size():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    cache.put("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.size == 8
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return b"result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == [b"result"] * 4
+    assert len(calls) == 1 and cache.coalesced == 3
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("bad", fail)
+    assert cache.get("bad") is None
+
+
+def test_project_hash_matches_stored_content_hash(tmp_path):
+    project = Project.model_validate(PROJECT)
+    store = ProjectStore(tmp_path / "p.sqlite3")
+    stored, _ = store.save(project, create=True)
+    store.close()
+    assert project_hash(project) == stored.content_hash
+    renamed = project.model_copy(update={"name": "別案件"})
+    assert calc_cache_key(renamed) != calc_cache_key(project)
+
+
+def test_calc_run_is_cached_and_honours_if_none_match():
+    cache = get_result_cache()
+    cache.clear()
+    first = client.post("/v1/calc/run", json={"project": PROJECT})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    hits = cache.hits
+
+    second = client.post("/v1/calc/run", json={"project": PROJECT})
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    assert cache.hits == hits + 1
+
+    res = client.post("/v1/calc/run", json={"project": PROJECT}, headers={"If-None-Match": f"W/{etag}"})
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+
+    other = client.post("/v1/calc/run", json={"project": {**PROJECT, "name": "別案件"}})
+    assert other.headers["etag"] != etag
+
+
+def test_if_none_match_star_requires_a_cached_result():
+    """``*`` must not skip validation and calculation for a result that was never computed"""
+    get_result_cache().clear()
+    invalid = {**PROJECT, "rooms": PROJECT["rooms"] * 2}
+    assert client.post("/v1/calc/run", json={"project": invalid}, headers={"If-None-Match": "*"}).status_code == 400
+
+    project = {**PROJECT, "name": "星"}
+    assert client.post("/v1/calc/run", json={"project": project}, headers={"If-None-Match": "*"}).status_code == 200
+    assert client.post("/v1/calc/run", json={"project": project}, headers={"If-None-Match": "*"}).status_code == 304
+
+
+def test_disk_tier_survives_restart_and_evicts_by_size(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    disk = DiskCache(path)
+    ResultCache(disk=disk).put("k", b"result" * 100)
+    disk.close()
+
+    # a fresh process: empty memory tier, same file
+    cache = ResultCache(disk=DiskCache(path))
+    assert cache.get("k") == b"result" * 100
+    assert cache.disk_hits == 1
+    assert cache.get("k") is not None and cache.hits == 1
+
+    small = DiskCache(tmp_path / "small.sqlite3", max_bytes=200)
+    small.put("a", bytes(range(120)))
+    small.put("b", bytes(range(120)))
+    assert small.get("a") is None
+    assert small.get("b") == bytes(range(120))
+    assert small.size <= 200
+
+
+def test_excel_export_is_cached_with_etag():
+    body = {"project": PROJECT, "engine": "xml"}
+    first = client.post("/v1/export/excel", json=body)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert client.post("/v1/export/excel", json=body).content == first.content
+    assert client.post("/v1/export/excel", json=body, headers={"If-None-Match": etag}).status_code == 304
+    assert client.post("/v1/export/excel", json={**body, "engine": "openpyxl"}).headers["etag"] != etag
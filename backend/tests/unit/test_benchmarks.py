@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from app.models.schemas import CsvImportRequest
+from app.services.calculation import run_calculation
+from app.services.importers import apply_csv_import
+from app.services.validation import validate_project
+from benchmarks.__main__ import main
+from benchmarks.suite import BENCHMARKS, Measurement, ProjectShape, SuiteResult, find_regressions, run_suite
+from benchmarks.synthetic import build_project, csv_datasets
+
+
+def test_synthetic_project_is_deterministic_and_valid():
+    project = build_project(45, surfaces_per_room=5, openings_per_room=3, region="大阪", design_conditions=3)
+
+    assert project == build_project(45, surfaces_per_room=5, openings_per_room=3, region="大阪", design_conditions=3)
+    assert project != build_project(45, surfaces_per_room=5, openings_per_room=3, region="大阪", seed=1)
+    assert (len(project.rooms), len(project.surfaces), len(project.openings)) == (45, 225, 135)
+    assert {r.design_condition_id for r in project.rooms} == {"dc0", "dc1", "dc2"}
+    assert validate_project(project) == []
+    assert len(run_calculation(project).room_results) == 45
+
+
+def test_csv_datasets_round_trip_through_import():
+    """The generated CSV files import back into the same calculation result"""
+    project = build_project(12)
+    entity_lists = ("rooms", "surfaces", "openings", "internal_loads", "mechanical_loads", "ventilation_infiltration")
+    base = project.model_copy(update={attr: [] for attr in entity_lists})
+
+    applied = apply_csv_import(CsvImportRequest(project=base, datasets=csv_datasets(project)))
+
+    assert applied.issues == []
+    assert run_calculation(applied.project) == run_calculation(project)
+
+
+def test_suite_baseline_round_trip_and_regression_check(tmp_path):
+    result = run_suite([5], ["validate_project", "run_calculation"], repeat=1, shape=ProjectShape(openings_per_room=1))
+    assert [(m.benchmark, m.rooms) for m in result.measurements] == [("validate_project", 5), ("run_calculation", 5)]
+
+    path = tmp_path / "baseline.json"
+    result.save(path)
+    baseline = SuiteResult.load(path)
+    assert baseline.shape == ProjectShape(openings_per_room=1)
+    assert find_regressions(baseline, result) == []
+
+    slower = SuiteResult(
+        sizes=[5],
+        repeat=1,
+        shape=baseline.shape,
+        measurements=[
+            Measurement("validate_project", 5, 1.0, 1.0),
+            Measurement("run_calculation", 5, baseline.measurements[1].best_s * 1.1, 1.0),
+            Measurement("csv_import", 5, 1.0, 1.0),
+        ],
+    )
+    regressions = find_regressions(baseline, slower, threshold=0.25, min_delta_s=0.0)
+    assert [(r.benchmark, r.rooms) for r in regressions] == [("validate_project", 5)]
+    assert regressions[0].ratio > 1.25
+
+
+def test_compare_command_checks_saved_results_without_running(tmp_path, capsys):
+    shape = ProjectShape()
+    baseline = SuiteResult([10], 1, shape, [Measurement("run_calculation", 10, 0.1, 0.1)])
+    current = SuiteResult([10], 1, shape, [Measurement("run_calculation", 10, 0.2, 0.2)])
+    baseline.save(tmp_path / "baseline.json")
+    current.save(tmp_path / "current.json")
+
+    args = ["compare", str(tmp_path / "baseline.json"), str(tmp_path / "current.json")]
+    assert main(args) == 1
+    assert "REGRESSION run_calculation rooms=10" in capsys.readouterr().out
+    assert main([*args, "--threshold", "1.5"]) == 0
+
+
+def test_committed_baseline_loads():
+    baseline = SuiteResult.load(Path(__file__).resolve().parents[2] / "benchmarks" / "baselines" / "baseline.json")
+    assert {m.benchmark for m in baseline.measurements} == set(BENCHMARKS)
@@ -0,0 +1,72 @@
+import pytest
+
+from app.domain.construction import clear_construction_cache, resolve_construction, resolve_constructions
+from app.domain.reference_lookup import get_reference_repository
+from app.models.schemas import ConstructionAssembly, ConstructionLayer
+
+
+def _wall(cid: str = "W1", **kwargs) -> ConstructionAssembly:
+    return ConstructionAssembly(
+        id=cid,
+        name="外壁",
+        layers=[
+            ConstructionLayer(layer_no=1, material_name="押出法ポリスチレンフォーム保温板1種", thickness_mm=50.0, thermal_conductivity=0.028),
+            ConstructionLayer(layer_no=2, material_name="コンクリート", thickness_mm=180.0, thermal_conductivity=1.6),
+        ],
+        ao_summer=23.0,
+        ao_winter=23.0,
+        ai=9.0,
+        **kwargs,
+    )
+
+
+def test_u_value_from_layers():
+    """Total resistance is 1/αo + Σ(thickness/λ) + 1/αi"""
+    resolved = resolve_construction(_wall(), get_reference_repository())
+    expected_r = 1 / 23 + 0.05 / 0.028 + 0.18 / 1.6 + 1 / 9
+    assert resolved.source == "layers"
+    assert resolved.total_resistance_summer == pytest.approx(expected_r)
+    assert resolved.u_summer == pytest.approx(1 / expected_r)
+
+
+def test_explicit_u_value_takes_precedence():
+    resolved = resolve_construction(_wall(u_value_w_m2k=0.7), get_reference_repository())
+    assert resolved.source == "u_value"
+    assert resolved.u_summer == 0.7
+    assert resolved.u_winter == 0.7
+
+
+def test_conductivity_looked_up_from_material_table():
+    construction = ConstructionAssembly(
+        id="W2",
+        name="鋼板",
+        layers=[
+            ConstructionLayer(layer_no=1, material_name="鋼", thickness_mm=55.0),
+            ConstructionLayer(layer_no=2, material_name="密閉中空層"),
+        ],
+    )
+    resolved = resolve_construction(construction, get_reference_repository())
+    assert resolved.total_resistance_winter == pytest.approx(1 / 23 + 0.001 + 0.15 + 1 / 9)
+    assert resolved.unresolved_layers == ()
+
+
+def test_unknown_material_is_recorded_as_unresolved():
+    """A layer with no resistance, conductivity or known material adds nothing but is reported"""
+    construction = ConstructionAssembly(
+        id="W3",
+        name="外壁",
+        layers=[
+            ConstructionLayer(layer_no=1, material_name="コンクリート", thickness_mm=150.0, thermal_conductivity=1.6),
+            ConstructionLayer(layer_no=2, material_name="未登録材料", thickness_mm=20.0),
+        ],
+    )
+    resolved = resolve_construction(construction, get_reference_repository())
+    assert resolved.unresolved_layers == (2,)
+    assert resolved.total_resistance_summer == pytest.approx(1 / 23 + 0.15 / 1.6 + 1 / 9)
+
+
+def test_shared_assemblies_resolve_once():
+    """Assemblies with identical content share one cached result regardless of id"""
+    clear_construction_cache()
+    resolved = resolve_constructions([_wall("W1"), _wall("W2")], get_reference_repository())
+    assert resolved["W1"] is resolved["W2"]
@@ -0,0 +1,83 @@
+import io
+import zipfile
+
+import openpyxl
+
+from app.models.schemas import Project, Room
+from app.services.calculation import run_calculation
+from app.services.excel_export import _cell_values, export_excel, export_excel_xml, export_room_report, get_export_template, merged_anchor_index, resolve_anchor
+
+
+def test_export_template_is_cached_until_sources_change():
+    first = get_export_template()
+    assert get_export_template() is first
+    assert first.plan.writes and first.plan.injections
+
+
+def test_export_excel_applies_write_plan():
+    project = Project(id="p", name="テスト案件", region="東京")
+    wb = openpyxl.load_workbook(io.BytesIO(export_excel(project)))
+    ws = next(ws for ws in wb.worksheets if ws.title.strip() == "様式001")
+    assert ws["C4"].value == "テスト案件"
+    assert wb.calculation.fullCalcOnLoad
+
+
+def test_merged_anchor_index_maps_cells_to_top_left():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.merge_cells("B2:D3")
+    anchors = merged_anchor_index(ws)
+
+    assert resolve_anchor(anchors, "C3") == "B2"
+    assert resolve_anchor(anchors, "B2") == "B2"
+    assert resolve_anchor(anchors, "E5") == "E5"
+    assert len(anchors) == 5
+
+
+def test_room_report_writes_summary_and_one_sheet_per_room():
+    project = Project(
+        id="p",
+        name="P",
+        region="東京",
+        rooms=[Room(id="r1", name="会議室", area_m2=20), Room(id="r2", name="会議室", area_m2=10)],
+    )
+    calc = run_calculation(project)
+    wb = openpyxl.load_workbook(io.BytesIO(export_room_report(project, calc)), read_only=True)
+
+    assert wb.sheetnames == ["系統集計", "会議室", "会議室(2)"]
+    rows = list(wb["会議室(2)"].values)
+    assert rows[0] == ("室ID", "r2")
+
+
+def test_xml_engine_matches_openpyxl_export():
+    project = Project(id="p", name="A&B", region="東京")
+
+    def cells(payload: bytes):
+        wb = openpyxl.load_workbook(io.BytesIO(payload))
+        assert wb.calculation.fullCalcOnLoad
+        return {(ws.title, c.coordinate): c.value for ws in wb.worksheets for row in ws.iter_rows() for c in row}
+
+    assert cells(export_excel_xml(project)) == cells(export_excel(project))
+
+
+def test_reused_template_workbook_matches_a_fresh_load():
+    """Cells written by one export do not leak into the next"""
+    template = get_export_template()
+    rooms = [Room(id=f"r{i}", name=f"室{i}", area_m2=20) for i in range(30)]
+    full = Project(id="p", name="全室", region="東京", rooms=rooms)
+    export_excel(full, run_calculation(full))
+
+    project = Project(id="q", name="空", region="大阪")
+    wb = openpyxl.load_workbook(io.BytesIO(template.template_bytes))
+    for (sheet_idx, cell_ref), value in _cell_values(template, project, None).items():
+        wb.worksheets[sheet_idx][cell_ref].value = value
+    wb.calculation.fullCalcOnLoad = True
+    expected = io.BytesIO()
+    wb.save(expected)
+
+    def parts(payload):
+        archive = zipfile.ZipFile(payload)
+        # core.xml carries the save time
+        return {name: archive.read(name) for name in archive.namelist() if name != "docProps/core.xml"}
+
+    assert parts(io.BytesIO(export_excel(project))) == parts(expected)
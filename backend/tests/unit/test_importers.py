@@ -0,0 +1,99 @@
+import io
+
+from app.models.schemas import CsvImportRequest, Project, Room
+from app.services import importers
+from app.services.importers import _parse_table, apply_csv_import, commit_import, iter_table, preview_csv_import
+
+
+def test_parse_table_resolves_aliases_and_column_types():
+    """Japanese headers map to canonical fields; ids stay text, numeric fields become floats"""
+    records, issues = _parse_table("rooms", "室ID,室名,面積,備考欄\n101,会議室,20.5,x\n", True)
+
+    assert records == [{"id": "101", "name": "会議室", "area_m2": 20.5}]
+    assert [i.code for i in issues] == ["unknown_column"]
+
+
+def test_parse_table_reports_invalid_numbers_and_duplicates():
+    records, issues = _parse_table("rooms", "id,name,area\nr1,A,abc\nr1,B,10\n", True)
+
+    assert [r["name"] for r in records] == ["A", "B"]
+    assert [(i.code, i.row) for i in issues] == [("invalid_value", 2), ("duplicate_id", 3)]
+
+
+def test_iter_table_is_lazy():
+    """Rows are parsed on demand and issues are reported as each row is read"""
+    issues = []
+    source = io.StringIO("id,room_id\ns1,r1\n,r1\ns3,r1\n")
+    rows = iter_table("surfaces", source, True, issues.append)
+
+    assert next(rows) == {"id": "s1", "room_id": "r1"}
+    assert issues == []
+    assert next(rows) == {"room_id": "r1"}
+    assert [i.code for i in issues] == ["missing_required"]
+
+
+def test_preview_token_commits_cached_records():
+    """Apply from an import token reuses the preview's parsed records and is single use"""
+    req = CsvImportRequest(datasets=[{"filename": "rooms.csv", "content": "id,name,area\nr1,A,10\n"}])
+    preview = preview_csv_import(req)
+    assert preview.import_token is not None
+
+    applied = commit_import(preview.import_token)
+    assert [r.id for r in applied.project.rooms] == ["r1"]
+    assert [(d.entity, d.add) for d in applied.diffs] == [("rooms", 1)]
+    assert commit_import(preview.import_token) is None
+
+
+def test_preview_with_errors_issues_no_token():
+    req = CsvImportRequest(datasets=[{"filename": "rooms.csv", "content": "name,area\nA,10\n"}])
+    assert preview_csv_import(req).import_token is None
+
+
+def test_apply_reports_field_level_changes():
+    project = Project(id="p", name="P", region="東京", rooms=[Room(id="r1", name="A", area_m2=10)])
+    req = CsvImportRequest(
+        project=project,
+        datasets=[{"filename": "rooms.csv", "content": "id,name,area\nr1,A,12\nr2,B,5\n"}],
+    )
+    applied = apply_csv_import(req)
+
+    diff = applied.diffs[0]
+    assert (diff.add, diff.update) == (1, 1)
+    assert [c.id for c in diff.changes] == ["r1"]
+    assert diff.changes[0].fields["area_m2"].model_dump() == {"old": 10.0, "new": 12.0}
+    assert [r.area_m2 for r in applied.project.rooms] == [12.0, 5.0]
+
+
+def test_apply_reports_model_errors_without_mutating_project():
+    project = Project(id="p", name="P", region="東京")
+    req = CsvImportRequest(
+        project=project,
+        datasets=[{"filename": "surfaces.csv", "content": "id,room_id,kind\ns1,r1,window\n"}],
+    )
+    applied = apply_csv_import(req)
+
+    assert [(i.code, i.field, i.row) for i in applied.issues] == [("invalid_value", "kind", 2)]
+    assert applied.project.surfaces == []
+
+
+def test_issue_rows_are_file_rows():
+    """Blank lines and skipped rows still count, for both parse and model errors"""
+    content = "id,room_id,kind,area\ns1,r1,wall,10\n\ns2,r1,wall,abc\n\ns3,r1,bogus,5\n"
+    preview = preview_csv_import(CsvImportRequest(datasets=[{"filename": "surfaces.csv", "content": content}]))
+    assert [(i.code, i.row) for i in preview.issues] == [("invalid_value", 4)]
+
+    content = "id,room_id,kind\n\ns1,r1,wall\n,,\ns2,r1,wall\n\ns3,r1,bogus\n"
+    applied = apply_csv_import(CsvImportRequest(datasets=[{"filename": "surfaces.csv", "content": content}]))
+    assert [(i.code, i.row) for i in applied.issues] == [("empty_row", 4), ("invalid_value", 7)]
+
+
+def test_preview_token_weight_counts_the_captured_project(monkeypatch):
+    """A small import into a large project is not cached when the project alone exceeds the cache"""
+    project = Project(
+        id="p1", name="P", region="東京", rooms=[Room(id=f"r{i}", name="室", area_m2=10) for i in range(100)]
+    )
+    req = CsvImportRequest(project=project, datasets=[{"filename": "rooms.csv", "content": "id,name,area\nx,A,10\n"}])
+    assert preview_csv_import(req).import_token is not None
+
+    monkeypatch.setattr(importers._import_cache, "max_weight", 50)
+    assert preview_csv_import(req).import_token is None
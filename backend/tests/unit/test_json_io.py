@@ -0,0 +1,14 @@
+import json
+
+from app.models.schemas import Project, Room
+from app.services.calculation import run_calculation
+from app.services.json_io import export_project_json, export_project_json_bytes
+
+
+def test_export_json_bytes_match_dict_export():
+    project = Project(id="p", name="P", region="東京", rooms=[Room(id="r1", name="会議室", area_m2=20)])
+    calc = run_calculation(project)
+
+    expected = export_project_json(project, calc.model_dump()).model_dump(mode="json")
+    assert json.loads(export_project_json_bytes(project, calc)) == expected
+    assert json.loads(export_project_json_bytes(project)) == {"payload": {"project": project.model_dump(mode="json")}}
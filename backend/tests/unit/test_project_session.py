@@ -0,0 +1,63 @@
+import pytest
+
+from app.models.schemas import EntityChange, InternalLoad, JsonPatchOperation, Project, Room
+from app.services.calculation import run_calculation
+from app.services.project_session import JsonPatchError, ProjectSession, VersionConflict
+
+
+def _project() -> Project:
+    return Project(
+        id="p",
+        name="P",
+        region="東京",
+        rooms=[Room(id="r1", name="A", area_m2=20), Room(id="r2", name="B", area_m2=30)],
+        internal_loads=[
+            InternalLoad(id="il1", room_id="r1", kind="lighting", sensible_w=400),
+            InternalLoad(id="il2", room_id="r2", kind="lighting", sensible_w=400),
+        ],
+    )
+
+
+def _ops(*ops: dict) -> list[JsonPatchOperation]:
+    return [JsonPatchOperation.model_validate(op) for op in ops]
+
+
+def test_json_patch_recalculates_only_affected_rooms():
+    session = ProjectSession(_project())
+    delta = session.apply(_ops({"op": "replace", "path": "/internal_loads/0/sensible_w", "value": 800}), [])
+
+    assert delta.version == 1
+    assert [r.room_id for r in delta.room_results] == ["r1"]
+    assert session.project.internal_loads[0].sensible_w == 800
+    full = run_calculation(session.project)
+    assert session.room_results() == full.room_results
+    assert delta.totals == full.totals
+
+
+def test_patch_reports_issue_delta_and_removed_rooms():
+    session = ProjectSession(_project())
+    delta = session.apply(_ops({"op": "remove", "path": "/rooms/1"}), [])
+
+    assert [i.code for i in delta.added] == ["reference_not_found"]
+    assert not delta.valid and not delta.calculated
+
+    delta = session.apply([], [EntityChange(entity="internal_loads", delete=["il2"])])
+    assert delta.valid and delta.calculated
+    assert [i.code for i in delta.removed] == ["reference_not_found"]
+    assert [r.room_id for r in session.room_results()] == ["r1"]
+
+
+def test_failed_patch_leaves_session_untouched():
+    session = ProjectSession(_project())
+    with pytest.raises(JsonPatchError):
+        session.apply(
+            _ops(
+                {"op": "replace", "path": "/rooms/0/name", "value": "X"},
+                {"op": "test", "path": "/rooms/1/name", "value": "nope"},
+            ),
+            [],
+        )
+    assert session.project.rooms[0].name == "A"
+    assert session.version == 0
+    with pytest.raises(VersionConflict):
+        session.apply([], [], base_version=3)
@@ -1,5 +1,5 @@
-from app.services.validation import validate_project
-from app.models.schemas import Project, Room, InternalLoad, ValidationLevel
+from app.services.validation import ValidationSession, validate_and_plan, validate_project
+from app.models.schemas import EntityChange, Project, Room, InternalLoad, ValidationLevel
 
 
 def test_validate_project_with_empty_ids():
@@ -86,3 +86,97 @@ def test_validate_project_with_unique_ids():
     # Should have no duplicate ID errors
     duplicate_errors = [i for i in issues if i.code == "duplicate_id"]
     assert len(duplicate_errors) == 0, "Unique IDs should not trigger errors"
+
+
+def test_validate_and_plan_groups_children_by_room():
+    """The fused pass returns the same issues as validate_project plus per-room groupings"""
+    project = Project(
+        id="test-project",
+        name="Test Project",
+        region="東京",
+        rooms=[Room(id="room1", name="Room 1", area_m2=20)],
+        internal_loads=[
+            InternalLoad(id="load1", room_id="room1", kind="lighting", sensible_w=100),
+            InternalLoad(id="load2", room_id="missing", kind="occupancy", sensible_w=200),
+        ]
+    )
+
+    issues, plan = validate_and_plan(project)
+
+    assert issues == validate_project(project)
+    assert [i.code for i in issues] == ["reference_not_found"]
+    assert [x.id for x in plan.room_internal_loads["room1"]] == ["load1"]
+    assert [x.id for x in plan.room_internal_loads["missing"]] == ["load2"]
+
+
+def test_validation_session_returns_issue_delta():
+    """Edits re-check only affected references and report added/removed issues"""
+    project = Project(
+        id="test-project",
+        name="Test Project",
+        region="東京",
+        rooms=[Room(id="room1", name="Room 1", area_m2=20)],
+        internal_loads=[InternalLoad(id="load1", room_id="room2", kind="lighting", sensible_w=100)],
+    )
+    session = ValidationSession(project)
+    assert {i.message for i in session.issues} == {i.message for i in validate_project(project)}
+
+    added, removed = session.apply(
+        [EntityChange(entity="rooms", upsert=[{"id": "room2", "name": "Room 2", "area_m2": 10}])]
+    )
+    assert added == []
+    assert [i.code for i in removed] == ["reference_not_found"]
+
+    added, removed = session.apply([EntityChange(entity="rooms", delete=["room1", "room2"])])
+    assert sorted(i.code for i in added) == ["empty_project", "reference_not_found"]
+    assert removed == []
+
+
+def _issue_keys(issues):
+    return sorted((i.code, i.entity, i.field, i.message) for i in issues)
+
+
+def test_validation_session_matches_validate_project_with_duplicate_and_empty_ids():
+    """Earlier duplicates and empty-id items keep their references checked"""
+    project = Project(
+        id="test-project",
+        name="Test Project",
+        region="東京",
+        rooms=[Room(id="room1", name="Room 1", area_m2=20, system_id="sysX"), Room(id="room1", name="Dup", area_m2=5)],
+        internal_loads=[
+            InternalLoad(id="load1", room_id="missing1", kind="lighting"),
+            InternalLoad(id="load1", room_id="room1", kind="lighting"),
+            InternalLoad(id="", room_id="missing2", kind="lighting"),
+            InternalLoad(id="", room_id="missing3", kind="lighting"),
+        ],
+    )
+    session = ValidationSession(project)
+    assert _issue_keys(session.issues) == _issue_keys(validate_project(project))
+
+    added, removed = session.apply(
+        [EntityChange(entity="internal_loads", upsert=[{"id": "load1", "room_id": "room1", "kind": "lighting"}])]
+    )
+    fixed = project.model_copy(update={"internal_loads": [project.internal_loads[1], *project.internal_loads[2:]]})
+    assert _issue_keys(session.issues) == _issue_keys(validate_project(fixed))
+    assert added == []
+    assert sorted(i.code for i in removed) == ["duplicate_id", "reference_not_found"]
+
+
+def test_validation_session_rechecks_empty_required_references():
+    """Adding or removing a room with an empty id re-checks loads whose room_id is empty"""
+    project = Project(
+        id="test-project",
+        name="Test Project",
+        region="東京",
+        rooms=[Room(id="room1", name="Room 1", area_m2=20)],
+        internal_loads=[InternalLoad(id="load1", room_id="", kind="lighting")],
+    )
+    session = ValidationSession(project)
+    assert _issue_keys(session.issues) == _issue_keys(validate_project(project))
+
+    session.apply([EntityChange(entity="rooms", upsert=[{"id": "", "name": "Blank", "area_m2": 10}])])
+    with_blank = project.model_copy(update={"rooms": [*project.rooms, Room(id="", name="Blank", area_m2=10)]})
+    assert _issue_keys(session.issues) == _issue_keys(validate_project(with_blank))
+
+    session.apply([EntityChange(entity="rooms", delete=[""])])
+    assert _issue_keys(session.issues) == _issue_keys(validate_project(project))
@@ -0,0 +1,32 @@
+from app.services.xlsx_patch import index_sheet
+
+SHEET = (
+    b'<worksheet><sheetData><row r="1"><c r="A1" s="3" t="s"><v>0</v></c><c r="C1"/></row>'
+    b'<row r="3" ht="12"/></sheetData></worksheet>'
+)
+
+
+def test_index_sheet_replaces_and_inserts_cells():
+    patch = index_sheet(SHEET, ["A1", "B1", "A2", "B3"])
+
+    xml = patch.render({"A1": 1.5, "B1": "x&y", "A2": "=SUM(A1:B1)", "B3": True})
+    assert xml == (
+        b'<worksheet><sheetData><row r="1"><c r="A1" s="3"><v>1.5</v></c>'
+        b'<c r="B1" t="inlineStr"><is><t xml:space="preserve">x&amp;y</t></is></c><c r="C1"/></row>'
+        b'<row r="2"><c r="A2"><f>SUM(A1:B1)</f><v></v></c></row>'
+        b'<row r="3" ht="12"><c r="B3" t="b"><v>1</v></c></row></sheetData></worksheet>'
+    )
+
+
+def test_unset_cells_keep_template_xml():
+    patch = index_sheet(SHEET, ["A1", "A2"])
+
+    assert patch.render({}) == SHEET.replace(b'<row r="3" ht="12"/>', b'<row r="3" ht="12"></row>')
+
+
+def test_non_finite_numbers_are_written_as_empty_cells():
+    patch = index_sheet(SHEET, ["A1", "B1"])
+
+    xml = patch.render({"A1": float("nan"), "B1": float("-inf")})
+    assert b'<c r="A1" s="3" t="n"><v></v></c><c r="B1" t="n"><v></v></c>' in xml
+    assert b"nan" not in xml and b"inf" not in xml